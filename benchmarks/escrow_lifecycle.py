@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""
+Gas and latency benchmark of the escrow lifecycle in tester.
+
+For every number of miners the escrow is filled with pre-deposited miners,
+then two Ursulas and Alice run deposit, lock, confirmActivity, mint, withdraw,
+createPolicy, refund, revokePolicy and findCumSum. Used gas and wall time of every method
+are written to JSON and compared with the committed baseline.
+
+    python3 benchmarks/escrow_lifecycle.py --miners 10 100 1000 --output results.json
+    python3 benchmarks/escrow_lifecycle.py --save-baseline
+
+Exits with status 1 if gas of any method exceeds the baseline by more than the threshold
+or if the baseline has no results for a method. To compare two revisions,
+save the baseline on the first one and run the benchmark on the second one.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from os.path import dirname, join, abspath
+
+from nkms_eth.blockchain import TesterBlockchain
+from nkms_eth.escrow import Escrow
+from nkms_eth.token import NuCypherKMSToken
+
+
+BASELINE_PATH = join(dirname(abspath(__file__)), 'baseline.json')
+MINERS = (10, 100, 1000)
+PRE_DEPOSIT_CHUNK = 20
+
+
+class Benchmark:
+    """Measures used gas and wall time of transactions and calls"""
+
+    def __init__(self, testerchain: TesterBlockchain):
+        self.testerchain = testerchain
+        self.results = dict()
+
+    def transact(self, name: str, transactor, *args) -> str:
+        """Sends the transaction and waits for the receipt, transactor is a bound contract method"""
+
+        start = time.perf_counter()
+        txhash = transactor(*args)
+        receipt = self.testerchain.receipts.wait(txhash)
+        seconds = time.perf_counter() - start
+
+        self.results[name] = {'gas_used': receipt['gasUsed'], 'seconds': seconds}
+        return txhash
+
+    def call(self, name: str, contract, method: str, *args):
+        """Executes the view and estimates its gas as if it was sent in a transaction"""
+
+        start = time.perf_counter()
+        result = getattr(contract.call(), method)(*args)
+        seconds = time.perf_counter() - start
+
+        gas_used = getattr(contract.estimateGas(), method)(*args)
+        self.results[name] = {'gas_used': gas_used, 'seconds': seconds}
+        return result
+
+
+def deploy(testerchain: TesterBlockchain):
+    """Deploys the token, escrow and policy manager"""
+
+    creator = testerchain._chain.web3.eth.accounts[0]
+
+    token = NuCypherKMSToken(blockchain=testerchain)
+    token.arm()
+    token.deploy()
+
+    escrow = Escrow(blockchain=testerchain, token=token)
+    escrow.arm()
+    escrow.deploy()
+
+    policy_manager, txhash = testerchain._chain.provider.deploy_contract(
+        'PolicyManager', deploy_args=[escrow.contract.address],
+        deploy_transaction={'from': creator})
+    testerchain.receipts.wait(txhash)
+    txhash = escrow.transact({'from': creator}).setPolicyManager(policy_manager.address)
+    testerchain.receipts.wait(txhash)
+
+    return token, escrow, policy_manager
+
+
+def pre_deposit(testerchain: TesterBlockchain, token: NuCypherKMSToken, escrow: Escrow, miners: int) -> None:
+    """Fills the escrow with miners which never confirm activity"""
+
+    creator = testerchain._chain.web3.eth.accounts[0]
+    value, periods = 10 ** 6, 10
+    owners = ['0x{:040x}'.format(0x1000 + index) for index in range(miners)]
+
+    txhash = token.transact({'from': creator}).approve(escrow.contract.address, value * miners)
+    testerchain.receipts.wait(txhash)
+
+    txhashes = list()
+    for start in range(0, miners, PRE_DEPOSIT_CHUNK):
+        chunk = owners[start:start + PRE_DEPOSIT_CHUNK]
+        txhashes.append(escrow.transact({'from': creator}).preDeposit(chunk, [value] * len(chunk),
+                                                                     [periods] * len(chunk)))
+    testerchain.receipts.wait_all(txhashes)
+
+
+def run(testerchain: TesterBlockchain, miners: int) -> dict:
+    """Runs the lifecycle with the given number of miners, returns results by method"""
+
+    web3 = testerchain._chain.web3
+    creator, ursula1, ursula2, alice, *everyone_else = web3.eth.accounts
+    benchmark = Benchmark(testerchain)
+
+    token, escrow, policy_manager = deploy(testerchain)
+    pre_deposit(testerchain, token, escrow, miners - 2)
+
+    for ursula in (ursula1, ursula2):
+        testerchain.receipts.wait(token.transact({'from': creator}).transfer(ursula, 10 ** 7))
+        testerchain.receipts.wait(token.transact({'from': ursula}).approve(escrow.contract.address, 10 ** 7))
+
+    # Ursula(2) unlocks all tokens after one period to withdraw them later
+    testerchain.receipts.wait(escrow.transact({'from': ursula2}).deposit(2 * 10 ** 6, 1))
+    testerchain.receipts.wait(escrow.transact({'from': ursula2}).switchLock())
+
+    benchmark.transact('deposit', escrow.transact({'from': ursula1}).deposit, 5 * 10 ** 6, 10)
+    benchmark.transact('lock', escrow.transact({'from': ursula1}).lock, 0, 5)
+
+    policy_id = os.urandom(20)
+    benchmark.transact('createPolicy', policy_manager.transact({'from': alice, 'value': 10000}).createPolicy,
+                       policy_id, 10, [ursula1])
+    refunded_policy_id = os.urandom(20)
+    testerchain.receipts.wait(policy_manager.transact({'from': alice, 'value': 10000})
+                              .createPolicy(refunded_policy_id, 10, [ursula1]))
+
+    testerchain.wait_time(escrow.hours_per_period)
+    benchmark.transact('confirmActivity', escrow.transact({'from': ursula1}).confirmActivity)
+
+    testerchain.wait_time(escrow.hours_per_period)
+    benchmark.call('findCumSum', escrow.contract, 'findCumSum', 0, 0, 1)
+    benchmark.transact('mint', escrow.transact({'from': ursula1}).mint)
+
+    # Part of the policy periods passed before the refund
+    testerchain.wait_time(escrow.hours_per_period * 2)
+    benchmark.transact('withdraw', escrow.transact({'from': ursula2}).withdraw, 1)
+    benchmark.transact('refund', policy_manager.transact({'from': alice}).refund, refunded_policy_id)
+    benchmark.transact('revokePolicy', policy_manager.transact({'from': alice}).revokePolicy, policy_id)
+
+    return benchmark.results
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float, time_threshold: float=None) -> list:
+    """Returns descriptions of all methods which are worse than the baseline"""
+
+    regressions = list()
+    for miners, methods in sorted(results.items(), key=lambda item: int(item[0])):
+        for method, result in sorted(methods.items()):
+            base = baseline.get(miners, dict()).get(method)
+            if base is None:
+                regressions.append('{} miners, {}: no baseline'.format(miners, method))
+                continue
+
+            if result['gas_used'] > base['gas_used'] * (1 + threshold):
+                regressions.append('{} miners, {}: gas {} > baseline {}'.format(
+                    miners, method, result['gas_used'], base['gas_used']))
+            if time_threshold is not None and result['seconds'] > base['seconds'] * (1 + time_threshold):
+                regressions.append('{} miners, {}: {:.3f}s > baseline {:.3f}s'.format(
+                    miners, method, result['seconds'], base['seconds']))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--miners', type=int, nargs='+', default=MINERS, help='numbers of miners in the escrow')
+    parser.add_argument('--output', help='JSON file for the results')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='JSON file with the baseline results')
+    parser.add_argument('--threshold', type=float, default=0.05, help='allowed relative gas increase')
+    parser.add_argument('--time-threshold', type=float, default=None,
+                        help='allowed relative time increase, time is not compared by default')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    args = parser.parse_args()
+
+    testerchain = TesterBlockchain()
+    web3 = testerchain._chain.web3
+
+    results = dict()
+    for miners in args.miners:
+        snapshot_id = web3.testing.snapshot()
+        results[str(miners)] = run(testerchain, miners)
+        web3.testing.revert(snapshot_id)
+
+        for method, result in sorted(results[str(miners)].items()):
+            print('{} miners, {} = {} gas, {:.3f}s'.format(miners, method, result['gas_used'], result['seconds']))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        return
+
+    if not os.path.exists(args.baseline):
+        print('No baseline {}, save it with --save-baseline'.format(args.baseline))
+        sys.exit(1)
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = find_regressions(results, baseline, args.threshold, args.time_threshold)
+    for regression in regressions:
+        print('Regression: ' + regression)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
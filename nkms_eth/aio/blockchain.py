@@ -0,0 +1,73 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from nkms_eth.blockchain import Blockchain
+
+
+class AsyncBlockchain:
+    """
+    Asyncio gateway to a running blockchain.
+
+    Blocking web3 requests are executed in a thread pool and transaction receipts
+    are polled without blocking the event loop, so one loop can overlap
+    the receipt waits of many transactions.
+
+    """
+
+    max_workers = 10
+
+    def __init__(self, blockchain: Blockchain, executor: ThreadPoolExecutor=None, poll_interval: float=0.1):
+        self.blockchain = blockchain
+        self.poll_interval = poll_interval
+
+        if executor is None:
+            # Requests to the in-process EVM must be sent one at a time
+            max_workers = self.max_workers if blockchain.concurrent_requests else 1
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.executor = executor
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(blockchain={})"
+        return r.format(class_name, self.blockchain)
+
+    async def run(self, function, *args, **kwargs):
+        """Executes the blocking function in the thread pool"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+
+    async def wait_for_receipt(self, txhash: str, timeout: float=None) -> dict:
+        """Waits for the receipt from the shared receipt watcher, raises ReceiptWatcher.Timeout"""
+
+        receipts = self.blockchain.receipts
+        future = asyncio.wrap_future(receipts.watch(txhash, timeout=timeout))
+        while not future.done():
+            # One poll resolves the receipts of all waiting coroutines
+            if await self.run(receipts.poll) == 0:
+                await asyncio.sleep(self.poll_interval)
+        return await future
+
+    async def wait_time(self, wait_hours: int) -> None:
+        await self.run(self.blockchain.wait_time, wait_hours)
+
+
+class AsyncTransactor:
+    """
+    Async counterpart of contract.transact(transaction),
+    each contract method sends the transaction and waits for its receipt.
+    """
+
+    def __init__(self, blockchain: AsyncBlockchain, transactor):
+        self._blockchain = blockchain
+        self._transactor = transactor
+
+    def __getattr__(self, name):
+        method = getattr(self._transactor, name)
+
+        async def transact(*args) -> str:
+            txhash = await self._blockchain.run(method, *args)
+            await self._blockchain.wait_for_receipt(txhash)
+            return txhash
+
+        return transact
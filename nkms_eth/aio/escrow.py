@@ -0,0 +1,44 @@
+from typing import List, AsyncGenerator
+
+from nkms_eth.escrow import Escrow
+from .blockchain import AsyncBlockchain, AsyncTransactor
+from .token import AsyncNuCypherKMSToken
+
+addr = str
+
+
+class AsyncEscrow:
+    """Async counterpart of Escrow, wraps a deployed escrow"""
+
+    def __init__(self, blockchain: AsyncBlockchain, token: AsyncNuCypherKMSToken, escrow: Escrow):
+        self.blockchain = blockchain
+        self.token = token
+        self.escrow = escrow
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(address='{}')"
+        return r.format(class_name, self.escrow.contract.address)
+
+    def transact(self, *args, **kwargs) -> AsyncTransactor:
+        """Invoke contract -> State change, methods are awaited until the receipt"""
+        return AsyncTransactor(self.blockchain, self.escrow.transact(*args, **kwargs))
+
+    async def swarm(self, page_size: int=1000) -> AsyncGenerator[addr, None]:
+        """Generates all miner addresses, one request per page"""
+
+        start = 0
+        while True:
+            page = await self.blockchain.run(self.escrow._get_miners_page, start, page_size)
+            for miner in page:
+                yield miner
+            if len(page) < page_size:
+                break
+            start += len(page)
+
+    async def sample(self, quantity: int=10, additional_ursulas: float=1.7,
+                     attempts: int=5, duration: int=10) -> List[addr]:
+        """Select n random staking Ursulas, see Escrow.sample"""
+        return await self.blockchain.run(self.escrow.sample, quantity=quantity,
+                                         additional_ursulas=additional_ursulas,
+                                         attempts=attempts, duration=duration)
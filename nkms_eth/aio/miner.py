@@ -0,0 +1,59 @@
+from typing import Tuple
+
+from nkms_eth.miner import Miner
+from .escrow import AsyncEscrow
+
+
+class AsyncMiner:
+    """
+    Async counterpart of Miner.
+
+    Each method awaits its transactions one by one,
+    but the receipt waits of different miners overlap on the event loop.
+
+    """
+
+    def __init__(self, escrow: AsyncEscrow, address: str):
+        self.blockchain = escrow.blockchain
+        self.token = escrow.token
+        self.escrow = escrow
+        self.miner = Miner(blockchain=escrow.blockchain.blockchain, token=escrow.token.token,
+                           escrow=escrow.escrow, address=address)
+
+    @property
+    def address(self) -> str:
+        return self.miner.address
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(address='{}')"
+        return r.format(class_name, self.address)
+
+    async def lock(self, amount: int, locktime: int) -> Tuple[str, str, str]:
+        """Deposit and lock tokens for mining."""
+
+        escrow_address = self.escrow.escrow.contract.address
+        approve_txhash = await self.token.transact({'from': self.address}).approve(escrow_address, amount)
+        deposit_txhash = await self.escrow.transact({'from': self.address}).deposit(amount, locktime)
+        lock_txhash = await self.escrow.transact({'from': self.address}).switchLock()
+
+        return approve_txhash, deposit_txhash, lock_txhash
+
+    async def mint(self) -> str:
+        """Computes and transfers tokens to the miner's account"""
+        return await self.escrow.transact({'from': self.address}).mint()
+
+    async def confirm_activity(self) -> str:
+        """Miner rewarded for every confirmed period"""
+        return await self.escrow.transact({'from': self.address}).confirmActivity()
+
+    async def balance(self) -> int:
+        """Check miner's current balance"""
+        return await self.token.balance(self.address)
+
+    async def withdraw(self) -> str:
+        """withdraw rewarded tokens"""
+
+        tokens_amount = await self.blockchain.run(self.escrow.escrow._get_miner_info,
+                                                  self.escrow.escrow.MinerInfoField.VALUE, self.address)
+        return await self.escrow.transact({'from': self.address}).withdraw(tokens_amount)
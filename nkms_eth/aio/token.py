@@ -0,0 +1,23 @@
+from nkms_eth.token import NuCypherKMSToken
+from .blockchain import AsyncBlockchain, AsyncTransactor
+
+
+class AsyncNuCypherKMSToken:
+    """Async counterpart of NuCypherKMSToken, wraps a deployed token"""
+
+    def __init__(self, blockchain: AsyncBlockchain, token: NuCypherKMSToken):
+        self.blockchain = blockchain
+        self.token = token
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(token={})"
+        return r.format(class_name, self.token)
+
+    def transact(self, *args) -> AsyncTransactor:
+        """Invoke contract -> State change, methods are awaited until the receipt"""
+        return AsyncTransactor(self.blockchain, self.token.transact(*args))
+
+    async def balance(self, address: str) -> int:
+        """Get the balance of a token address"""
+        return await self.blockchain.run(self.token.balance, address)
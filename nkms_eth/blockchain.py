@@ -1,4 +1,8 @@
+import time
+
 from nkms_eth.config import PopulusConfig
+from nkms_eth.gas import GasAccountant
+from nkms_eth.receipts import ReceiptWatcher
 
 
 class Blockchain:
@@ -14,6 +18,8 @@ class Blockchain:
 
     _network = ''
     _instance = False
+    concurrent_requests = True    # Requests can be sent from multiple threads
+    accepts_nonce = True          # Transactions can be sent with explicit nonces
 
     class AlreadyRunning(Exception):
         pass
@@ -42,6 +48,14 @@ class Blockchain:
 
         # Opens and preserves connection to a running populus blockchain
         self._chain = self._project.get_chain(self._network).__enter__()
+        for middleware in populus_config.middlewares:
+            self._chain.web3.add_middleware(middleware)
+
+        # Shared by all contracts to wait for transaction receipts
+        self.receipts = ReceiptWatcher(blockchain=self, timeout=timeout)
+
+        # Opt-in gas accounting of all contract transactions
+        self.gas_accountant = None
 
     def disconnect(self):
         self._chain.__exit__(None, None, None)
@@ -54,6 +68,27 @@ class Blockchain:
         r = "{}(network={}, timeout={})"
         return r.format(class_name, self._network, self._timeout)
 
+    def enable_gas_accounting(self) -> GasAccountant:
+        """Starts recording gasUsed and latency of every contract transaction"""
+        if self.gas_accountant is None:
+            self.gas_accountant = GasAccountant(blockchain=self)
+        return self.gas_accountant
+
+    def disable_gas_accounting(self) -> None:
+        self.gas_accountant = None
+
+    def gas_stats(self, by_sender: bool=False) -> dict:
+        """Aggregated gas usage by contract and method, empty if gas accounting is disabled"""
+        if self.gas_accountant is None:
+            return dict()
+        return self.gas_accountant.stats(by_sender=by_sender)
+
+    def _instrument(self, contract_name: str, transaction: dict, transactor):
+        """Wraps contract.transact(transaction) with the gas accounting if enabled"""
+        if self.gas_accountant is None:
+            return transactor
+        return self.gas_accountant.instrument(contract_name, transaction, transactor)
+
     def get_contract(self, name):
         """
         Gets an existing contract from the network,
@@ -62,19 +97,35 @@ class Blockchain:
         """
         return self._chain.provider.get_contract(name)
 
-    def wait_time(self, wait_hours, step=50):
-        """Wait the specified number of wait_hours by comparing block timestamps."""
-
+    def _end_timestamp(self, wait_hours) -> int:
         wait_seconds = wait_hours * 60 * 60
         current_block = self._chain.web3.eth.getBlock(self._chain.web3.eth.blockNumber)
-        end_timestamp = current_block.timestamp + wait_seconds
+        return current_block.timestamp + wait_seconds
+
+    def wait_time(self, wait_hours, poll_interval=1):
+        """Wait the specified number of wait_hours by comparing timestamps of the new blocks."""
 
-        not_time_yet = True
-        while not_time_yet:
-            self._chain.wait.for_block(self._chain.web3.eth.blockNumber+step)
-            current_block = self._chain.web3.eth.getBlock(self._chain.web3.eth.blockNumber)
-            not_time_yet = current_block.timestamp < end_timestamp
+        web3 = self._chain.web3
+        end_timestamp = self._end_timestamp(wait_hours)
+        block_filter = web3.eth.filter('latest')
+        try:
+            while True:
+                for block_hash in web3.eth.getFilterChanges(block_filter.filter_id):
+                    if web3.eth.getBlock(block_hash).timestamp >= end_timestamp:
+                        return
+                time.sleep(poll_interval)
+        finally:
+            web3.eth.uninstallFilter(block_filter.filter_id)
 
 
 class TesterBlockchain(Blockchain):
     _network = 'tester'
+    concurrent_requests = False    # In-process EVM is not thread-safe
+    accepts_nonce = False          # eth-testrpc has no nonce in eth_sendTransaction, transactions are mined at once
+
+    def wait_time(self, wait_hours, poll_interval=None):
+        """Moves the chain time forward and mines one block at the target timestamp."""
+
+        end_timestamp = self._end_timestamp(wait_hours)
+        self._chain.web3.testing.timeTravel(end_timestamp)
+        self._chain.web3.testing.mine(1)
@@ -4,6 +4,7 @@ import appdirs
 import populus
 
 import nkms_eth
+from nkms_eth.profiler import RPCProfiler
 
 
 class PopulusConfig:
@@ -19,6 +20,19 @@ class PopulusConfig:
         self._populus_project = populus.Project(self._project_dir)
         self.project.config['chains.mainnetrpc.contracts.backends.JSONFile.settings.file_path'] = self._registrar_path
 
+        # Web3 middlewares installed when the blockchain connects
+        self.middlewares = list()
+
     @property
     def project(self):
         return self._populus_project
+
+    def add_middleware(self, middleware) -> None:
+        """Installs the web3 middleware on the chains connected with this config"""
+        self.middlewares.append(middleware)
+
+    def profile_rpc(self) -> RPCProfiler:
+        """Installs the JSON-RPC profiler middleware, returns the profiler"""
+        profiler = RPCProfiler()
+        self.add_middleware(profiler.middleware)
+        return profiler
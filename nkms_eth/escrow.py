@@ -1,14 +1,32 @@
 import random
-from typing import List, Tuple, Set, Generator
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Generator, NamedTuple
 from enum import Enum
 
+from eth_utils import encode_hex, event_abi_to_log_topic
 from populus.contracts.contract import PopulusContract
+from web3.utils.events import get_event_data
 
 from nkms_eth.token import NuCypherKMSToken
 from .blockchain import Blockchain
+from .mirror import EscrowStateMirror
+from .pipeline import TransactionPipeline
 
 addr = str
 
+MinerInfo = NamedTuple('MinerInfo', [('address', addr),
+                                     ('value', int),
+                                     ('decimals', int),
+                                     ('locked_value', int),
+                                     ('release', bool),
+                                     ('max_release_periods', int),
+                                     ('release_rate', int),
+                                     ('confirmed_periods', List[Tuple[int, int]]),
+                                     ('last_active_period', int),
+                                     ('downtime', List[Tuple[int, int]]),
+                                     ('miner_ids', List[bytes])])
+
 
 class Escrow:
     """
@@ -24,6 +42,7 @@ class Escrow:
     hours_per_period = 1       # 24 Hours
     min_release_periods = 1    # 30 Periods
     max_awarded_periods = 365  # Periods
+    max_periods = 10           # Confirmed but not yet mined periods
     min_allowed_locked = 10 ** 6
     max_allowed_locked = 10 ** 7 * NuCypherKMSToken.M
     reward = NuCypherKMSToken.saturation - NuCypherKMSToken.premine
@@ -70,6 +89,10 @@ class Escrow:
         self.token = token
         self.armed = False
         self.miners = list()
+        self.mirror = None
+        self._stake_indexes = dict()
+        self._dht = None     # type: Dict[addr, Tuple[bytes, ...]]
+        self._dht_block = None
 
     def __call__(self):
         """Gateway to contract function calls without state change."""
@@ -82,7 +105,7 @@ class Escrow:
     def arm(self) -> None:
         self.armed = True
 
-    def deploy(self) -> Tuple[str, str, str]:
+    def deploy(self, pipeline: bool=False) -> Tuple[str, str, str]:
         """
         Deploy and publish the NuCypherKMS Token contract
         to the blockchain network specified in self.blockchain.network.
@@ -91,6 +114,7 @@ class Escrow:
         Deployment can only ever be executed exactly once!
 
         Returns transaction hashes in a tuple: deploy, reward, and initialize.
+        Pipelined mode sends the reward and initialize transactions at once.
         """
 
         if self.armed is False:
@@ -105,14 +129,21 @@ class Escrow:
                                                           deploy_args=[self.token.contract.address] + self.mining_coeff,
                                                           deploy_transaction={'from': self.token.creator})
 
-        self.blockchain._chain.wait.for_receipt(deploy_txhash, timeout=self.blockchain._timeout)
+        self.blockchain.receipts.wait(deploy_txhash)
         self.contract = the_escrow_contract
 
+        if pipeline:
+            transactions = TransactionPipeline(blockchain=self.blockchain, sender=self.token.creator)
+            transactions.transact(self.token).transfer(self.contract.address, self.reward)
+            transactions.transact(self.contract).initialize()
+            reward_txhash, init_txhash = transactions.wait()
+            return deploy_txhash, reward_txhash, init_txhash
+
         reward_txhash = self.token.transact({'from': self.token.creator}).transfer(self.contract.address, self.reward)
-        self.blockchain._chain.wait.for_receipt(reward_txhash, timeout=self.blockchain._timeout)
+        self.blockchain.receipts.wait(reward_txhash)
 
         init_txhash = self.contract.transact({'from': self.token.creator}).initialize()
-        self.blockchain._chain.wait.for_receipt(init_txhash, timeout=self.blockchain._timeout)
+        self.blockchain.receipts.wait(init_txhash)
 
         return deploy_txhash, reward_txhash, init_txhash
 
@@ -128,22 +159,171 @@ class Escrow:
     def transact(self, *args, **kwargs):
         if self.contract is None:
             raise self.ContractDeploymentError('Contract must be deployed before executing transactions.')
-        return self.contract.transact(*args, **kwargs)
+        transactor = self.contract.transact(*args, **kwargs)
+        transaction = args[0] if args else kwargs.get('transaction')
+        return self.blockchain._instrument(self._contract_name, transaction, transactor)
+
+    def attach_mirror(self, from_block: int=0) -> EscrowStateMirror:
+        """
+        Builds a local mirror of the escrow state from the contract events.
+        When attached, the mirror is used instead of per-miner getMinerInfo calls.
+        """
+        self.mirror = EscrowStateMirror(escrow=self)
+        self.mirror.resync(from_block=from_block)
+        return self.mirror
+
+    def _get_miner_info(self, field: 'Escrow.MinerInfoField', miner: addr=null_addr, index: int=0) -> int:
+        """Read one numeric field of the miner's info"""
+        # TODO change when v4 web3.py will released
+        value = self.__call__().getMinerInfo(field.value, miner, index).encode('latin-1')
+        return self.blockchain._chain.web3.toInt(value)
+
+    def miner_info(self, miner: addr) -> MinerInfo:
+        """
+        Read the whole miner's info.
+        Scalar fields are read in one call and each non-empty array in one more call.
+        """
+
+        (value, decimals, locked_value, release, max_release_periods, release_rate,
+         confirmed_periods_length, last_active_period, downtime_length, miner_ids_length) = \
+            self.__call__().getMinerInfoFields(miner)
+
+        confirmed_periods, downtime, miner_ids = list(), list(), list()
+        if confirmed_periods_length > 0:
+            confirmed_periods = list(zip(*self.__call__().getConfirmedPeriods(miner)))
+        if downtime_length > 0:
+            downtime = list(zip(*self.__call__().getDowntime(miner)))
+        if miner_ids_length > 0:
+            # TODO change when v4 web3.py will released
+            miner_ids = [miner_id.encode('latin-1') for miner_id in self.__call__().getMinerIds(miner)]
+
+        return MinerInfo(address=miner,
+                         value=value,
+                         decimals=decimals,
+                         locked_value=locked_value,
+                         release=release,
+                         max_release_periods=max_release_periods,
+                         release_rate=release_rate,
+                         confirmed_periods=confirmed_periods,
+                         last_active_period=last_active_period,
+                         downtime=downtime,
+                         miner_ids=miner_ids)
+
+    def stake_index(self, duration: int) -> 'StakeIndex':
+        """
+        Returns the cached stake index for the duration,
+        the index is rebuilt in the new period and updated by the new events within the period.
+        """
+        index = self._stake_indexes.get(duration)
+        if index is None:
+            index = StakeIndex(escrow=self, duration=duration)
+            self._stake_indexes[duration] = index
+        index.update()
+        return index
+
+    def get_miner_ids(self, miner: addr) -> Tuple[bytes, ...]:
+        """Fetch all IDs of the miner in one call"""
+        # TODO change when v4 web3.py will released
+        return tuple(miner_id.encode('latin-1') for miner_id in self.__call__().getMinerIds(miner))
+
+    def _get_miners_ids(self, miners: List[addr]) -> Dict[addr, Tuple[bytes, ...]]:
+        """Fetch IDs of many miners in one call"""
+
+        lengths, ids = self.__call__().getMinersIds(miners)
+        result, start = dict(), 0
+        for miner, length in zip(miners, lengths):
+            # TODO change when v4 web3.py will released
+            result[miner] = tuple(miner_id.encode('latin-1') for miner_id in ids[start:start + length])
+            start += length
+        return result
+
+    def get_dht(self, page_size: int=1000) -> Dict[addr, Tuple[bytes, ...]]:
+        """
+        Directory of IDs of all miners which published them.
+
+        The directory is cached, the first call fetches IDs of all miners by pages
+        and next calls refetch only the miners with new MinerIdSet events.
+        """
+
+        web3 = self.blockchain._chain.web3
+        block_number = web3.eth.blockNumber
+
+        if self._dht is None:
+            miners = list(self.swarm(page_size=page_size))
+        elif block_number > self._dht_block:
+            filter_params = {'fromBlock': self._dht_block + 1, 'toBlock': block_number}
+            events = self.contract.pastEvents('MinerIdSet', filter_params).get()
+            miners = sorted({web3.toChecksumAddress(event['args']['owner']) for event in events})
+        else:
+            miners = list()
+
+        directory = dict(self._dht or dict())
+        for start in range(0, len(miners), page_size):
+            for miner, ids in self._get_miners_ids(miners[start:start + page_size]).items():
+                if ids:
+                    directory[miner] = ids
+
+        self._dht, self._dht_block = directory, block_number
+        return dict(directory)
 
-    def get_dht(self) -> Set[str]:
-        """Fetch all miner IDs and return them in a set"""
-        return {miner.get_id() for miner in self.miners}
+    def _get_miners_page(self, start: int, count: int) -> List[addr]:
+        miners = self.__call__().getMiners(start, count)
+        return [self.blockchain._chain.web3.toChecksumAddress(miner) for miner in miners]
 
-    def swarm(self) -> Generator[str, None, None]:
+    def swarm(self, page_size: int=1000, prefetch: bool=None) -> Generator[str, None, None]:
         """
         Generates all miner addresses via cumulative sum.
+
+        Miners are fetched by pages, the next page is prefetched
+        in the background while the current one is consumed.
+        By default prefetching is used if the blockchain supports concurrent requests.
+        """
+        if self.mirror is not None:
+            self.mirror.sync()
+            yield from list(self.mirror.miners)
+            return
+
+        if prefetch is None:
+            prefetch = self.blockchain.concurrent_requests
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+        try:
+            start, page = 0, self._get_miners_page(0, page_size)
+            while page:
+                start += len(page)
+                last_page = len(page) < page_size
+                if not last_page and executor is not None:
+                    next_page = executor.submit(self._get_miners_page, start, page_size)
+
+                yield from page
+
+                if last_page:
+                    break
+                elif executor is not None:
+                    page = next_page.result()
+                else:
+                    page = self._get_miners_page(start, page_size)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def active_miners(self, period: int=None, page_size: int=1000) -> Generator[str, None, None]:
+        """
+        Generates miners which confirmed activity for the period (the current one by default)
+        in the same order as they are walked by MinersEscrow.findCumSum.
         """
-        count = self.blockchain._chain.web3.toInt(
-            self.__call__().getMinerInfo(self.MinerInfoField.MINERS_LENGTH.value, self.null_addr, 0)
-                .encode('latin-1'))
-        for index in range(count):
-            yield self.blockchain._chain.web3.toChecksumAddress(
-                self.__call__().getMinerInfo(self.MinerInfoField.MINER.value, self.null_addr, index).encode('latin-1'))
+        if period is None:
+            period = self.__call__().getCurrentPeriod()
+
+        web3 = self.blockchain._chain.web3
+        start = 0
+        while True:
+            page = [web3.toChecksumAddress(miner)
+                    for miner in self.__call__().getActiveMiners(period, start, page_size)]
+            yield from page
+            if len(page) < page_size:
+                break
+            start += page_size
 
     def sample(self, quantity: int=10, additional_ursulas: float=1.7, attempts: int=5, duration: int=10) -> List[addr]:
         """
@@ -169,22 +349,196 @@ class Escrow:
 
         system_random = random.SystemRandom()
         n_select = round(quantity*additional_ursulas)            # Select more Ursulas
-        n_tokens = self.__call__().getAllLockedTokens()
+        stake_index = self.stake_index(duration)
+        n_tokens = stake_index.total
 
         if not n_tokens > 0:
             raise self.NotEnoughUrsulas('There are no locked tokens.')
 
         for _ in range(attempts):
-            points = [0] + sorted(system_random.randrange(n_tokens) for _ in range(n_select))
-            deltas = [i-j for i, j in zip(points[1:], points[:-1])]
-
-            addrs, addr, index, shift = set(), self.null_addr, 0, 0
-            for delta in deltas:
-                addr, index, shift = self.__call__().findCumSum(index, delta+shift, duration)
-                addrs.add(addr)
+            points = sorted(system_random.randrange(n_tokens) for _ in range(n_select))
+            addrs = set(stake_index.find(points))
 
             if len(addrs) >= quantity:
                 return system_random.sample(addrs, quantity)
 
         raise self.NotEnoughUrsulas('Selection failed after {} attempts'.format(attempts))
 
+
+class StakeIndex:
+    """
+    Client-side cumulative sum of the miners' stakes, used for sampling.
+
+    Locked tokens are calculated by the same rules as in MinersEscrow.findCumSum
+    for the miners which confirmed activity for the current period,
+    so any point in the cumulative sum is resolved locally with bisect.
+    The index is built once per period, within the period .update() reads again
+    only the miners named in the new escrow events which change locked tokens.
+
+    """
+
+    # Locked and Deposited events are always accompanied by ActivityConfirmed
+    _stake_events = ('ActivityConfirmed', 'LockSwitched', 'Mined')
+
+    def __init__(self, escrow: Escrow, duration: int):
+        self.escrow = escrow
+        self.duration = duration
+        self.period = None
+        self.block_number = None
+        self.miners = list()
+        self.cumsums = list()
+        self._active_miners = list()
+        self._locked_tokens = dict()    # type: Dict[addr, int]
+        self._filter = None
+        self._event_abis = None
+
+    def __len__(self):
+        return len(self.miners)
+
+    @property
+    def total(self) -> int:
+        """All tokens which can be sampled"""
+        return self.cumsums[-1] if self.cumsums else 0
+
+    @staticmethod
+    def locked_for_sampling(confirmed_periods: List[Tuple[int, int]], release_rate: int,
+                            current_period: int, duration: int) -> int:
+        """
+        Calculates locked tokens of one miner like MinersEscrow.getLockedTokensForSampling.
+        Confirmed periods are (period, locked value) pairs, only the last two are used.
+        """
+
+        if not confirmed_periods:
+            return 0
+
+        periods, locked_value = duration, confirmed_periods[-1][1]
+        if confirmed_periods[-1][0] == current_period:
+            pass
+        elif len(confirmed_periods) > 1 and confirmed_periods[-2][0] == current_period:
+            periods -= 1
+        else:
+            return 0
+
+        if periods == 0:
+            return locked_value
+        return max(locked_value - periods * release_rate, 0)
+
+    def _read_stake(self, miner: addr) -> Tuple[List[Tuple[int, int]], int]:
+        """Reads the last two confirmed periods and the release rate of the miner"""
+
+        # Miners unknown to the mirror are read from the contract
+        if self.escrow.mirror is not None and miner in self.escrow.mirror:
+            state = self.escrow.mirror[miner]
+            return state.confirmed_periods[-2:], state.release_rate
+
+        release_rate, confirmed_periods_length = self.escrow().getMinerInfoFields(miner)[5:7]
+        confirmed_periods = list()
+        if confirmed_periods_length > 0:
+            confirmed_periods = list(zip(*self.escrow().getConfirmedPeriods(miner)))
+        return confirmed_periods[-2:], release_rate
+
+    def _read_locked_tokens(self, miner: addr) -> int:
+        confirmed_periods, release_rate = self._read_stake(miner)
+        return self.locked_for_sampling(confirmed_periods, release_rate, self.period, self.duration)
+
+    def _update_cumsums(self) -> None:
+        miners, cumsums, distance = list(), list(), 0
+        for miner in self._active_miners:
+            locked_tokens = self._locked_tokens[miner]
+            if locked_tokens == 0:
+                continue
+            distance += locked_tokens
+            miners.append(miner)
+            cumsums.append(distance)
+
+        self.miners, self.cumsums = miners, cumsums
+
+    def _install_filter(self, from_block: int) -> None:
+        """Installs one log filter for all stake events of the escrow"""
+
+        contract = self.escrow.contract
+        self._event_abis = {encode_hex(event_abi_to_log_topic(abi)): abi for abi in contract.abi
+                            if abi['type'] == 'event' and abi['name'] in self._stake_events}
+        self._filter = self.escrow.blockchain._chain.web3.eth.filter(
+            {'address': contract.address, 'fromBlock': from_block})
+
+    def _get_new_events(self) -> List[dict]:
+        """Returns stake events since the last poll of the filter, the last seen block is moved forward"""
+
+        web3 = self.escrow.blockchain._chain.web3
+        events = list()
+        for log in web3.eth.getFilterChanges(self._filter.filter_id):
+            self.block_number = max(self.block_number, log['blockNumber'])
+            event_abi = self._event_abis.get(log['topics'][0].lower())
+            if event_abi is not None:
+                events.append(get_event_data(event_abi, log))
+        return events
+
+    def is_stale(self) -> bool:
+        """The index is stale if it was not built for the current period"""
+
+        return self.period is None or self.escrow().getCurrentPeriod() != self.period
+
+    def update(self) -> int:
+        """
+        Rebuilds the stale index or applies the new stake events to it.
+        Returns the number of miners which were read again.
+        """
+
+        if self._filter is None or self.is_stale():
+            self.rebuild()
+            return len(self._active_miners)
+
+        try:
+            events = self._get_new_events()
+        except ValueError:
+            # The node dropped the filter, changes since the last poll are unknown
+            self._filter = None
+            self.rebuild()
+            return len(self._active_miners)
+
+        # Miners which didn't confirm activity for the current period are not sampled at all
+        changed = {self.escrow.blockchain._chain.web3.toChecksumAddress(event['args']['owner'])
+                   for event in events}
+        changed.intersection_update(self._locked_tokens)
+        if not changed:
+            return 0
+
+        if self.escrow.mirror is not None:
+            self.escrow.mirror.sync()
+        for miner in changed:
+            self._locked_tokens[miner] = self._read_locked_tokens(miner)
+        self._update_cumsums()
+        return len(changed)
+
+    def rebuild(self) -> None:
+        """Reads stakes of the active miners and builds the cumulative sum"""
+
+        if self.escrow.mirror is not None:
+            self.escrow.mirror.sync()
+        self.block_number = self.escrow.blockchain._chain.web3.eth.blockNumber
+        if self._filter is not None:
+            try:
+                # Stakes are read again below
+                self._get_new_events()
+            except ValueError:
+                self._filter = None
+        if self._filter is None:
+            self._install_filter(from_block=self.block_number + 1)
+        self.period = self.escrow().getCurrentPeriod()
+
+        # Miners which confirmed activity for the period are not changed during the period
+        self._active_miners = list(self.escrow.active_miners(period=self.period))
+        self._locked_tokens = {miner: self._read_locked_tokens(miner) for miner in self._active_miners}
+        self._update_cumsums()
+
+    def find(self, points: List[int]) -> List[addr]:
+        """Returns the miner for each point, points out of range are skipped"""
+
+        addresses = list()
+        for point in points:
+            index = bisect_right(self.cumsums, point)
+            if index < len(self.miners):
+                addresses.append(self.miners[index])
+
+        return addresses
@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Dict, Tuple
+
+GasRecord = NamedTuple('GasRecord', [('contract', str),
+                                     ('method', str),
+                                     ('sender', str),
+                                     ('txhash', str),
+                                     ('gas_used', int),
+                                     ('latency', float)])
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of the values"""
+    ordered = sorted(values)
+    rank = max(int(-(-percent * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+
+class GasAccountant:
+    """
+    Records gasUsed and latency from send to receipt of every instrumented transaction.
+
+    Transactions are tagged with contract name, method and sender,
+    receipts are collected through the blockchain receipt watcher.
+
+        accountant = blockchain.enable_gas_accounting()
+        miner.lock(amount, locktime)
+        accountant.stats()    # {('MinersEscrow', 'deposit'): {'count': 1, 'gas_mean': ...}, ...}
+        accountant.to_csv('gas.csv')
+
+    """
+
+    percentiles = (50, 90, 99)
+
+    def __init__(self, blockchain: 'Blockchain'):
+        self.blockchain = blockchain
+        self.records = list()    # type: List[GasRecord]
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(records={})"
+        return r.format(class_name, len(self.records))
+
+    def reset(self) -> None:
+        self.records = list()
+
+    def instrument(self, contract_name: str, transaction: dict, transactor):
+        """Wraps contract.transact(transaction) so every sent method is recorded"""
+        sender = (transaction or dict()).get('from', self.blockchain._chain.web3.eth.coinbase)
+        return _InstrumentedTransactor(self, contract_name, sender, transactor)
+
+    def _watch(self, contract_name: str, method: str, sender: str, txhash: str, sent_at: float) -> None:
+        def record(receipt: dict) -> None:
+            latency = time.monotonic() - sent_at
+            self.records.append(GasRecord(contract_name, method, sender, txhash, receipt['gasUsed'], latency))
+
+        self.blockchain.receipts.watch(txhash, callback=record)
+
+    def stats(self, by_sender: bool=False) -> Dict[Tuple[str, ...], dict]:
+        """
+        Aggregates the records by contract and method (and sender),
+        returns count, total, min, max, mean and percentiles of gasUsed and latency.
+        """
+
+        groups = OrderedDict()
+        for record in self.records:
+            key = (record.contract, record.method, record.sender) if by_sender else (record.contract, record.method)
+            groups.setdefault(key, list()).append(record)
+
+        stats = OrderedDict()
+        for key, records in sorted(groups.items()):
+            gas = [record.gas_used for record in records]
+            latency = [record.latency for record in records]
+            group = OrderedDict([('count', len(records)),
+                                 ('gas_total', sum(gas)),
+                                 ('gas_min', min(gas)),
+                                 ('gas_max', max(gas)),
+                                 ('gas_mean', sum(gas) / len(gas))])
+            for percent in self.percentiles:
+                group['gas_p{}'.format(percent)] = percentile(gas, percent)
+            group['latency_mean'] = sum(latency) / len(latency)
+            group['latency_max'] = max(latency)
+            for percent in self.percentiles:
+                group['latency_p{}'.format(percent)] = percentile(latency, percent)
+            stats[key] = group
+
+        return stats
+
+    def _rows(self, by_sender: bool) -> List[dict]:
+        key_fields = ('contract', 'method', 'sender') if by_sender else ('contract', 'method')
+        return [OrderedDict(list(zip(key_fields, key)) + list(group.items()))
+                for key, group in self.stats(by_sender=by_sender).items()]
+
+    def to_json(self, path: str=None, by_sender: bool=False) -> str:
+        """Exports the aggregates as JSON list, writes it to the path if given"""
+
+        result = json.dumps(self._rows(by_sender), indent=2)
+        if path is not None:
+            with open(path, 'w') as file:
+                file.write(result)
+        return result
+
+    def to_csv(self, path: str=None, by_sender: bool=False) -> str:
+        """Exports the aggregates as CSV table, writes it to the path if given"""
+
+        rows = self._rows(by_sender)
+        output = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        result = output.getvalue()
+
+        if path is not None:
+            with open(path, 'w', newline='') as file:
+                file.write(result)
+        return result
+
+
+class _InstrumentedTransactor:
+    """Sends the contract method and records its receipt in the gas accountant"""
+
+    def __init__(self, accountant: GasAccountant, contract_name: str, sender: str, transactor):
+        self._accountant = accountant
+        self._contract_name = contract_name
+        self._sender = sender
+        self._transactor = transactor
+
+    def __getattr__(self, name):
+        method = getattr(self._transactor, name)
+
+        def transact(*args) -> str:
+            sent_at = time.monotonic()
+            txhash = method(*args)
+            self._accountant._watch(self._contract_name, name, self._sender, txhash, sent_at)
+            return txhash
+
+        return transact
@@ -1,7 +1,8 @@
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 from .blockchain import Blockchain
 from .escrow import Escrow
+from .pipeline import TransactionPipeline
 from .token import NuCypherKMSToken
 
 
@@ -16,6 +17,9 @@ class Miner:
 
     """
 
+    class NotEnoughGas(Exception):
+        pass
+
     def __init__(self, blockchain: Blockchain, token: NuCypherKMSToken, escrow: Escrow, address=None):
         self.blockchain = blockchain
         self.token = token
@@ -40,7 +44,7 @@ class Miner:
         """Approve the transfer of token from the miner's address to the escrow contract."""
 
         txhash = self.token.transact({'from': self.address}).approve(self.escrow.contract.address, amount)
-        self.blockchain._chain.wait.for_receipt(txhash, timeout=self.blockchain._timeout)
+        self.blockchain.receipts.wait(txhash)
 
         return txhash
 
@@ -48,29 +52,77 @@ class Miner:
         """Send tokes to the escrow from the miner's address"""
 
         deposit_txhash = self.escrow.transact({'from': self.address}).deposit(amount, locktime)
-        self.blockchain._chain.wait.for_receipt(deposit_txhash, timeout=self.blockchain._timeout)
+        self.blockchain.receipts.wait(deposit_txhash)
 
         return deposit_txhash
 
-    def lock(self, amount: int, locktime: int) -> Tuple[str, str, str]:
-        """Deposit and lock tokens for mining."""
+    def lock(self, amount: int, locktime: int, pipeline: bool=False) -> Tuple[str, str, str]:
+        """
+        Deposit and lock tokens for mining.
+        Pipelined mode sends all three transactions at once and waits for the receipts together.
+        """
+
+        if pipeline:
+            transactions = TransactionPipeline(blockchain=self.blockchain, sender=self.address)
+            transactions.transact(self.token).approve(self.escrow.contract.address, amount)
+            transactions.transact(self.escrow).deposit(amount, locktime)
+            transactions.transact(self.escrow).switchLock()
+            approve_txhash, deposit_txhash, lock_txhash = transactions.wait()
+            return approve_txhash, deposit_txhash, lock_txhash
 
         approve_txhash = self._approve_escrow(amount=amount)
         deposit_txhash = self._send_tokens_to_escrow(amount=amount, locktime=locktime)
 
         lock_txhash = self.escrow.transact({'from': self.address}).switchLock()
-        self.blockchain._chain.wait.for_receipt(lock_txhash, timeout=self.blockchain._timeout)
+        self.blockchain.receipts.wait(lock_txhash)
 
         return approve_txhash, deposit_txhash, lock_txhash
 
-    def mint(self) -> str:
-        """Computes and transfers tokens to the miner's account"""
+    def _mint_gas(self, max_periods: int) -> int:
+        return self.escrow.contract.estimateGas({'from': self.address}).mint(max_periods)
+
+    def _mint_chunk(self, gas_limit: int, max_periods: int) -> int:
+        """The largest number of periods which can be minted within the gas limit"""
+
+        if self._mint_gas(1) > gas_limit:
+            raise self.NotEnoughGas('Minting of one period needs more than {} gas'.format(gas_limit))
+
+        # Gas grows with the number of minted periods
+        low, high = 1, max_periods
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._mint_gas(middle) <= gas_limit:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def mint(self, max_periods: int=None, gas_limit: int=None) -> str:
+        """
+        Computes and transfers tokens to the miner's account.
 
-        txhash = self.escrow.transact({'from': self.address}).mint()
-        self.blockchain._chain.wait.for_receipt(txhash, timeout=self.blockchain._timeout)
+        Only the oldest max_periods periods are minted if specified,
+        and no more periods than fit into gas_limit.
+        The rest of periods can be minted by the next calls with the same reward.
+        """
+
+        if max_periods is None and gas_limit is None:
+            txhash = self.escrow.transact({'from': self.address}).mint()
+        else:
+            max_periods = max_periods if max_periods is not None else self.escrow.max_periods
+            if gas_limit is not None:
+                max_periods = self._mint_chunk(gas_limit, max_periods)
+            txhash = self.escrow.transact({'from': self.address}).mint(max_periods)
+        self.blockchain.receipts.wait(txhash)
 
         return txhash
 
+    def pending_reward(self) -> int:
+        """Tokens which the miner will get by minting in the current period"""
+
+        reward, _periods = self.escrow().getPendingReward(self.address)
+        return reward
+
     # TODO
     # def collect_reward(self):
     #     tx = policy_manager.transact({'from': self.address}).withdraw()
@@ -80,27 +132,26 @@ class Miner:
         """Store a new DHT key"""
 
         txhash = self.escrow.transact({'from': self.address}).setMinerId(dht_id)
-        self.blockchain._chain.wait.for_receipt(txhash)
+        self.blockchain.receipts.wait(txhash)
 
         return txhash
 
     def get_dht_key(self) -> tuple:
         """Retrieve all stored DHT keys for this miner"""
 
-        count = self.blockchain._chain.web3.toInt(
-            self.escrow().getMinerInfo(self.escrow.MinerInfoField.MINER_IDS_LENGTH.value, self.address, 0)
-                .encode('latin-1'))
-        # TODO change when v4 web3.py will released
-        dht_keys = tuple(self.escrow().getMinerInfo(self.escrow.MinerInfoField.MINER_ID.value, self.address, index)
-                         .encode('latin-1') for index in range(count))
+        if self.escrow.mirror is not None:
+            self.escrow.mirror.sync()
+            if self.address not in self.escrow.mirror:
+                return tuple()
+            return tuple(self.escrow.mirror[self.address].miner_ids)
 
-        return dht_keys
+        return self.escrow.get_miner_ids(self.address)
 
     def confirm_activity(self) -> str:
         """Miner rewarded for every confirmed period"""
 
-        txhash = self.escrow.contract.transact({'from': self.address}).confirmActivity()
-        self.blockchain._chain.wait.for_receipt(txhash)
+        txhash = self.escrow.transact({'from': self.address}).confirmActivity()
+        self.blockchain.receipts.wait(txhash)
 
         return txhash
 
@@ -117,6 +168,169 @@ class Miner:
         tokens_amount = self.blockchain._chain.web3.toInt(
             self.escrow().getMinerInfo(self.escrow.MinerInfoField.VALUE.value, self.address, 0).encode('latin-1'))
         txhash = self.escrow.transact({'from': self.address}).withdraw(tokens_amount)
-        self.blockchain._chain.wait.for_receipt(txhash, timeout=self.blockchain._timeout)
+        self.blockchain.receipts.wait(txhash)
 
         return txhash
+
+
+class MintScheduler:
+    """
+    Mints only when it pays off.
+
+    The miner mints when the pending reward per wei of the minting cost is at least min_ratio,
+    or when the not mined periods would block the next confirmActivity.
+    The ratio compares token units with wei, so it includes the token price in ether.
+
+        scheduler = MintScheduler(miner, min_ratio=10)
+        miner.confirm_activity()
+        scheduler.tick()    # every period
+
+    """
+
+    def __init__(self, miner: Miner, min_ratio: float, gas_price: int=None, gas_limit: int=None):
+        self.miner = miner
+        self.min_ratio = min_ratio
+        self.gas_price = gas_price
+        self.gas_limit = gas_limit
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(miner='{}', min_ratio={})"
+        return r.format(class_name, self.miner.address, self.min_ratio)
+
+    def _confirmed_periods(self) -> int:
+        escrow = self.miner.escrow
+        return escrow._get_miner_info(escrow.MinerInfoField.CONFIRMED_PERIODS_LENGTH, self.miner.address)
+
+    def should_mint(self) -> bool:
+        reward, periods = self.miner.escrow().getPendingReward(self.miner.address)
+        if periods == 0:
+            return False
+
+        # The next confirmation adds one more period
+        if self._confirmed_periods() + 1 >= self.miner.escrow.max_periods:
+            return True
+
+        gas_price = self.gas_price
+        if gas_price is None:
+            gas_price = self.miner.blockchain._chain.web3.eth.gasPrice
+        cost = self.miner._mint_gas(periods) * gas_price
+        return reward >= self.min_ratio * cost
+
+    def tick(self) -> Optional[str]:
+        """Mints if it pays off or the backlog is full, returns the transaction hash or None"""
+
+        if not self.should_mint():
+            return None
+        return self.miner.mint(gas_limit=self.gas_limit)
+
+
+class MinerFleet:
+    """
+    Miners whose activity is confirmed by one operator address.
+
+    Every miner authorizes the operator once,
+    then the operator confirms activity of the whole fleet with as few transactions as fit into the gas limit.
+
+        fleet = MinerFleet(blockchain, escrow, operator=operator_address, miners=miner_addresses)
+        fleet.authorize()
+        fleet.confirm_all()    # every period
+
+    """
+
+    gas_margin = 0.1    # Relative to the estimated gas of a batch
+
+    def __init__(self, blockchain: Blockchain, escrow: Escrow, operator: str, miners: List[str]):
+        self.blockchain = blockchain
+        self.escrow = escrow
+        self.operator = operator
+        self.miners = list(miners)
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(operator='{}', miners={})"
+        return r.format(class_name, self.operator, len(self.miners))
+
+    def __len__(self):
+        return len(self.miners)
+
+    def authorize(self) -> List[str]:
+        """Sets the operator for every miner of the fleet which has another one"""
+
+        txhashes = list()
+        for miner in self.miners:
+            if self.escrow().operators(miner).lower() != self.operator.lower():
+                txhashes.append(self.escrow.transact({'from': miner}).setOperator(self.operator))
+        self.blockchain.receipts.wait_all(txhashes)
+
+        return txhashes
+
+    def _block_gas_limit(self) -> int:
+        return self.blockchain._chain.web3.eth.getBlock('latest')['gasLimit']
+
+    def _confirm_gas(self, miners: List[str]) -> int:
+        return self.escrow.contract.estimateGas({'from': self.operator}).confirmActivityFor(miners)
+
+    def _plan(self, gas_limit: int) -> List[Tuple[List[str], int]]:
+        """Batches of miners with their estimated gas, each estimate is less than the gas limit"""
+
+        if not self.miners:
+            return list()
+
+        # Estimates above the block gas limit fail on some clients,
+        # so the first batch size is extrapolated from one and two miners
+        base_gas = self._confirm_gas(self.miners[:1])
+        if base_gas >= gas_limit:
+            raise Miner.NotEnoughGas('Confirmation of {} needs {} gas'.format(self.miners[0], base_gas))
+        miner_gas = max(self._confirm_gas(self.miners[:2]) - base_gas, 1) if len(self.miners) > 1 else base_gas
+        size = max((gas_limit - base_gas) // miner_gas, 1)
+
+        plan = list()
+        start = 0
+        while start < len(self.miners):
+            batch = self.miners[start:start + size]
+            try:
+                gas = self._confirm_gas(batch)
+            except ValueError:
+                if len(batch) == 1:
+                    raise
+                gas = None
+            if gas is not None and gas < gas_limit:
+                plan.append((batch, gas))
+                start += len(batch)
+            elif len(batch) == 1:
+                raise Miner.NotEnoughGas('Confirmation of {} needs {} gas'.format(batch[0], gas))
+            elif gas is None:
+                size = len(batch) // 2
+            else:
+                # Gas is nearly proportional to the number of miners
+                size = max(min(len(batch) * gas_limit // gas, len(batch) - 1), 1)
+
+        return plan
+
+    def batches(self, gas_limit: int=None) -> List[List[str]]:
+        """
+        Splits the miners into batches for confirmActivityFor,
+        gas of each batch is less than the gas limit, by default the block gas limit.
+        """
+
+        if gas_limit is None:
+            gas_limit = self._block_gas_limit()
+        return [batch for batch, _gas in self._plan(gas_limit)]
+
+    def confirm_all(self, gas_limit: int=None) -> List[str]:
+        """
+        Confirms activity of all miners in the next period,
+        sends all batches at once and waits for the receipts together.
+        Every transaction gets the estimated gas of its batch with gas_margin.
+        """
+
+        if gas_limit is None:
+            gas_limit = self._block_gas_limit()
+
+        transactions = TransactionPipeline(blockchain=self.blockchain, sender=self.operator)
+        for batch, gas in self._plan(gas_limit):
+            gas = min(int(gas * (1 + self.gas_margin)), gas_limit)
+            transactions.transact(self.escrow, {'gas': gas}).confirmActivityFor(batch)
+
+        return transactions.wait()
@@ -0,0 +1,246 @@
+from itertools import zip_longest
+from typing import List, Dict, Tuple
+
+addr = str
+
+
+class MinerState:
+    """
+    Local copy of the miner's info from the MinersEscrow contract.
+    Confirmed periods are (period, locked value) pairs and downtime is (start period, end period) pairs.
+    """
+
+    def __init__(self, address: addr):
+        self.address = address
+        self.value = 0
+        self.locked_value = 0
+        self.release = False
+        self.release_rate = 0
+        self.confirmed_periods = list()
+        self.last_active_period = 0
+        self.downtime = list()
+        self.miner_ids = list()
+
+        # Transaction of the last confirmation and locked tokens just before it
+        self._confirmation_txhash = None
+        self._locked_before_confirmation = 0
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(address='{}', value={}, locked_value={})"
+        return r.format(class_name, self.address, self.value, self.locked_value)
+
+    def _calculate_locked_tokens(self, force_release: bool, locked_tokens: int, periods: int) -> int:
+        """Same as internal MinersEscrow.calculateLockedTokens"""
+        if (force_release or self.release) and periods != 0:
+            return max(locked_tokens - periods * self.release_rate, 0)
+        return locked_tokens
+
+    def get_locked_tokens(self, current_period: int) -> int:
+        """Same as MinersEscrow.getLockedTokens"""
+
+        if not self.confirmed_periods:
+            locked_value = self.locked_value
+        else:
+            period, locked_value = self.confirmed_periods[-1]
+            if period == current_period:
+                return locked_value
+            elif period > current_period:
+                if len(self.confirmed_periods) > 1:
+                    return self.confirmed_periods[-2][1]
+                return self.locked_value
+
+        if self._calculate_locked_tokens(False, locked_value, 1) == 0:
+            return 0
+        return locked_value
+
+    def calculate_locked_tokens(self, current_period: int, periods: int) -> int:
+        """Same as public MinersEscrow.calculateLockedTokens"""
+
+        if self.confirmed_periods and self.confirmed_periods[-1][0] >= current_period:
+            period, locked_tokens = self.confirmed_periods[-1]
+        else:
+            period, locked_tokens = current_period, self.get_locked_tokens(current_period)
+
+        return self._calculate_locked_tokens(False, locked_tokens, current_period + periods - period)
+
+
+class EscrowStateMirror:
+    """
+    In-memory mirror of the MinersEscrow state built from the contract's events.
+
+    Events are applied incrementally with .sync(), so the miner's info can be read
+    without getMinerInfo calls. The mirror mimics the contract state transitions,
+    use .check_consistency() to compare it with the on-chain state.
+
+    """
+
+    _events = ('Deposited', 'Locked', 'LockSwitched', 'Withdrawn', 'ActivityConfirmed', 'Mined', 'MintedPeriods',
+               'MinerIdSet')
+
+    def __init__(self, escrow: 'Escrow'):
+        self.escrow = escrow
+        self.miners = list()
+        self.states = dict()    # type: Dict[addr, MinerState]
+        self.block_number = None
+        self._seconds_per_period = None
+
+    def __getitem__(self, miner: addr) -> MinerState:
+        return self.states[self._checksum(miner)]
+
+    def __contains__(self, miner: addr) -> bool:
+        return self._checksum(miner) in self.states
+
+    def _checksum(self, address: addr) -> addr:
+        return self.escrow.blockchain._chain.web3.toChecksumAddress(address)
+
+    def _get_period(self, block_number: int) -> int:
+        if self._seconds_per_period is None:
+            self._seconds_per_period = self.escrow().secondsPerPeriod()
+        block = self.escrow.blockchain._chain.web3.eth.getBlock(block_number)
+        return block.timestamp // self._seconds_per_period
+
+    def _get_state(self, owner: addr) -> MinerState:
+        owner = self._checksum(owner)
+        if owner not in self.states:
+            self.states[owner] = MinerState(owner)
+        return self.states[owner]
+
+    def resync(self, from_block: int=0) -> int:
+        """
+        Drops the mirrored state and replays the events starting from the block.
+        Use the block of the escrow deployment (or zero) to get the complete state.
+        """
+        self.miners = list()
+        self.states = dict()
+        self.block_number = from_block - 1
+        return self.sync()
+
+    def sync(self) -> int:
+        """Applies all new events, returns the number of applied events"""
+
+        if self.block_number is None:
+            return self.resync()
+
+        to_block = self.escrow.blockchain._chain.web3.eth.blockNumber
+        if to_block <= self.block_number:
+            return 0
+
+        filter_params = {'fromBlock': self.block_number + 1, 'toBlock': to_block}
+        logs = list()
+        for event in self._events:
+            logs.extend(self.escrow.contract.pastEvents(event, filter_params).get())
+        logs.sort(key=lambda log: (log['blockNumber'], log['transactionIndex'], log['logIndex']))
+
+        for log in logs:
+            self.apply(log)
+        self.block_number = to_block
+
+        return len(logs)
+
+    def apply(self, log: dict) -> None:
+        """Applies one event of the escrow contract"""
+
+        handler = getattr(self, '_on_{}'.format(log['event']))
+        handler(log, **log['args'])
+
+    def _on_ActivityConfirmed(self, log, owner, period, value):
+        state = self._get_state(owner)
+        # New miner, deposit() pushes the miner before the confirmation
+        if state.value == 0:
+            self.miners.append(state.address)
+            state.last_active_period = period - 1
+
+        state._confirmation_txhash = log['transactionHash']
+        state._locked_before_confirmation = state.calculate_locked_tokens(period - 1, 1)
+        if state.confirmed_periods and state.confirmed_periods[-1][0] == period:
+            state.confirmed_periods[-1] = (period, value)
+            return
+
+        state.confirmed_periods.append((period, value))
+        if state.last_active_period < period - 1:
+            state.downtime.append((state.last_active_period + 1, period - 1))
+        state.last_active_period = period
+
+    def _on_Locked(self, log, owner, value, releaseRate):
+        state = self._get_state(owner)
+        if state._locked_before_confirmation == 0:
+            state.release = False
+        state.locked_value = value
+        state.release_rate = releaseRate
+
+    def _on_Deposited(self, log, owner, value, periods):
+        state = self._get_state(owner)
+        if state._confirmation_txhash == log['transactionHash']:
+            state.value += value
+            return
+
+        # Only preDeposit() makes deposits without confirmation
+        self.miners.append(state.address)
+        state.value = value
+        state.locked_value = value
+        state.release_rate = max(-(-value // periods), 1)
+        state.release = False
+        state.last_active_period = self._get_period(log['blockNumber'])
+
+    def _on_LockSwitched(self, log, owner, release):
+        self._get_state(owner).release = release
+
+    def _on_Withdrawn(self, log, owner, value):
+        self._get_state(owner).value -= value
+
+    def _on_Mined(self, log, owner, period, value):
+        state = self._get_state(owner)
+        state.value += value
+        state.locked_value = state.get_locked_tokens(period + 1)
+
+    def _on_MintedPeriods(self, log, owner, firstPeriod, lastPeriod):
+        # Emitted after Mined, the next periods are not minted if the number was limited
+        state = self._get_state(owner)
+        state.confirmed_periods = [confirmed for confirmed in state.confirmed_periods if confirmed[0] > lastPeriod]
+
+    def _on_MinerIdSet(self, log, owner, minerId):
+        # TODO change when v4 web3.py will released
+        if isinstance(minerId, str):
+            minerId = minerId.encode('latin-1')
+        self._get_state(owner).miner_ids.append(minerId)
+
+    def _read_state(self, miner: addr) -> Tuple:
+        """Reads the mirrored fields of the miner from the contract"""
+
+        info = self.escrow.miner_info(miner)
+        return (info.value,
+                info.locked_value,
+                info.release,
+                info.release_rate,
+                info.confirmed_periods,
+                info.last_active_period,
+                info.downtime,
+                info.miner_ids)
+
+    def is_consistent(self, miner: addr) -> bool:
+        """Compares the mirrored state of the miner with the on-chain state"""
+
+        state = self.states.get(self._checksum(miner), MinerState(miner))
+        mirrored = (state.value,
+                    state.locked_value,
+                    state.release,
+                    state.release_rate,
+                    state.confirmed_periods,
+                    state.last_active_period,
+                    state.downtime,
+                    state.miner_ids)
+
+        return mirrored == self._read_state(miner)
+
+    def check_consistency(self) -> List[addr]:
+        """Returns all miners whose mirrored state differs from the on-chain state"""
+
+        fields, get = self.escrow.MinerInfoField, self.escrow._get_miner_info
+        on_chain_miners = self.escrow._get_miners_page(0, get(fields.MINERS_LENGTH))
+        inconsistent = {miner for miner in set(on_chain_miners) | set(self.states) if not self.is_consistent(miner)}
+        for on_chain_miner, miner in zip_longest(on_chain_miners, self.miners):
+            if on_chain_miner != miner:
+                inconsistent.update(address for address in (on_chain_miner, miner) if address is not None)
+
+        return sorted(inconsistent)
@@ -0,0 +1,107 @@
+from typing import List
+
+from .blockchain import Blockchain
+
+
+class TransactionPipeline:
+    """
+    Broadcasts the transactions of one sender back to back and waits for all receipts together.
+
+    Nonces are assigned locally, starting from the sender's pending transaction count,
+    so the transactions are mined in the order they were sent even if each one depends on the previous.
+    Chains which mine every transaction when it is sent (tester) don't accept nonces and keep the order anyway.
+    Gas is set explicitly because it cannot be estimated against the state before the previous transactions.
+
+        pipeline = TransactionPipeline(blockchain, sender=address)
+        pipeline.transact(token).approve(escrow.contract.address, amount)
+        pipeline.transact(escrow).deposit(amount, locktime)
+        approve_txhash, deposit_txhash = pipeline.wait()
+
+    """
+
+    default_gas = 500000
+
+    class TransactionFailed(Exception):
+        pass
+
+    def __init__(self, blockchain: Blockchain, sender: str, gas: int=None):
+        self.blockchain = blockchain
+        self.sender = sender
+        self.gas = gas if gas is not None else self.default_gas
+
+        self.txhashes = list()
+        self._transactions = list()
+        self._nonce = None
+        if blockchain.accepts_nonce:
+            self._nonce = blockchain._chain.web3.eth.getTransactionCount(sender, 'pending')
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(sender='{}', pending={})"
+        return r.format(class_name, self.sender, len(self.txhashes))
+
+    def transact(self, contract, transaction: dict=None):
+        """
+        Same as contract.transact(transaction) with the next local nonce,
+        the contract is anything with a .transact() method (token, escrow, populus contract).
+        """
+
+        transaction = dict(transaction or dict())
+        transaction.setdefault('from', self.sender)
+        transaction.setdefault('gas', self.gas)
+        if self._nonce is not None:
+            transaction['nonce'] = self._nonce
+            self._nonce += 1
+
+        return _PipelinedTransactor(self, contract.transact(transaction), transaction)
+
+    def wait(self) -> List[str]:
+        """
+        Waits for the receipts of all sent transactions, returns the transaction hashes in the sending order.
+        Raises TransactionFailed with the hashes of every failed transaction.
+        """
+
+        receipts = self.blockchain.receipts.wait_all(self.txhashes)
+        failed = [txhash for txhash, receipt, transaction in zip(self.txhashes, receipts, self._transactions)
+                  if self._is_failed(receipt, transaction)]
+
+        txhashes, self.txhashes, self._transactions = self.txhashes, list(), list()
+        if failed:
+            message = '{} of {} transactions failed: {}'.format(len(failed), len(txhashes), ', '.join(failed))
+            raise self.TransactionFailed(message)
+
+        return txhashes
+
+    @staticmethod
+    def _is_failed(receipt: dict, transaction: dict) -> bool:
+        # Byzantium receipts have the status, before it a throw consumes all the gas
+        status = receipt.get('status')
+        if status is not None:
+            return int(status) == 0
+        return receipt['gasUsed'] == transaction['gas']
+
+
+class _PipelinedTransactor:
+    """Sends the contract method without waiting and records the transaction in the pipeline"""
+
+    def __init__(self, pipeline: TransactionPipeline, transactor, transaction: dict):
+        self._pipeline = pipeline
+        self._transactor = transactor
+        self._transaction = transaction
+
+    def __getattr__(self, name):
+        method = getattr(self._transactor, name)
+
+        def transact(*args) -> str:
+            try:
+                txhash = method(*args)
+            except Exception:
+                # Give the nonce back if nothing was sent after this transaction
+                if 'nonce' in self._transaction and self._transaction['nonce'] == self._pipeline._nonce - 1:
+                    self._pipeline._nonce -= 1
+                raise
+            self._pipeline.txhashes.append(txhash)
+            self._pipeline._transactions.append(self._transaction)
+            return txhash
+
+        return transact
@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import List, NamedTuple, Tuple
+
+RPCRecord = NamedTuple('RPCRecord', [('method', str),
+                                     ('params_size', int),
+                                     ('response_size', int),
+                                     ('latency', float)])
+
+
+def _size(data) -> int:
+    """Size of the JSON encoded data"""
+    return len(json.dumps(data, default=str))
+
+
+class RPCReport:
+    """JSON-RPC calls issued by one high-level operation"""
+
+    def __init__(self, operation: str, max_records: int=None):
+        self.operation = operation
+        # Only the last max_records calls are kept if it is set
+        self.records = deque(maxlen=max_records)    # type: deque
+        self.duration = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(operation='{}', calls={})"
+        return r.format(class_name, self.operation, len(self.records))
+
+    def __str__(self):
+        calls = ', '.join('{} {}'.format(method, method_stats['count'])
+                          for method, method_stats in self.by_method().items())
+        duration = self.duration if self.duration is not None else self.latency
+        return '{}: {} calls ({}) in {:.1f} ms'.format(self.operation, len(self.records), calls, duration * 1000)
+
+    @property
+    def latency(self) -> float:
+        """Total time spent in the calls"""
+        return sum(record.latency for record in self.records)
+
+    def count(self, method: str) -> int:
+        return sum(1 for record in self.records if record.method == method)
+
+    def by_method(self) -> OrderedDict:
+        """Count, latency, params and response sizes by JSON-RPC method"""
+
+        stats = OrderedDict()
+        for record in self.records:
+            method_stats = stats.setdefault(record.method, OrderedDict([('count', 0),
+                                                                        ('latency_total', 0.0),
+                                                                        ('latency_max', 0.0),
+                                                                        ('params_size', 0),
+                                                                        ('response_size', 0)]))
+            method_stats['count'] += 1
+            method_stats['latency_total'] += record.latency
+            method_stats['latency_max'] = max(method_stats['latency_max'], record.latency)
+            method_stats['params_size'] += record.params_size
+            method_stats['response_size'] += record.response_size
+        return stats
+
+    def histogram(self, method: str=None, bounds: Tuple[float, ...]=(1, 5, 10, 50, 100, 500, 1000)) -> OrderedDict:
+        """
+        Number of calls by latency bucket, bounds are upper bucket limits in milliseconds.
+        The last bucket counts calls slower than all bounds.
+        """
+
+        buckets = OrderedDict(('<={}ms'.format(bound), 0) for bound in bounds)
+        buckets['>{}ms'.format(bounds[-1])] = 0
+        names = list(buckets)
+        for record in self.records:
+            if method is None or record.method == method:
+                buckets[names[bisect_left(bounds, record.latency * 1000)]] += 1
+        return buckets
+
+
+class RPCProfiler:
+    """
+    Web3 middleware recording every JSON-RPC request with its params size, response size and latency.
+
+    Install it through the PopulusConfig and group the calls by operation:
+
+        config = PopulusConfig()
+        profiler = config.profile_rpc()
+        blockchain = TesterBlockchain(populus_config=config)
+
+        with profiler.profile('sample') as report:
+            escrow.sample()
+        print(report)    # sample: 18 calls (eth_call 18) in 240.0 ms
+
+    The calls made outside of profile() are kept in the report of all calls,
+    limited to the last max_records calls so that a long-running client doesn't grow.
+
+    """
+
+    default_max_records = 10000
+
+    def __init__(self, max_records: int=None):
+        self.max_records = max_records if max_records is not None else self.default_max_records
+        self.report = RPCReport('all', max_records=self.max_records)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(calls={})"
+        return r.format(class_name, len(self.report))
+
+    def _active_reports(self) -> List[RPCReport]:
+        if not hasattr(self._local, 'reports'):
+            self._local.reports = list()
+        return self._local.reports
+
+    def middleware(self, make_request, web3):
+        """Web3 middleware factory"""
+
+        def profile_request(method, params):
+            start = time.perf_counter()
+            response = make_request(method, params)
+            latency = time.perf_counter() - start
+
+            record = RPCRecord(method, _size(params), _size(response), latency)
+            with self._lock:
+                self.report.records.append(record)
+            for report in self._active_reports():
+                report.records.append(record)
+
+            return response
+
+        return profile_request
+
+    @contextmanager
+    def profile(self, operation: str):
+        """Collects the calls of this thread made inside the context into a new report, nesting is allowed"""
+
+        report = RPCReport(operation)
+        reports = self._active_reports()
+        reports.append(report)
+        start = time.perf_counter()
+        try:
+            yield report
+        finally:
+            report.duration = time.perf_counter() - start
+            reports.remove(report)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.report = RPCReport('all', max_records=self.max_records)
@@ -101,7 +101,6 @@ contract Issuer is Upgradeable {
     * @param _decimals The amount of locked tokens and blocks in decimals.
     * @return Amount of minted tokens.
     */
-    // TODO decimals
     function mint(
         uint256 _period,
         uint256 _lockedValue,
@@ -111,31 +110,109 @@ contract Issuer is Upgradeable {
     )
         internal returns (uint256 amount, uint256 decimals)
     {
+        uint256[] memory lockedValues = new uint256[](1);
+        lockedValues[0] = _lockedValue;
+        uint256[] memory totalLockedValues = new uint256[](1);
+        totalLockedValues[0] = _totalLockedValue;
+        return mint(_period, lockedValues, totalLockedValues, _allLockedPeriods, _decimals);
+    }
+
+    /**
+    * @notice Function to mint tokens for several locked values in one period.
+    Gives the same result as minting for every value separately but reads and writes supply once
+    * @param _period Period number.
+    * @param _lockedValues The amounts of tokens that were locked by user in minted periods.
+    * @param _totalLockedValues The amounts of tokens that were locked by all users in minted periods.
+    * @param _allLockedPeriods The max amount of periods during which tokens will be locked
+    after the first minted period, decreases by one for every next period.
+    * @param _decimals The amount of locked tokens and blocks in decimals.
+    * @return Amount of minted tokens.
+    */
+    // TODO decimals
+    function mint(
+        uint256 _period,
+        uint256[] memory _lockedValues,
+        uint256[] memory _totalLockedValues,
+        uint256 _allLockedPeriods,
+        uint256 _decimals
+    )
+        internal returns (uint256 amount, uint256 decimals)
+    {
+        require(_lockedValues.length == _totalLockedValues.length);
+        decimals = _decimals;
+        if (_lockedValues.length == 0) {
+            return;
+        }
+
         // TODO end of mining before calculation
         uint256 nextTotalSupply = totalSupply[currentIndex ^ NEGATION];
         if (_period > lastMintedPeriod) {
             currentIndex = currentIndex ^ NEGATION;
             lastMintedPeriod = _period;
         }
+        amount = calculateMint(_period, _lockedValues, _totalLockedValues, _allLockedPeriods);
+        totalSupply[currentIndex ^ NEGATION] = nextTotalSupply.add(amount);
+    }
+
+    /**
+    * @notice Calculate amount of tokens which will be minted for several locked values in one period
+    * @param _period Period number.
+    * @param _lockedValues The amounts of tokens that were locked by user in minted periods.
+    * @param _totalLockedValues The amounts of tokens that were locked by all users in minted periods.
+    * @param _allLockedPeriods The max amount of periods during which tokens will be locked
+    after the first minted period, decreases by one for every next period.
+    * @return Amount of tokens.
+    */
+    function calculateMint(
+        uint256 _period,
+        uint256[] memory _lockedValues,
+        uint256[] memory _totalLockedValues,
+        uint256 _allLockedPeriods
+    )
+        internal view returns (uint256 amount)
+    {
+        // supply is switched at the first minting in the new period
+        uint256 currentSupply = _period > lastMintedPeriod ?
+            totalSupply[currentIndex ^ NEGATION] : totalSupply[currentIndex];
+
+        uint256 allLockedPeriods = _allLockedPeriods;
+        for (uint256 i = 0; i < _lockedValues.length; i++) {
+            amount = amount.add(calculateReward(
+                currentSupply, _lockedValues[i], _totalLockedValues[i], allLockedPeriods));
+            allLockedPeriods--;
+        }
+    }
 
+    /**
+    * @dev Calculate reward for one period
+    * @param _currentSupply Supply in the minted period
+    * @param _lockedValue The amount of tokens that were locked by user in specified period.
+    * @param _totalLockedValue The amount of tokens that were locked by all users in specified period.
+    * @param _allLockedPeriods The max amount of periods during which tokens will be locked after specified period.
+    **/
+    function calculateReward(
+        uint256 _currentSupply,
+        uint256 _lockedValue,
+        uint256 _totalLockedValue,
+        uint256 _allLockedPeriods
+    )
+        internal view returns (uint256)
+    {
         //futureSupply * lockedValue * (k1 + allLockedPeriods) / (totalLockedValue * k2) -
         //currentSupply * lockedValue * (k1 + allLockedPeriods) / (totalLockedValue * k2)
         uint256 allLockedPeriods = (_allLockedPeriods <= awardedPeriods ?
             _allLockedPeriods : awardedPeriods)
             .add(lockedPeriodsCoefficient);
         uint256 denominator = _totalLockedValue.mul(miningCoefficient);
-        amount =
+        return
             futureSupply
                 .mul(_lockedValue)
                 .mul(allLockedPeriods)
                 .div(denominator).sub(
-            totalSupply[currentIndex]
+            _currentSupply
                 .mul(_lockedValue)
                 .mul(allLockedPeriods)
                 .div(denominator));
-        decimals = _decimals;
-
-        totalSupply[currentIndex ^ NEGATION] = nextTotalSupply.add(amount);
     }
 
     function verifyState(address _testTarget) public onlyOwner {
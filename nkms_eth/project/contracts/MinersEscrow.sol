@@ -21,7 +21,13 @@ contract MinersEscrow is Issuer {
     event LockSwitched(address indexed owner, bool release);
     event Withdrawn(address indexed owner, uint256 value);
     event ActivityConfirmed(address indexed owner, uint256 indexed period, uint256 value);
+    // period is the previous period at the moment of minting
     event Mined(address indexed owner, uint256 indexed period, uint256 value);
+    // range of confirmed periods minted by the transaction, not all confirmed periods
+    // before the previous period are minted if the number of periods was limited
+    event MintedPeriods(address indexed owner, uint256 firstPeriod, uint256 lastPeriod);
+    event MinerIdSet(address indexed owner, bytes32 minerId);
+    event OperatorSet(address indexed owner, address indexed operator);
 
     enum MinerInfoField {
         MinersLength,
@@ -60,17 +66,25 @@ contract MinersEscrow is Issuer {
         bool release;
         uint256 maxReleasePeriods;
         uint256 releaseRate;
-        // periods that confirmed but not yet mined
+        // periods that confirmed but not yet mined,
+        // ring buffer of CONFIRMED_PERIODS_SIZE slots after the first change
         ConfirmedPeriodInfo[] confirmedPeriods;
         // downtime
         uint256 lastActivePeriod;
         Downtime[] downtime;
         bytes32[] minerIds;
+        // first element and length of the confirmed periods ring buffer,
+        // fields were added after the others so they are packed in one slot
+        uint128 confirmedPeriodsHead;
+        uint128 confirmedPeriodsLength;
     }
 
     uint256 constant MAX_PERIODS = 10;
+    // one extra slot marks the ring buffer, legacy arrays are not longer than MAX_PERIODS
+    uint256 constant CONFIRMED_PERIODS_SIZE = MAX_PERIODS + 1;
     uint256 constant MAX_OWNERS = 50000;
     uint256 constant RESERVED_PERIOD = 0;
+    uint256 constant MAX_STAKE_REDRAWS = 10;
 
     mapping (address => MinerInfo) minerInfo;
     address[] miners;
@@ -81,6 +95,20 @@ contract MinersEscrow is Issuer {
     uint256 public maxAllowableLockedTokens;
     PolicyManager public policyManager;
 
+    // binary indexed tree of the last confirmed locked tokens,
+    // node with index i (from 1) sums stakes of miners from i - lowBit(i) + 1 to i
+    address[] stakeMiners;
+    mapping (address => uint256) stakeIndex;
+    mapping (address => uint256) stakes;
+    mapping (uint256 => uint256) stakeTree;
+
+    // miners which confirmed activity for the period in order of the first confirmation,
+    // arrays are append-only so a miner is stored once per period with a single new slot
+    mapping (uint256 => address[]) activeMiners;
+
+    // addresses which can confirm activity on behalf of miners
+    mapping (address => address) public operators;
+
     /**
     * @notice Constructor sets address of token contract and coefficients for mining
     * @param _token Token contract
@@ -126,6 +154,75 @@ contract MinersEscrow is Issuer {
         _;
     }
 
+    /**
+    * @dev Get number of confirmed but not yet mined periods of the miner
+    **/
+    function getConfirmedPeriodsLength(MinerInfo storage _info)
+        internal view returns (uint256)
+    {
+        if (_info.confirmedPeriods.length != CONFIRMED_PERIODS_SIZE) {
+            return _info.confirmedPeriods.length;
+        }
+        return _info.confirmedPeriodsLength;
+    }
+
+    /**
+    * @dev Get confirmed period of the miner by index from the oldest one
+    **/
+    function getConfirmedPeriod(MinerInfo storage _info, uint256 _index)
+        internal view returns (ConfirmedPeriodInfo storage)
+    {
+        if (_info.confirmedPeriods.length != CONFIRMED_PERIODS_SIZE) {
+            return _info.confirmedPeriods[_index];
+        }
+        require(_index < _info.confirmedPeriodsLength);
+        return _info.confirmedPeriods[(_info.confirmedPeriodsHead + _index) % CONFIRMED_PERIODS_SIZE];
+    }
+
+    /**
+    * @dev Convert legacy array of confirmed periods to the ring buffer,
+    elements stay in place and the head is the first element
+    **/
+    function initConfirmedPeriods(MinerInfo storage _info) internal {
+        uint256 length = _info.confirmedPeriods.length;
+        if (length == CONFIRMED_PERIODS_SIZE) {
+            return;
+        }
+        if (length != 0) {
+            _info.confirmedPeriodsLength = uint128(length);
+        }
+        _info.confirmedPeriods.length = CONFIRMED_PERIODS_SIZE;
+    }
+
+    /**
+    * @dev Add the newest confirmed period to the ring buffer
+    **/
+    function pushConfirmedPeriod(MinerInfo storage _info, uint256 _period, uint256 _lockedValue)
+        internal
+    {
+        initConfirmedPeriods(_info);
+        uint256 length = _info.confirmedPeriodsLength;
+        require(length < MAX_PERIODS);
+        ConfirmedPeriodInfo storage confirmedPeriod = _info.confirmedPeriods[
+            (_info.confirmedPeriodsHead + length) % CONFIRMED_PERIODS_SIZE];
+        confirmedPeriod.period = _period;
+        confirmedPeriod.lockedValue = _lockedValue;
+        _info.confirmedPeriodsLength = uint128(length + 1);
+    }
+
+    /**
+    * @dev Remove the oldest confirmed periods by moving the head of the ring buffer
+    **/
+    function removeConfirmedPeriods(MinerInfo storage _info, uint256 _number) internal {
+        if (_number == 0) {
+            return;
+        }
+        initConfirmedPeriods(_info);
+        require(_number <= _info.confirmedPeriodsLength);
+        _info.confirmedPeriodsHead = uint128((_info.confirmedPeriodsHead + _number) % CONFIRMED_PERIODS_SIZE);
+        _info.confirmedPeriodsLength = uint128(_info.confirmedPeriodsLength - _number);
+    }
+
     /**
     * @notice Get locked tokens value for owner in current period
     * @param _owner Tokens owner
@@ -137,11 +234,11 @@ contract MinersEscrow is Issuer {
         MinerInfo storage info = minerInfo[_owner];
 
         // no confirmed periods, so current period may be release period
-        if (info.confirmedPeriods.length == 0) {
+        uint256 length = getConfirmedPeriodsLength(info);
+        if (length == 0) {
             uint256 lockedValue = info.lockedValue;
         } else {
-            uint256 i = info.confirmedPeriods.length - 1;
-            ConfirmedPeriodInfo storage confirmedPeriod = info.confirmedPeriods[i];
+            ConfirmedPeriodInfo storage confirmedPeriod = getConfirmedPeriod(info, length - 1);
             // last confirmed period is current period
             if (confirmedPeriod.period == currentPeriod) {
                 return confirmedPeriod.lockedValue;
@@ -149,8 +246,8 @@ contract MinersEscrow is Issuer {
             } else if (confirmedPeriod.period < currentPeriod) {
                 lockedValue = confirmedPeriod.lockedValue;
             // penultimate confirmed period is previous or current period, so get its lockedValue
-            } else if (info.confirmedPeriods.length > 1) {
-                return info.confirmedPeriods[info.confirmedPeriods.length - 2].lockedValue;
+            } else if (length > 1) {
+                return getConfirmedPeriod(info, length - 2).lockedValue;
             // no previous periods, so return saved lockedValue
             } else {
                 return info.lockedValue;
@@ -210,10 +307,9 @@ contract MinersEscrow is Issuer {
         uint256 nextPeriod = currentPeriod.add(_periods);
 
         MinerInfo storage info = minerInfo[_owner];
-        if (info.confirmedPeriods.length > 0 &&
-            info.confirmedPeriods[info.confirmedPeriods.length - 1].period >= currentPeriod) {
-            ConfirmedPeriodInfo storage confirmedPeriod =
-                info.confirmedPeriods[info.confirmedPeriods.length - 1];
+        uint256 length = getConfirmedPeriodsLength(info);
+        if (length > 0 && getConfirmedPeriod(info, length - 1).period >= currentPeriod) {
+            ConfirmedPeriodInfo storage confirmedPeriod = getConfirmedPeriod(info, length - 1);
             uint256 lockedTokens = confirmedPeriod.lockedValue;
             uint256 period = confirmedPeriod.period;
         } else {
@@ -311,7 +407,7 @@ contract MinersEscrow is Issuer {
         }
         require(info.lockedValue <= maxAllowableLockedTokens);
 
-        confirmActivity(info.lockedValue);
+        confirmActivity(msg.sender, info.lockedValue);
         Locked(msg.sender, info.lockedValue, info.releaseRate);
     }
 
@@ -342,35 +438,37 @@ contract MinersEscrow is Issuer {
 
     /**
     * @notice Confirm activity for future period
+    * @param _miner Miner address
     * @param _lockedValue Locked tokens in future period
     **/
-    function confirmActivity(uint256 _lockedValue) internal {
+    function confirmActivity(address _miner, uint256 _lockedValue) internal {
         require(_lockedValue > 0);
-        MinerInfo storage info = minerInfo[msg.sender];
+        MinerInfo storage info = minerInfo[_miner];
         uint256 nextPeriod = getCurrentPeriod() + 1;
 
-        if (info.confirmedPeriods.length > 0 &&
-            info.confirmedPeriods[info.confirmedPeriods.length - 1].period == nextPeriod) {
-            ConfirmedPeriodInfo storage confirmedPeriod =
-                info.confirmedPeriods[info.confirmedPeriods.length - 1];
+        uint256 length = getConfirmedPeriodsLength(info);
+        if (length > 0 && getConfirmedPeriod(info, length - 1).period == nextPeriod) {
+            ConfirmedPeriodInfo storage confirmedPeriod = getConfirmedPeriod(info, length - 1);
             lockedPerPeriod[nextPeriod] = lockedPerPeriod[nextPeriod]
                 .add(_lockedValue.sub(confirmedPeriod.lockedValue));
             confirmedPeriod.lockedValue = _lockedValue;
-            ActivityConfirmed(msg.sender, nextPeriod, _lockedValue);
+            updateStake(_miner, _lockedValue);
+            ActivityConfirmed(_miner, nextPeriod, _lockedValue);
             return;
         }
 
-        require(info.confirmedPeriods.length < MAX_PERIODS);
         lockedPerPeriod[nextPeriod] = lockedPerPeriod[nextPeriod]
             .add(_lockedValue);
-        info.confirmedPeriods.push(ConfirmedPeriodInfo(nextPeriod, _lockedValue));
+        pushConfirmedPeriod(info, nextPeriod, _lockedValue);
+        activeMiners[nextPeriod].push(_miner);
 
         uint256 currentPeriod = nextPeriod - 1;
         if (info.lastActivePeriod < currentPeriod) {
             info.downtime.push(Downtime(info.lastActivePeriod + 1, currentPeriod));
         }
         info.lastActivePeriod = nextPeriod;
-        ActivityConfirmed(msg.sender, nextPeriod, _lockedValue);
+        updateStake(_miner, _lockedValue);
+        ActivityConfirmed(_miner, nextPeriod, _lockedValue);
     }
 
     /**
@@ -381,77 +479,213 @@ contract MinersEscrow is Issuer {
         uint256 currentPeriod = getCurrentPeriod();
         uint256 nextPeriod = currentPeriod + 1;
 
-        if (info.confirmedPeriods.length > 0 &&
-            info.confirmedPeriods[info.confirmedPeriods.length - 1].period >= nextPeriod) {
+        uint256 length = getConfirmedPeriodsLength(info);
+        if (length > 0 && getConfirmedPeriod(info, length - 1).period >= nextPeriod) {
            return;
         }
 
         uint256 lockedTokens = calculateLockedTokens(
             msg.sender, false, getLockedTokens(msg.sender), 1);
-        confirmActivity(lockedTokens);
+        confirmActivity(msg.sender, lockedTokens);
+    }
+
+    /**
+    * @notice Set operator which can confirm activity on behalf of sender
+    * @param _operator Operator address, zero address removes the operator
+    **/
+    function setOperator(address _operator) external onlyTokenOwner {
+        operators[msg.sender] = _operator;
+        OperatorSet(msg.sender, _operator);
+    }
+
+    /**
+    * @notice Confirm activity for future period on behalf of miners, sender must be operator of all miners.
+    Miners which already confirmed the next period, have no locked tokens or too many not mined periods are skipped
+    * @param _miners Miners addresses
+    **/
+    function confirmActivityFor(address[] _miners) external {
+        uint256 nextPeriod = getCurrentPeriod() + 1;
+        for (uint256 i = 0; i < _miners.length; i++) {
+            address miner = _miners[i];
+            require(operators[miner] == msg.sender);
+            MinerInfo storage info = minerInfo[miner];
+            uint256 length = getConfirmedPeriodsLength(info);
+            if (length >= MAX_PERIODS ||
+                length > 0 && getConfirmedPeriod(info, length - 1).period >= nextPeriod) {
+                continue;
+            }
+            uint256 lockedTokens = calculateLockedTokens(miner, false, getLockedTokens(miner), 1);
+            if (lockedTokens > 0) {
+                confirmActivity(miner, lockedTokens);
+            }
+        }
+    }
+
+    /**
+    * @dev Get number of periods for minting and the max amount of periods
+    during which tokens will be locked after the first of them
+    * @param _info Miner info
+    * @param _previousPeriod The last period for minting
+    * @param _maxPeriods Max number of periods for minting
+    **/
+    function getMintingNumber(MinerInfo storage _info, uint256 _previousPeriod, uint256 _maxPeriods)
+        internal view returns (uint256 number, uint256 allLockedPeriods)
+    {
+        number = getConfirmedPeriodsLength(_info);
+        if (_maxPeriods == 0 || number == 0 || getConfirmedPeriod(_info, 0).period > _previousPeriod) {
+            return (0, 0);
+        }
+
+        // number of periods is counted from the last confirmed period, so it doesn't depend on the chunk size
+        allLockedPeriods = getConfirmedPeriod(_info, number - 1).lockedValue
+            .divCeil(_info.releaseRate)
+            .sub(uint(1))
+            .add(number - 1);
+
+        if (getConfirmedPeriod(_info, number - 1).period > _previousPeriod) {
+            number--;
+        }
+        if (getConfirmedPeriod(_info, number - 1).period > _previousPeriod) {
+            number--;
+        }
+        if (number > _maxPeriods) {
+            number = _maxPeriods;
+        }
+    }
+
+    /**
+    * @dev Get the oldest confirmed periods of the miner with locked tokens of the miner and of all miners
+    **/
+    function getMintingPeriods(MinerInfo storage _info, uint256 _number)
+        internal view returns (uint256[] periods, uint256[] lockedValues, uint256[] totalLockedValues)
+    {
+        periods = new uint256[](_number);
+        lockedValues = new uint256[](_number);
+        totalLockedValues = new uint256[](_number);
+        for (uint256 i = 0; i < _number; i++) {
+            ConfirmedPeriodInfo storage confirmedPeriod = getConfirmedPeriod(_info, i);
+            periods[i] = confirmedPeriod.period;
+            lockedValues[i] = confirmedPeriod.lockedValue;
+            totalLockedValues[i] = lockedPerPeriod[confirmedPeriod.period];
+        }
     }
 
     /**
     * @notice Mint tokens for sender for previous periods if he locked his tokens and confirmed activity
     **/
-    function mint() external onlyTokenOwner {
+    function mint() external {
+        mint(MAX_PERIODS);
+    }
+
+    /**
+    * @notice Mint tokens for sender for the oldest previous periods if he locked his tokens and confirmed activity
+    * @dev Gas of the transaction grows with the number of minted periods,
+    other periods can be minted by the next transactions with the same results
+    * @param _maxPeriods Max number of periods for minting
+    **/
+    function mint(uint256 _maxPeriods) public onlyTokenOwner {
         uint256 previousPeriod = getCurrentPeriod().sub(uint(1));
         MinerInfo storage info = minerInfo[msg.sender];
-        uint256 numberPeriodsForMinting = info.confirmedPeriods.length;
-        require(numberPeriodsForMinting > 0 &&
-            info.confirmedPeriods[0].period <= previousPeriod);
+        uint256 numberPeriodsForMinting;
+        uint256 allLockedPeriods;
+        (numberPeriodsForMinting, allLockedPeriods) = getMintingNumber(info, previousPeriod, _maxPeriods);
+        require(numberPeriodsForMinting > 0);
 
         uint256 currentLockedValue = getLockedTokens(msg.sender);
-        ConfirmedPeriodInfo storage last = info.confirmedPeriods[numberPeriodsForMinting - 1];
-        uint256 allLockedPeriods = last.lockedValue
-            .divCeil(info.releaseRate)
-            .sub(uint(1))
-            .add(numberPeriodsForMinting);
-
-        if (last.period > previousPeriod) {
-            numberPeriodsForMinting--;
-        }
-        if (info.confirmedPeriods[numberPeriodsForMinting - 1].period > previousPeriod) {
-            numberPeriodsForMinting--;
-        }
-
-        uint256 reward = 0;
-        for(uint i = 0; i < numberPeriodsForMinting; ++i) {
-            uint256 amount;
-            uint256 period = info.confirmedPeriods[i].period;
-            uint256 lockedValue = info.confirmedPeriods[i].lockedValue;
-            allLockedPeriods--;
-            (amount, info.decimals) = mint(
-                previousPeriod,
-                lockedValue,
-                lockedPerPeriod[period],
-                allLockedPeriods,
-                info.decimals);
-            reward = reward.add(amount);
-            // TODO remove
-            if (address(policyManager) != 0x0) {
-                policyManager.updateReward(msg.sender, period);
-            }
+
+        uint256[] memory periods;
+        uint256[] memory lockedValues;
+        uint256[] memory totalLockedValues;
+        (periods, lockedValues, totalLockedValues) = getMintingPeriods(info, numberPeriodsForMinting);
+        // All periods are minted in one call to the issuer
+        uint256 reward;
+        uint256 decimals;
+        (reward, decimals) = mint(
+            previousPeriod,
+            lockedValues,
+            totalLockedValues,
+            allLockedPeriods,
+            info.decimals);
+        info.decimals = decimals;
+        // TODO remove
+        if (address(policyManager) != 0x0) {
+            policyManager.updateRewards(msg.sender, periods);
         }
         info.value = info.value.add(reward);
-        // Copy not minted periods
-        uint256 newNumberConfirmedPeriods = info.confirmedPeriods.length - numberPeriodsForMinting;
-        for (i = 0; i < newNumberConfirmedPeriods; i++) {
-            info.confirmedPeriods[i] = info.confirmedPeriods[numberPeriodsForMinting + i];
+        // Minted periods are removed by moving the head of the ring buffer
+        removeConfirmedPeriods(info, numberPeriodsForMinting);
+        // Miner without confirmed periods can't be sampled
+        if (getConfirmedPeriodsLength(info) == 0) {
+            updateStake(msg.sender, 0);
         }
-        info.confirmedPeriods.length = newNumberConfirmedPeriods;
 
         // Update lockedValue for current period
         info.lockedValue = currentLockedValue;
         Mined(msg.sender, previousPeriod, reward);
+        MintedPeriods(msg.sender, periods[0], periods[numberPeriodsForMinting - 1]);
+    }
+
+    /**
+    * @notice Calculate reward which the miner will get by minting in current period
+    * @param _miner Miner address
+    * @return Amount of tokens and number of periods for minting
+    **/
+    function getPendingReward(address _miner)
+        public view returns (uint256 reward, uint256 periods)
+    {
+        MinerInfo storage info = minerInfo[_miner];
+        uint256 previousPeriod = getCurrentPeriod().sub(uint(1));
+        uint256 allLockedPeriods;
+        (periods, allLockedPeriods) = getMintingNumber(info, previousPeriod, MAX_PERIODS);
+        if (periods == 0) {
+            return;
+        }
+
+        uint256[] memory lockedValues;
+        uint256[] memory totalLockedValues;
+        (, lockedValues, totalLockedValues) = getMintingPeriods(info, periods);
+        reward = calculateMint(previousPeriod, lockedValues, totalLockedValues, allLockedPeriods);
+    }
+
+    /**
+    * @notice Get locked tokens value for miner which will be used in sampling
+    * @param _miner Miner address
+    * @param _currentPeriod Current period
+    * @param _periods Amount of periods to get locked tokens
+    * @return Locked tokens or zero if miner did not confirm activity for current period
+    **/
+    function getLockedTokensForSampling(address _miner, uint256 _currentPeriod, uint256 _periods)
+        internal view returns (uint256)
+    {
+        MinerInfo storage info = minerInfo[_miner];
+        uint256 length = getConfirmedPeriodsLength(info);
+        if (length == 0) {
+            return 0;
+        }
+        ConfirmedPeriodInfo storage confirmedPeriod = getConfirmedPeriod(info, length - 1);
+        if (confirmedPeriod.period == _currentPeriod) {
+            return calculateLockedTokens(
+                _miner,
+                true,
+                confirmedPeriod.lockedValue,
+                _periods);
+        } else if (length > 1 &&
+            getConfirmedPeriod(info, length - 2).period == _currentPeriod) {
+            return calculateLockedTokens(
+                _miner,
+                true,
+                confirmedPeriod.lockedValue,
+                _periods - 1);
+        }
+        return 0;
     }
 
     /**
     * @notice Fixed-step in cumulative sum
-    * @param _startIndex Starting point
+    * @param _startIndex Starting point in the list of miners which confirmed activity for the current period
     * @param _delta How much to step
     * @param _periods Amount of periods to get locked tokens
-    * @dev
+    * @dev Only miners which confirmed activity for the current period are walked
              _startIndex
                 v
       |-------->*--------------->*---->*------------->|
@@ -469,44 +703,170 @@ contract MinersEscrow is Issuer {
     {
         require(_periods > 0);
         uint256 currentPeriod = getCurrentPeriod();
+        address[] storage active = activeMiners[currentPeriod];
         uint256 distance = 0;
 
-        for (uint256 i = _startIndex; i < miners.length; i++) {
-            address current = miners[i];
-            MinerInfo storage info = minerInfo[current];
-            if (info.confirmedPeriods.length == 0) {
-                continue;
-            }
-            ConfirmedPeriodInfo storage confirmedPeriod =
-                info.confirmedPeriods[info.confirmedPeriods.length - 1];
-            if (confirmedPeriod.period == currentPeriod) {
-                uint256 lockedTokens = calculateLockedTokens(
-                    current,
-                    true,
-                    confirmedPeriod.lockedValue,
-                    _periods);
-            } else if (info.confirmedPeriods.length > 1 &&
-                info.confirmedPeriods[info.confirmedPeriods.length - 2].period == currentPeriod) {
-                lockedTokens = calculateLockedTokens(
-                    current,
-                    true,
-                    confirmedPeriod.lockedValue,
-                    _periods - 1);
-            } else {
-                continue;
-            }
-
+        for (uint256 i = _startIndex; i < active.length; i++) {
+            address current = active[i];
+            uint256 lockedTokens = getLockedTokensForSampling(current, currentPeriod, _periods);
             if (_delta < distance + lockedTokens) {
                 stop = current;
                 stopIndex = i;
                 shift = _delta - distance;
                 break;
-            } else {
-                distance += lockedTokens;
+            }
+            distance += lockedTokens;
+        }
+    }
+
+    /**
+    * @notice Find miners for many points in cumulative sum using one pass
+    * @param _points Points in cumulative sum sorted in ascending order
+    * @param _periods Amount of periods to get locked tokens
+    * @return Miner for each point or zero address if point is out of range
+    **/
+    function findCumSums(uint256[] _points, uint256 _periods)
+        external view returns (address[] result)
+    {
+        require(_periods > 0);
+        uint256 currentPeriod = getCurrentPeriod();
+        uint256 distance = 0;
+        uint256 pointIndex = 0;
+        result = new address[](_points.length);
+        address[] storage active = activeMiners[currentPeriod];
+
+        for (uint256 i = 0; i < active.length && pointIndex < _points.length; i++) {
+            address current = active[i];
+            distance += getLockedTokensForSampling(current, currentPeriod, _periods);
+            while (pointIndex < _points.length && _points[pointIndex] < distance) {
+                require(pointIndex == 0 || _points[pointIndex - 1] <= _points[pointIndex]);
+                result[pointIndex] = current;
+                pointIndex++;
+            }
+        }
+    }
+
+    /**
+    * @dev Lowest set bit of the value
+    **/
+    function lowBit(uint256 _value) internal pure returns (uint256) {
+        return _value & (~_value + 1);
+    }
+
+    /**
+    * @dev Sum of stakes of the first miners in the stake tree
+    * @param _length Number of miners
+    **/
+    function getStakePrefixSum(uint256 _length) internal view returns (uint256 sum) {
+        for (uint256 i = _length; i > 0; i -= lowBit(i)) {
+            sum = sum.add(stakeTree[i]);
+        }
+    }
+
+    /**
+    * @dev Set the last confirmed locked tokens of the miner in the stake tree.
+    Miner is appended to the tree when his stake becomes not zero for the first time
+    * @param _miner Miner address
+    * @param _stake Locked tokens
+    **/
+    function updateStake(address _miner, uint256 _stake) internal {
+        uint256 index = stakeIndex[_miner];
+        if (index == 0) {
+            if (_stake == 0) {
+                return;
+            }
+            stakeMiners.push(_miner);
+            index = stakeMiners.length;
+            stakeIndex[_miner] = index;
+            // New node covers previous miners from index - lowBit(index) + 1
+            stakeTree[index] = getStakePrefixSum(index - 1)
+                .sub(getStakePrefixSum(index - lowBit(index)));
+        }
+
+        uint256 stake = stakes[_miner];
+        if (stake == _stake) {
+            return;
+        }
+        stakes[_miner] = _stake;
+        uint256 length = stakeMiners.length;
+        for (uint256 i = index; i <= length; i += lowBit(i)) {
+            stakeTree[i] = stakeTree[i].sub(stake).add(_stake);
+        }
+    }
+
+    /**
+    * @notice Get sum of the last confirmed locked tokens of all miners
+    **/
+    function getAllStake() public view returns (uint256) {
+        return getStakePrefixSum(stakeMiners.length);
+    }
+
+    /**
+    * @notice Remove stake of the miner which stopped confirming activity from the stake tree
+    * @dev Anyone can call it, the stake is returned to the tree by the next confirmation of the miner
+    * @param _miner Miner address
+    **/
+    function expireStake(address _miner) external {
+        require(stakes[_miner] > 0 &&
+            minerInfo[_miner].lastActivePeriod < getCurrentPeriod());
+        updateStake(_miner, 0);
+    }
+
+    /**
+    * @dev Find index of the miner in the stake tree by point in cumulative sum of stakes
+    * @return Index of the miner from 0 and shift inside his stake,
+    index is equal to the number of miners if point is out of range
+    **/
+    function findStakeIndex(uint256 _point)
+        internal view returns (uint256 index, uint256 shift)
+    {
+        uint256 length = stakeMiners.length;
+        uint256 step = 1;
+        while (step <= length / 2) {
+            step <<= 1;
+        }
+
+        shift = _point;
+        for (; step > 0; step >>= 1) {
+            if (index + step <= length && stakeTree[index + step] <= shift) {
+                index += step;
+                shift -= stakeTree[index];
             }
         }
     }
 
+    /**
+    * @notice Find miner by point in cumulative sum of the last confirmed locked tokens
+    * @dev Runs in O(log n) using the stake tree. Stake is the value confirmed for the latest period
+    of the miner. Stakes of miners which stopped confirming activity stay in the tree
+    until expireStake is called, if the point gets into such stake then the point is drawn again
+    from the hash of the previous point, up to MAX_STAKE_REDRAWS times
+    * @param _point Point in cumulative sum
+    * @return Miner and shift inside his stake (of the last drawn point) or zero address
+    if point is out of range or only stakes of inactive miners were found
+    **/
+    function findStake(uint256 _point)
+        public view returns (address miner, uint256 shift)
+    {
+        uint256 allStake = getAllStake();
+        if (_point >= allStake) {
+            return;
+        }
+        uint256 currentPeriod = getCurrentPeriod();
+        uint256 point = _point;
+        uint256 index;
+        uint256 rest;
+        for (uint256 i = 0; i <= MAX_STAKE_REDRAWS; i++) {
+            (index, rest) = findStakeIndex(point);
+            if (minerInfo[stakeMiners[index]].lastActivePeriod >= currentPeriod) {
+                miner = stakeMiners[index];
+                shift = rest;
+                return;
+            }
+            point = uint256(keccak256(point)) % allStake;
+        }
+    }
+
     /**
     * @notice Set policy manager address
     **/
@@ -522,6 +882,7 @@ contract MinersEscrow is Issuer {
     function setMinerId(bytes32 _minerId) public {
         MinerInfo storage info = minerInfo[msg.sender];
         info.minerIds.push(_minerId);
+        MinerIdSet(msg.sender, _minerId);
     }
 
     /**
@@ -553,11 +914,11 @@ contract MinersEscrow is Issuer {
         } else if (_field == MinerInfoField.ReleaseRate) {
             return bytes32(info.releaseRate);
         } else if (_field == MinerInfoField.ConfirmedPeriodsLength) {
-            return bytes32(info.confirmedPeriods.length);
+            return bytes32(getConfirmedPeriodsLength(info));
         } else if (_field == MinerInfoField.ConfirmedPeriod) {
-            return bytes32(info.confirmedPeriods[_index].period);
+            return bytes32(getConfirmedPeriod(info, _index).period);
         } else if (_field == MinerInfoField.ConfirmedPeriodLockedValue) {
-            return bytes32(info.confirmedPeriods[_index].lockedValue);
+            return bytes32(getConfirmedPeriod(info, _index).lockedValue);
         } else if (_field == MinerInfoField.LastActivePeriod) {
             return bytes32(info.lastActivePeriod);
         } else if (_field == MinerInfoField.DowntimeLength) {
@@ -573,6 +934,179 @@ contract MinersEscrow is Issuer {
         }
     }
 
+    /**
+    * @notice Get page of miners
+    * @param _start Index of the first miner
+    * @param _count Max number of miners to get
+    **/
+    function getMiners(uint256 _start, uint256 _count)
+        public view returns (address[] result)
+    {
+        if (_start >= miners.length) {
+            return;
+        }
+        uint256 end = Math.min256(miners.length, _start.add(_count));
+        result = new address[](end - _start);
+        for (uint256 i = _start; i < end; i++) {
+            result[i - _start] = miners[i];
+        }
+    }
+
+    /**
+    * @notice Get page of miners which confirmed activity for the period
+    * @param _period Period
+    * @param _start Index of the first miner in the page
+    * @param _count Max number of miners to get
+    **/
+    function getActiveMiners(uint256 _period, uint256 _start, uint256 _count)
+        public view returns (address[] result)
+    {
+        address[] storage active = activeMiners[_period];
+        if (_start >= active.length) {
+            return;
+        }
+        uint256 end = Math.min256(active.length, _start.add(_count));
+        result = new address[](end - _start);
+        for (uint256 i = _start; i < end; i++) {
+            result[i - _start] = active[i];
+        }
+    }
+
+    /**
+    * @notice Get number of miners which confirmed activity for the period
+    * @param _period Period
+    **/
+    function getActiveMinersLength(uint256 _period) public view returns (uint256) {
+        return activeMiners[_period].length;
+    }
+
+    /**
+    * @notice Get all scalar fields of the miner info
+    * @param _miner Address of miner
+    **/
+    function getMinerInfoFields(address _miner)
+        public view returns (
+            uint256 value,
+            uint256 decimals,
+            uint256 lockedValue,
+            bool release,
+            uint256 maxReleasePeriods,
+            uint256 releaseRate,
+            uint256 confirmedPeriodsLength,
+            uint256 lastActivePeriod,
+            uint256 downtimeLength,
+            uint256 minerIdsLength
+        )
+    {
+        MinerInfo storage info = minerInfo[_miner];
+        value = info.value;
+        decimals = info.decimals;
+        lockedValue = info.lockedValue;
+        release = info.release;
+        maxReleasePeriods = info.maxReleasePeriods;
+        releaseRate = info.releaseRate;
+        confirmedPeriodsLength = getConfirmedPeriodsLength(info);
+        lastActivePeriod = info.lastActivePeriod;
+        downtimeLength = info.downtime.length;
+        minerIdsLength = info.minerIds.length;
+    }
+
+    /**
+    * @notice Get all confirmed periods of the miner
+    * @param _miner Address of miner
+    * @return Periods and locked tokens for each period
+    **/
+    function getConfirmedPeriods(address _miner)
+        public view returns (uint256[] periods, uint256[] lockedValues)
+    {
+        MinerInfo storage info = minerInfo[_miner];
+        uint256 length = getConfirmedPeriodsLength(info);
+        periods = new uint256[](length);
+        lockedValues = new uint256[](length);
+        for (uint256 i = 0; i < length; i++) {
+            ConfirmedPeriodInfo storage confirmedPeriod = getConfirmedPeriod(info, i);
+            periods[i] = confirmedPeriod.period;
+            lockedValues[i] = confirmedPeriod.lockedValue;
+        }
+    }
+
+    /**
+    * @notice Get all downtime periods of the miner
+    * @param _miner Address of miner
+    * @return Start and end period for each downtime
+    **/
+    function getDowntime(address _miner)
+        public view returns (uint256[] startPeriods, uint256[] endPeriods)
+    {
+        MinerInfo storage info = minerInfo[_miner];
+        startPeriods = new uint256[](info.downtime.length);
+        endPeriods = new uint256[](info.downtime.length);
+        for (uint256 i = 0; i < info.downtime.length; i++) {
+            Downtime storage downtime = info.downtime[i];
+            startPeriods[i] = downtime.startPeriod;
+            endPeriods[i] = downtime.endPeriod;
+        }
+    }
+
+    /**
+    * @notice Get slice of downtime periods of the miner
+    * @dev Slice has fixed size to be readable by other contracts, unused elements are zero
+    * @param _miner Address of miner
+    * @param _from Index of the first downtime in the slice
+    * @return Start and end periods of downtimes from _from to _from + 10,
+    number of all downtimes and last active period of the miner
+    **/
+    function getDowntimeSlice(address _miner, uint256 _from)
+        public view returns (
+            uint256[10] startPeriods,
+            uint256[10] endPeriods,
+            uint256 length,
+            uint256 lastActivePeriod
+        )
+    {
+        MinerInfo storage info = minerInfo[_miner];
+        length = info.downtime.length;
+        lastActivePeriod = info.lastActivePeriod;
+        for (uint256 i = 0; i < startPeriods.length && _from + i < length; i++) {
+            Downtime storage downtime = info.downtime[_from + i];
+            startPeriods[i] = downtime.startPeriod;
+            endPeriods[i] = downtime.endPeriod;
+        }
+    }
+
+    /**
+    * @notice Get all miner ids
+    * @param _miner Address of miner
+    **/
+    function getMinerIds(address _miner) public view returns (bytes32[]) {
+        return minerInfo[_miner].minerIds;
+    }
+
+    /**
+    * @notice Get all ids of the miners
+    * @dev Ids are concatenated in the order of miners, lengths contain the number of ids of each miner
+    * @param _miners Addresses of miners
+    **/
+    function getMinersIds(address[] _miners)
+        public view returns (uint256[] lengths, bytes32[] ids)
+    {
+        lengths = new uint256[](_miners.length);
+        uint256 length = 0;
+        for (uint256 i = 0; i < _miners.length; i++) {
+            lengths[i] = minerInfo[_miners[i]].minerIds.length;
+            length = length.add(lengths[i]);
+        }
+        ids = new bytes32[](length);
+        uint256 index = 0;
+        for (i = 0; i < _miners.length; i++) {
+            bytes32[] storage minerIds = minerInfo[_miners[i]].minerIds;
+            for (uint256 j = 0; j < minerIds.length; j++) {
+                ids[index] = minerIds[j];
+                index++;
+            }
+        }
+    }
+
     function verifyState(address _testTarget) public onlyOwner {
         super.verifyState(_testTarget);
         require(uint256(delegateGet(_testTarget, "minReleasePeriods()")) ==
@@ -584,6 +1118,10 @@ contract MinersEscrow is Issuer {
         require(address(delegateGet(_testTarget, "policyManager()")) == address(policyManager));
         require(uint256(delegateGet(_testTarget, "lockedPerPeriod(uint256)",
             bytes32(RESERVED_PERIOD))) == lockedPerPeriod[RESERVED_PERIOD]);
+        require(uint256(delegateGet(_testTarget, "getAllStake()")) == getAllStake());
+        uint256 nextPeriod = getCurrentPeriod() + 1;
+        require(uint256(delegateGet(_testTarget, "getActiveMinersLength(uint256)",
+            bytes32(nextPeriod))) == getActiveMinersLength(nextPeriod));
 
         require(uint256(delegateGet(_testTarget, "getMinerInfo(uint8,address,uint256)",
             bytes32(uint256(MinerInfoField.MinersLength)), 0x0, 0)) == miners.length);
@@ -592,6 +1130,7 @@ contract MinersEscrow is Issuer {
         }
         address minerAddress = miners[0];
         bytes32 miner = bytes32(minerAddress);
+        require(address(delegateGet(_testTarget, "operators(address)", miner)) == operators[minerAddress]);
         require(address(delegateGet(_testTarget, "getMinerInfo(uint8,address,uint256)",
             bytes32(uint8(MinerInfoField.Miner)), 0x0, 0)) == minerAddress);
         MinerInfo storage info = minerInfo[minerAddress];
@@ -608,9 +1147,9 @@ contract MinersEscrow is Issuer {
         require(uint256(delegateGet(_testTarget, "getMinerInfo(uint8,address,uint256)",
             bytes32(uint8(MinerInfoField.ReleaseRate)), miner, 0)) == info.releaseRate);
         require(uint256(delegateGet(_testTarget, "getMinerInfo(uint8,address,uint256)",
-            bytes32(uint8(MinerInfoField.ConfirmedPeriodsLength)), miner, 0)) == info.confirmedPeriods.length);
-        for (uint256 i = 0; i < info.confirmedPeriods.length; i++) {
-            ConfirmedPeriodInfo storage confirmedPeriod = info.confirmedPeriods[i];
+            bytes32(uint8(MinerInfoField.ConfirmedPeriodsLength)), miner, 0)) == getConfirmedPeriodsLength(info));
+        for (uint256 i = 0; i < getConfirmedPeriodsLength(info); i++) {
+            ConfirmedPeriodInfo storage confirmedPeriod = getConfirmedPeriod(info, i);
             require(uint256(delegateGet(_testTarget, "getMinerInfo(uint8,address,uint256)",
                 bytes32(uint8(MinerInfoField.ConfirmedPeriod)), miner, bytes32(i))) == confirmedPeriod.period);
             require(uint256(delegateGet(_testTarget, "getMinerInfo(uint8,address,uint256)",
@@ -63,7 +63,9 @@ contract PolicyManager is Upgradeable {
         Reward,
         RewardRate,
         LastMinedPeriod,
-        RewardDelta
+        RewardDelta,
+        DeltaPeriods,
+        DeltaPeriodsIndexed
     }
 
     struct ArrangementInfo {
@@ -89,6 +91,12 @@ contract PolicyManager is Upgradeable {
         uint256 rewardRate;
         uint256 lastMinedPeriod;
         mapping (uint256 => int256) rewardDelta;
+        // periods after lastMinedPeriod where reward rate changes,
+        // bit (period % 256) of the word with index (period / 256) is set for such period
+        mapping (uint256 => uint256) deltaPeriods;
+        // reward deltas of the node written by the previous version are not in deltaPeriods
+        // until indexDeltaPeriods, so every period is walked to apply them
+        bool deltaPeriodsIndexed;
     }
 
     bytes20 constant RESERVED_POLICY_ID = bytes20(0);
@@ -146,9 +154,12 @@ contract PolicyManager is Upgradeable {
             node.rewardDelta[policy.startPeriod] = node.rewardDelta[policy.startPeriod]
                 .add(feeByPeriod);
             node.rewardDelta[endPeriod] = node.rewardDelta[endPeriod].sub(feeByPeriod);
+            addDeltaPeriod(node, policy.startPeriod);
+            addDeltaPeriod(node, endPeriod);
             // TODO node should pay for this
             if (node.lastMinedPeriod == 0) {
                 node.lastMinedPeriod = currentPeriod;
+                node.deltaPeriodsIndexed = true;
             }
             ArrangementInfo storage arrangement = policy.arrangements[_nodes[i]];
             arrangement.indexOfDowntimePeriods =
@@ -158,6 +169,48 @@ contract PolicyManager is Upgradeable {
         PolicyCreated(_policyId, msg.sender, _nodes);
     }
 
+    /**
+    * @dev Mark period where reward rate of the node changes.
+    Delta for already mined periods is never applied, so such periods are not marked
+    * @param _node Node info
+    * @param _period Period with reward delta
+    **/
+    function addDeltaPeriod(NodeInfo storage _node, uint256 _period) internal {
+        if (_period <= _node.lastMinedPeriod) {
+            return;
+        }
+        uint256 word = _node.deltaPeriods[_period / 256];
+        uint256 bit = uint256(1) << (_period % 256);
+        if (word & bit == 0) {
+            _node.deltaPeriods[_period / 256] = word | bit;
+        }
+    }
+
+    /**
+    * @notice Index reward deltas of the node which were written by the previous version
+    * @dev Until then reward of the node is updated by walking every period.
+    All policies start not later than the next period and reward rate of the node returns to zero
+    after the end of all policies, so the bound is valid only if it is after the current period
+    and the deltas up to the bound compensate the current reward rate
+    * @param _node Node address
+    * @param _lastPeriod Last period with reward delta, the end of the last policy of the node
+    **/
+    function indexDeltaPeriods(address _node, uint256 _lastPeriod) public onlyOwner {
+        NodeInfo storage node = nodes[_node];
+        require(node.lastMinedPeriod != 0 && !node.deltaPeriodsIndexed &&
+            _lastPeriod > escrow.getCurrentPeriod());
+        int256 rewardRate = int256(node.rewardRate);
+        for (uint256 period = node.lastMinedPeriod + 1; period <= _lastPeriod; period++) {
+            int256 delta = node.rewardDelta[period];
+            if (delta != 0) {
+                rewardRate += delta;
+                addDeltaPeriod(node, period);
+            }
+        }
+        require(rewardRate == 0);
+        node.deltaPeriodsIndexed = true;
+    }
+
     /**
     * @notice Update node reward
     * @param _node Node address
@@ -165,16 +218,95 @@ contract PolicyManager is Upgradeable {
     **/
     function updateReward(address _node, uint256 _period) external {
         require(msg.sender == address(escrow));
-        NodeInfo storage node = nodes[_node];
-        if (node.lastMinedPeriod == 0) {
+        uint256[] memory periods = new uint256[](1);
+        periods[0] = _period;
+        updateNodeReward(nodes[_node], periods);
+    }
+
+    /**
+    * @notice Update node reward for all periods minted at once
+    * @param _node Node address
+    * @param _periods Processed periods in ascending order
+    **/
+    function updateRewards(address _node, uint256[] _periods) external {
+        require(msg.sender == address(escrow));
+        updateNodeReward(nodes[_node], _periods);
+    }
+
+    /**
+    * @notice Update node reward for processed periods
+    * @dev Node info is written once after all periods
+    * @param _node Node info
+    * @param _periods Processed periods in ascending order
+    **/
+    function updateNodeReward(NodeInfo storage _node, uint256[] memory _periods) internal {
+        uint256 lastMinedPeriod = _node.lastMinedPeriod;
+        if (lastMinedPeriod == 0 || _periods.length == 0) {
             return;
         }
-        for (uint256 i = node.lastMinedPeriod + 1; i <= _period; i++) {
-            node.rewardRate = node.rewardRate.add(node.rewardDelta[i]);
-//            delete node.rewardDelta[i];
+        uint256 rewardRate = _node.rewardRate;
+        uint256 reward = _node.reward;
+        for (uint256 i = 0; i < _periods.length; i++) {
+            uint256 period = _periods[i];
+            rewardRate = applyRewardDeltas(_node, rewardRate, lastMinedPeriod, period);
+            lastMinedPeriod = period;
+            reward = reward.add(rewardRate);
+        }
+        _node.rewardRate = rewardRate;
+        _node.lastMinedPeriod = lastMinedPeriod;
+        _node.reward = reward;
+    }
+
+    /**
+    * @dev Apply reward deltas of the node for the periods after the mined one.
+    Words of delta periods without marks are skipped, applied deltas and marks are cleared
+    also for the node which is not indexed yet
+    * @param _node Node info
+    * @param _rewardRate Reward rate in the mined period
+    * @param _minedPeriod Last mined period
+    * @param _period Processed period
+    * @return Reward rate in the processed period
+    **/
+    function applyRewardDeltas(
+        NodeInfo storage _node,
+        uint256 _rewardRate,
+        uint256 _minedPeriod,
+        uint256 _period
+    )
+        internal returns (uint256 rewardRate)
+    {
+        rewardRate = _rewardRate;
+        uint256 period;
+        // Not indexed deltas are applied and cleared here, only marks are cleared below
+        if (!_node.deltaPeriodsIndexed) {
+            for (period = _minedPeriod + 1; period <= _period; period++) {
+                int256 delta = _node.rewardDelta[period];
+                if (delta != 0) {
+                    rewardRate = rewardRate.add(delta);
+                    delete _node.rewardDelta[period];
+                }
+            }
+        }
+
+        for (uint256 index = (_minedPeriod + 1) / 256; index <= _period / 256; index++) {
+            uint256 marks = _node.deltaPeriods[index];
+            if (marks == 0) {
+                continue;
+            }
+            uint256 word = marks;
+            uint256 end = Math.min256(_period, index * 256 + 255);
+            for (period = Math.max256(_minedPeriod + 1, index * 256); period <= end; period++) {
+                uint256 bit = uint256(1) << (period % 256);
+                if (word & bit != 0) {
+                    rewardRate = rewardRate.add(_node.rewardDelta[period]);
+                    delete _node.rewardDelta[period];
+                    word &= ~bit;
+                }
+            }
+            if (word != marks) {
+                _node.deltaPeriods[index] = word;
+            }
         }
-        node.lastMinedPeriod = _period;
-        node.reward = node.reward.add(node.rewardRate);
     }
 
     /**
@@ -198,12 +330,13 @@ contract PolicyManager is Upgradeable {
         require(policy.client == msg.sender && !policy.disabled);
         uint256 refundValue = 0;
         uint256 endPeriod = policy.lastPeriod.add(uint(1));
+        uint256 currentPeriod = escrow.getCurrentPeriod();
         for (uint256 i = 0; i < policy.nodes.length; i++) {
             address node = policy.nodes[i];
             if (policy.arrangements[node].disabled) {
                 continue;
             }
-            uint256 nodeRefundValue = revokeArrangement(policy, node, endPeriod);
+            uint256 nodeRefundValue = revokeArrangement(policy, node, endPeriod, currentPeriod);
             refundValue = refundValue.add(nodeRefundValue);
             ArrangementRevoked(_policyId, msg.sender, node, nodeRefundValue);
         }
@@ -227,7 +360,7 @@ contract PolicyManager is Upgradeable {
             !policy.disabled &&
             !policy.arrangements[_node].disabled);
         uint256 endPeriod = policy.lastPeriod.add(uint(1));
-        refundValue = revokeArrangement(policy, _node, endPeriod);
+        refundValue = revokeArrangement(policy, _node, endPeriod, escrow.getCurrentPeriod());
         if (refundValue > 0) {
             msg.sender.transfer(refundValue);
         }
@@ -239,16 +372,24 @@ contract PolicyManager is Upgradeable {
     * @param _policy Policy
     * @param _node Node that will be excluded
     * @param _endPeriod Pre-calculated end of period value
+    * @param _currentPeriod Current period
     **/
-    function revokeArrangement(Policy storage _policy, address _node, uint256 _endPeriod)
+    function revokeArrangement(
+        Policy storage _policy,
+        address _node,
+        uint256 _endPeriod,
+        uint256 _currentPeriod
+    )
         internal returns (uint256 refundValue)
     {
-        refundValue = calculateRefund(_policy, _node);
+        refundValue = calculateRefund(_policy, _node, _currentPeriod);
         NodeInfo storage node = nodes[_node];
         ArrangementInfo storage arrangement = _policy.arrangements[_node];
         node.rewardDelta[arrangement.lastRefundedPeriod] =
             node.rewardDelta[arrangement.lastRefundedPeriod].sub(_policy.rate);
         node.rewardDelta[_endPeriod] = node.rewardDelta[_endPeriod].add(_policy.rate);
+        addDeltaPeriod(node, arrangement.lastRefundedPeriod);
+        addDeltaPeriod(node, _endPeriod);
         refundValue = refundValue.add(
             _endPeriod.sub(arrangement.lastRefundedPeriod).mul(_policy.rate));
         _policy.arrangements[_node].disabled = true;
@@ -263,13 +404,14 @@ contract PolicyManager is Upgradeable {
         require(msg.sender == policy.client && !policy.disabled);
         uint256 refundValue = 0;
         uint256 numberOfActive = policy.nodes.length;
+        uint256 currentPeriod = escrow.getCurrentPeriod();
         for (uint256 i = 0; i < policy.nodes.length; i++) {
             address node = policy.nodes[i];
             if (policy.arrangements[node].disabled) {
                 numberOfActive--;
                 continue;
             }
-            uint256 nodeRefundValue = calculateRefund(policy, node);
+            uint256 nodeRefundValue = calculateRefund(policy, node, currentPeriod);
             if (policy.arrangements[node].lastRefundedPeriod > policy.lastPeriod) {
                 policy.arrangements[node].disabled = true;
                 numberOfActive--;
@@ -298,7 +440,7 @@ contract PolicyManager is Upgradeable {
         require(msg.sender == policy.client &&
             !policy.disabled &&
             !policy.arrangements[_node].disabled);
-        refundValue = calculateRefund(policy, _node);
+        refundValue = calculateRefund(policy, _node, escrow.getCurrentPeriod());
         if (policy.arrangements[_node].lastRefundedPeriod > policy.lastPeriod) {
             policy.arrangements[_node].disabled = true;
         }
@@ -312,45 +454,71 @@ contract PolicyManager is Upgradeable {
     * @notice Calculate amount of refund
     * @param _policy Policy
     * @param _node Node for calculation
+    * @param _currentPeriod Current period
     **/
     //TODO extract checkRefund method
-    function calculateRefund(Policy storage _policy, address _node) internal returns (uint256) {
+    function calculateRefund(Policy storage _policy, address _node, uint256 _currentPeriod)
+        internal returns (uint256)
+    {
         ArrangementInfo storage arrangement = _policy.arrangements[_node];
-        uint256 maxPeriod = Math.min256(escrow.getCurrentPeriod(), _policy.lastPeriod);
+        uint256 maxPeriod = Math.min256(_currentPeriod, _policy.lastPeriod);
         uint256 minPeriod = Math.max256(_policy.startPeriod, arrangement.lastRefundedPeriod);
-        uint256 downtimePeriods = 0;
-        uint256 length = uint256(escrow.getMinerInfo(MinersEscrow.MinerInfoField.DowntimeLength, _node, 0));
-        for (uint256 i = arrangement.indexOfDowntimePeriods; i < length; i++) {
-            uint256 startPeriod =
-                uint256(escrow.getMinerInfo(MinersEscrow.MinerInfoField.DowntimeStartPeriod, _node, i));
-            uint256 endPeriod =
-                uint256(escrow.getMinerInfo(MinersEscrow.MinerInfoField.DowntimeEndPeriod, _node, i));
-            if (startPeriod > maxPeriod) {
-                break;
-            } else if (endPeriod < minPeriod) {
-                continue;
-            }
-            downtimePeriods = downtimePeriods.add(
-                Math.min256(maxPeriod, endPeriod)
-                .sub(Math.max256(minPeriod, startPeriod))
-                .add(uint(1)));
-            if (maxPeriod <= endPeriod) {
-                break;
-            }
-        }
-        arrangement.indexOfDowntimePeriods = i;
-        uint256 lastActivePeriod =
-            uint256(escrow.getMinerInfo(MinersEscrow.MinerInfoField.LastActivePeriod, _node, 0));
-        if (i == length && lastActivePeriod < maxPeriod) {
-            downtimePeriods = downtimePeriods.add(
-                maxPeriod.sub(Math.max256(
-                    minPeriod.sub(uint(1)), lastActivePeriod)));
-        }
+        uint256 downtimePeriods;
+        (downtimePeriods, arrangement.indexOfDowntimePeriods) = calculateDowntimePeriods(
+            _node, arrangement.indexOfDowntimePeriods, minPeriod, maxPeriod);
         arrangement.lastRefundedPeriod = maxPeriod.add(uint(1));
 
         return _policy.rate.mul(downtimePeriods);
     }
 
+    /**
+    * @notice Calculate number of periods in which node was not active
+    * @dev Downtime is read by slices, usually one call to the escrow is enough
+    * @param _node Node for calculation
+    * @param _index Index of the first downtime to check
+    * @param _minPeriod First period to check
+    * @param _maxPeriod Last period to check
+    * @return Number of downtime periods and index of the first downtime to check next time
+    **/
+    function calculateDowntimePeriods(
+        address _node,
+        uint256 _index,
+        uint256 _minPeriod,
+        uint256 _maxPeriod
+    )
+        internal view returns (uint256 downtimePeriods, uint256 index)
+    {
+        uint256[10] memory startPeriods;
+        uint256[10] memory endPeriods;
+        uint256 length;
+        uint256 lastActivePeriod;
+        index = _index;
+        do {
+            (startPeriods, endPeriods, length, lastActivePeriod) = escrow.getDowntimeSlice(_node, index);
+            for (uint256 i = 0; i < startPeriods.length && index < length; i++) {
+                if (startPeriods[i] > _maxPeriod) {
+                    return;
+                }
+                if (endPeriods[i] >= _minPeriod) {
+                    downtimePeriods = downtimePeriods.add(
+                        Math.min256(_maxPeriod, endPeriods[i])
+                        .sub(Math.max256(_minPeriod, startPeriods[i]))
+                        .add(uint(1)));
+                    if (_maxPeriod <= endPeriods[i]) {
+                        return;
+                    }
+                }
+                index++;
+            }
+        } while (index < length);
+
+        if (lastActivePeriod < _maxPeriod) {
+            downtimePeriods = downtimePeriods.add(
+                _maxPeriod.sub(Math.max256(
+                    _minPeriod.sub(uint(1)), lastActivePeriod)));
+        }
+    }
+
     /**
     * @notice Get number of nodes in policy
     * @param _policyId Policy id
@@ -405,7 +573,7 @@ contract PolicyManager is Upgradeable {
     * @notice Get information about node
     * @param _field Field to get
     * @param _node Address of node
-    * @param _period Period to get reward delta
+    * @param _period Period to get reward delta or index of the word of delta periods
     **/
     function getNodeInfo(NodeInfoField _field, address _node, uint256 _period)
         public view returns (bytes32)
@@ -419,6 +587,10 @@ contract PolicyManager is Upgradeable {
             return bytes32(nodeInfo.lastMinedPeriod);
         } else if (_field == NodeInfoField.RewardDelta) {
             return bytes32(nodeInfo.rewardDelta[_period]);
+        } else if (_field == NodeInfoField.DeltaPeriods) {
+            return bytes32(nodeInfo.deltaPeriods[_period]);
+        } else if (_field == NodeInfoField.DeltaPeriodsIndexed) {
+            return nodeInfo.deltaPeriodsIndexed ? bytes32(1) : bytes32(0);
         }
     }
 
@@ -457,6 +629,11 @@ contract PolicyManager is Upgradeable {
             bytes32(uint8(NodeInfoField.LastMinedPeriod)), bytes32(RESERVED_NODE), 0)) == nodeInfo.lastMinedPeriod);
         require(int256(delegateGet(_testTarget, "getNodeInfo(uint8,address,uint256)",
             bytes32(uint8(NodeInfoField.RewardDelta)), bytes32(RESERVED_NODE), 11)) == nodeInfo.rewardDelta[11]);
+        require(uint256(delegateGet(_testTarget, "getNodeInfo(uint8,address,uint256)",
+            bytes32(uint8(NodeInfoField.DeltaPeriods)), bytes32(RESERVED_NODE), 0)) == nodeInfo.deltaPeriods[0]);
+        require((delegateGet(_testTarget, "getNodeInfo(uint8,address,uint256)",
+            bytes32(uint8(NodeInfoField.DeltaPeriodsIndexed)), bytes32(RESERVED_NODE), 0) == bytes32(1)) ==
+                nodeInfo.deltaPeriodsIndexed);
     }
 
     function finishUpgrade(address _target) public onlyOwner {
@@ -478,5 +655,7 @@ contract PolicyManager is Upgradeable {
         nodeInfo.rewardRate = 33;
         nodeInfo.lastMinedPeriod = 44;
         nodeInfo.rewardDelta[11] = 55;
+        nodeInfo.deltaPeriods[0] = 1 << 11;
+        nodeInfo.deltaPeriodsIndexed = true;
     }
 }
\ No newline at end of file
@@ -0,0 +1,135 @@
+import time
+from concurrent.futures import Future
+from threading import RLock
+from typing import Callable, Dict, List, Tuple
+
+
+class ReceiptWatcher:
+    """
+    Waits for the receipts of many pending transactions with one poll per new block.
+
+    Every watched transaction gets a future resolved with its receipt,
+    or with ReceiptWatcher.Timeout when it is not mined in time.
+    Each poll fetches the new blocks once and requests the receipts only of the pending transactions
+    included in them, newly watched transactions are checked on the next poll regardless.
+
+        future = blockchain.receipts.watch(txhash, callback=print)
+        receipt = blockchain.receipts.wait(txhash)
+        receipts = blockchain.receipts.wait_all(txhashes)
+
+    """
+
+    class Timeout(Exception):
+        pass
+
+    def __init__(self, blockchain: 'Blockchain', timeout: float=None, poll_interval: float=0.1):
+        self.blockchain = blockchain
+        self.timeout = timeout if timeout is not None else blockchain._timeout
+        self.poll_interval = poll_interval
+
+        self._pending = dict()    # type: Dict[str, Future]
+        self._deadlines = dict()  # type: Dict[str, Tuple[float, float]]
+        self._unchecked = set()
+        self._block_number = None
+        self._lock = RLock()
+
+    def __repr__(self):
+        class_name = self.__class__.__name__
+        r = "{}(pending={}, timeout={})"
+        return r.format(class_name, len(self._pending), self.timeout)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def watch(self, txhash: str, callback: Callable[[dict], None]=None, timeout: float=None) -> Future:
+        """Starts watching the transaction, the callback receives the receipt when it is mined"""
+
+        with self._lock:
+            future = self._pending.get(txhash)
+            if future is None:
+                future = Future()
+                self._pending[txhash] = future
+                timeout = timeout if timeout is not None else self.timeout
+                self._deadlines[txhash] = (time.monotonic() + timeout, timeout)
+                self._unchecked.add(txhash)
+
+        if callback is not None:
+            def on_done(done: Future) -> None:
+                if done.exception() is None:
+                    callback(done.result())
+            future.add_done_callback(on_done)
+        return future
+
+    def poll(self) -> int:
+        """
+        Fetches the receipts of the transactions in the new blocks (and of the newly watched transactions),
+        resolves the mined and timed out transactions, returns the number of the resolved ones.
+        """
+
+        with self._lock:
+            if not self._pending:
+                return 0
+
+            web3 = self.blockchain._chain.web3
+            block_number = web3.eth.blockNumber
+            txhashes = [txhash for txhash in self._pending if txhash in self._unchecked]
+            checked = [txhash for txhash in self._pending if txhash not in self._unchecked]
+            self._unchecked.clear()
+            if checked and self._block_number is not None and block_number > self._block_number:
+                txhashes.extend(self._find_mined(checked, range(self._block_number + 1, block_number + 1)))
+            self._block_number = block_number
+
+            resolved = dict()
+            for txhash in txhashes:
+                receipt = web3.eth.getTransactionReceipt(txhash)
+                if receipt is not None:
+                    resolved[txhash] = receipt
+
+            now = time.monotonic()
+            expired = [txhash for txhash in self._pending
+                       if txhash not in resolved and self._deadlines[txhash][0] < now]
+
+            futures = dict()
+            for txhash in list(resolved) + expired:
+                _, timeout = self._deadlines.pop(txhash)
+                futures[txhash] = (self._pending.pop(txhash), timeout)
+
+        # Callbacks run outside of the lock, they may watch new transactions
+        for txhash, (future, timeout) in futures.items():
+            if txhash in resolved:
+                future.set_result(resolved[txhash])
+            else:
+                message = 'Transaction {} is not mined after {} seconds'.format(txhash, timeout)
+                future.set_exception(self.Timeout(message))
+
+        return len(futures)
+
+    def _find_mined(self, txhashes: List[str], block_numbers: range) -> List[str]:
+        """Transactions which are included in the blocks, each block is fetched once"""
+
+        # Requesting every receipt is cheaper than fetching many skipped blocks
+        if len(block_numbers) > len(txhashes):
+            return txhashes
+
+        web3 = self.blockchain._chain.web3
+        pending = {txhash.lower(): txhash for txhash in txhashes}
+        mined = list()
+        for block_number in block_numbers:
+            for txhash in web3.eth.getBlock(block_number)['transactions']:
+                if txhash.lower() in pending:
+                    mined.append(pending[txhash.lower()])
+        return mined
+
+    def wait(self, txhash: str, timeout: float=None) -> dict:
+        """Blocks until the transaction is mined, raises ReceiptWatcher.Timeout"""
+        return self.wait_all([txhash], timeout=timeout)[0]
+
+    def wait_all(self, txhashes: List[str], timeout: float=None) -> List[dict]:
+        """Blocks until all transactions are mined, returns the receipts in the same order"""
+
+        futures = [self.watch(txhash, timeout=timeout) for txhash in txhashes]
+        while not all(future.done() for future in futures):
+            if self.poll() == 0:
+                time.sleep(self.poll_interval)
+
+        return [future.result() for future in futures]
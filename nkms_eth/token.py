@@ -1,5 +1,6 @@
 from populus.contracts.contract import PopulusContract
 from .blockchain import Blockchain
+from .pipeline import TransactionPipeline
 
 
 class NuCypherKMSToken:
@@ -64,7 +65,7 @@ class NuCypherKMSToken:
             deploy_args=[self.saturation],
             deploy_transaction={'from': self.creator})
 
-        self.blockchain._chain.wait.for_receipt(deployment_txhash, timeout=self.blockchain._timeout)
+        self.blockchain.receipts.wait(deployment_txhash)
 
         self.contract = the_nucypherKMS_token_contract
         return deployment_txhash
@@ -73,7 +74,7 @@ class NuCypherKMSToken:
         """Invoke contract -> State change"""
         self._check_contract_deployment()
         result = self.contract.transact(*args)
-        return result
+        return self.blockchain._instrument(self._contract_name, args[0] if args else None, result)
 
     @classmethod
     def get(cls, blockchain):
@@ -94,16 +95,19 @@ class NuCypherKMSToken:
         self._check_contract_deployment()
         return self.__call__().balanceOf(address)
 
-    def _airdrop(self, amount: int):
+    def _airdrop(self, amount: int, pipeline: bool=False):
         """Airdrops from creator address to all other addresses!"""
         self._check_contract_deployment()
         _, *addresses = self.blockchain._chain.web3.eth.accounts
 
-        def txs():
+        if pipeline:
+            transactions = TransactionPipeline(blockchain=self.blockchain, sender=self.creator)
             for address in addresses:
-                yield self.transact({'from': self.creator}).transfer(address, amount*(10**6))
+                transactions.transact(self).transfer(address, amount*(10**6))
+            transactions.wait()
+            return self
 
-        for tx in txs():
-            self.blockchain._chain.wait.for_receipt(tx, timeout=10)
+        txs = [self.transact({'from': self.creator}).transfer(address, amount*(10**6)) for address in addresses]
+        self.blockchain.receipts.wait_all(txs, timeout=10)
 
         return self
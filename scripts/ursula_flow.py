@@ -62,8 +62,8 @@ def main():
 
         print(web3.eth.accounts[1])
         print(web3.eth.accounts[-1])
-        address_stop, shift = escrow.call().findCumSum(NULL_ADDR, n_tokens // 3)
-        print(address_stop, shift)
+        address_stop, index_stop, shift = escrow.call().findCumSum(0, n_tokens // 3, 1)
+        print(address_stop, index_stop, shift)
 
         # Experimenting with distributions of random points
         n_ursulas = 5
@@ -72,10 +72,10 @@ def main():
                               range(n_select))
         deltas = [i - j for i, j in zip(points[1:], points[:-1])]
         addrs = set()
-        addr = NULL_ADDR
+        index = 0
         shift = 0
         for delta in deltas:
-            addr, shift = escrow.call().findCumSum(addr, delta + shift)
+            addr, index, shift = escrow.call().findCumSum(index, delta + shift, 1)
             addrs.add(addr)
         addrs = random.sample(addrs, n_ursulas)
         print(addrs)
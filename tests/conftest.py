@@ -1,29 +1,73 @@
 import pytest
 from nkms_eth.blockchain import TesterBlockchain, Blockchain
+from nkms_eth.receipts import ReceiptWatcher
 from nkms_eth.token import NuCypherKMSToken
 from nkms_eth.escrow import Escrow
 from nkms_eth.miner import Miner
 
 
-@pytest.fixture(scope='function')
-def testerchain():
+def registered_addresses(chain) -> dict:
+    """Contract addresses known by the in-memory registrar of the populus chain"""
+    return chain.contract_backends['Memory'].contract_addresses
+
+
+@pytest.fixture(scope='session')
+def _testerchain():
     chain = TesterBlockchain()
     yield chain
     del chain
     Blockchain._instance = False
 
 
-@pytest.fixture(scope='function')
-def token(testerchain):
-    token = NuCypherKMSToken(blockchain=testerchain)
+@pytest.fixture(scope='session')
+def _deployment(_testerchain):
+    """Token and escrow contracts deployed once per session"""
+
+    token = NuCypherKMSToken(blockchain=_testerchain)
     token.arm()
     token.deploy()
+
+    escrow = Escrow(blockchain=_testerchain, token=token)
+    escrow.arm()
+    escrow.deploy()
+
+    yield token.contract, escrow.contract
+
+
+@pytest.fixture(scope='function')
+def testerchain(_testerchain):
+    """
+    Session chain reverted to a snapshot after every test.
+    The session deployment is not registered, use the token and escrow fixtures to get it.
+    """
+
+    web3 = _testerchain._chain.web3
+    addresses = registered_addresses(_testerchain._chain)
+    session_addresses = {name: set(contract_addresses) for name, contract_addresses in addresses.items()}
+    addresses.clear()
+
+    snapshot_id = web3.testing.snapshot()
+    yield _testerchain
+    web3.testing.revert(snapshot_id)
+
+    addresses.clear()
+    addresses.update(session_addresses)
+    # Forget the transactions which were reverted
+    _testerchain.receipts = ReceiptWatcher(blockchain=_testerchain, timeout=_testerchain._timeout)
+    _testerchain.disable_gas_accounting()
+
+
+@pytest.fixture(scope='function')
+def token(_deployment, testerchain):
+    token_contract, _ = _deployment
+    testerchain._chain.registrar.set_contract_address(NuCypherKMSToken._contract_name, token_contract.address)
+    token = NuCypherKMSToken(blockchain=testerchain, token_contract=token_contract)
     yield token
 
 
 @pytest.fixture(scope='function')
-def escrow(testerchain, token):
-    escrow = Escrow(blockchain=testerchain, token=token)
-    escrow.arm()
-    escrow.deploy()
-    yield escrow
\ No newline at end of file
+def escrow(_deployment, testerchain, token):
+    _, escrow_contract = _deployment
+    testerchain._chain.registrar.set_contract_address(Escrow._contract_name, escrow_contract.address)
+    escrow = Escrow(blockchain=testerchain, token=token, contract=escrow_contract)
+    yield escrow
@@ -0,0 +1,35 @@
+import pytest
+
+
+@pytest.fixture()
+def chain(testerchain):
+    """
+    Populus tester chain of the session, reverted after every test.
+    Replaces the populus plugin fixture which starts a new chain for every test.
+    """
+    return testerchain._chain
+
+
+@pytest.fixture()
+def web3(chain):
+    return chain.web3
+
+
+@pytest.fixture(scope='session')
+def _token(_testerchain):
+    """
+    Token deployed once per session, before the snapshot of the first test which uses it.
+    Modules can override it to deploy the token with another supply once per module.
+    """
+    chain = _testerchain._chain
+    creator = chain.web3.eth.accounts[0]
+    token, _ = chain.provider.deploy_contract(
+        'NuCypherKMSToken', deploy_args=[2 * 10 ** 9],
+        deploy_transaction={'from': creator})
+    return token
+
+
+@pytest.fixture()
+def token(chain, _token):
+    """Session token, its state is reverted after every test"""
+    return _token
@@ -46,4 +46,22 @@ contract IssuerMock is Issuer {
         token.transfer(msg.sender, amount);
     }
 
+    function testMintBatch(
+        uint256 _period,
+        uint256[] _lockedValues,
+        uint256[] _totalLockedValues,
+        uint256 _allLockedPeriods,
+        uint256 _decimals
+    )
+        public returns (uint256 amount, uint256 decimals)
+    {
+        (amount, decimals) = mint(
+            _period,
+            _lockedValues,
+            _totalLockedValues,
+            _allLockedPeriods,
+            _decimals);
+        token.transfer(msg.sender, amount);
+    }
+
 }
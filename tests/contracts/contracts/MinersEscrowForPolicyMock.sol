@@ -73,6 +73,14 @@ contract MinersEscrowForPolicyMock {
         policyManager.updateReward(msg.sender, _period);
     }
 
+    /**
+    * @notice Emulate mint method for many periods
+    * @param _periods Periods for minting
+    **/
+    function mintPeriods(uint256[] _periods) external {
+        policyManager.updateRewards(msg.sender, _periods);
+    }
+
     /**
     * @notice Set policy manager address
     **/
@@ -80,6 +88,25 @@ contract MinersEscrowForPolicyMock {
         policyManager = _policyManager;
     }
 
+    /**
+    * @notice Get slice of downtime periods
+    **/
+    function getDowntimeSlice(address, uint256 _from)
+        public view returns (
+            uint256[10] startPeriods,
+            uint256[10] endPeriods,
+            uint256 length,
+            uint256 lastActive
+        )
+    {
+        length = downtime.length;
+        lastActive = lastActivePeriod;
+        for (uint256 i = 0; i < startPeriods.length && _from + i < length; i++) {
+            startPeriods[i] = downtime[_from + i].startPeriod;
+            endPeriods[i] = downtime[_from + i].endPeriod;
+        }
+    }
+
     function getMinerInfo(MinersEscrow.MinerInfoField _field, address, uint256 _index)
         public view returns (bytes32)
     {
@@ -0,0 +1,56 @@
+pragma solidity ^0.4.18;
+
+
+import "contracts/MinersEscrow.sol";
+import "contracts/NuCypherKMSToken.sol";
+
+
+/**
+* @notice Contract for using in MinersEscrow tests, emulates version with the legacy array of confirmed periods
+**/
+contract MinersEscrowLegacyMock is MinersEscrow {
+
+    function MinersEscrowLegacyMock(
+        NuCypherKMSToken _token,
+        uint256 _hoursPerPeriod,
+        uint256 _miningCoefficient,
+        uint256 _lockedPeriodsCoefficient,
+        uint256 _awardedPeriods,
+        uint256 _minReleasePeriods,
+        uint256 _minAllowableLockedTokens,
+        uint256 _maxAllowableLockedTokens
+    )
+        public
+        MinersEscrow(
+            _token,
+            _hoursPerPeriod,
+            _miningCoefficient,
+            _lockedPeriodsCoefficient,
+            _awardedPeriods,
+            _minReleasePeriods,
+            _minAllowableLockedTokens,
+            _maxAllowableLockedTokens
+        )
+    {
+    }
+
+    /**
+    * @notice Replace confirmed periods of the miner by the legacy array
+    **/
+    function setLegacyConfirmedPeriods(
+        address _miner,
+        uint256[] _periods,
+        uint256[] _lockedValues
+    )
+        public onlyOwner
+    {
+        require(_periods.length == _lockedValues.length);
+        MinerInfo storage info = minerInfo[_miner];
+        info.confirmedPeriods.length = 0;
+        info.confirmedPeriodsHead = 0;
+        info.confirmedPeriodsLength = 0;
+        for (uint256 i = 0; i < _periods.length; i++) {
+            info.confirmedPeriods.push(ConfirmedPeriodInfo(_periods[i], _lockedValues[i]));
+        }
+    }
+}
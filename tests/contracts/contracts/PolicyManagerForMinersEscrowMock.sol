@@ -23,6 +23,15 @@ contract PolicyManagerForMinersEscrowMock {
         nodes[_node].push(_period);
     }
 
+    /**
+    * @notice Update node info for many periods
+    **/
+    function updateRewards(address _node, uint256[] _periods) external {
+        for (uint256 i = 0; i < _periods.length; i++) {
+            nodes[_node].push(_periods[i]);
+        }
+    }
+
     /**
     * @notice Get length of array
     **/
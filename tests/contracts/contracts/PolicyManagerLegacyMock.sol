@@ -0,0 +1,27 @@
+pragma solidity ^0.4.18;
+
+
+import "contracts/PolicyManager.sol";
+import "contracts/MinersEscrow.sol";
+
+
+/**
+* @notice Contract for using in PolicyManager tests
+**/
+contract PolicyManagerLegacyMock is PolicyManager {
+
+    function PolicyManagerLegacyMock(MinersEscrow _escrow) public PolicyManager(_escrow) {
+    }
+
+    /**
+    * @notice Write reward delta like the previous version without marking the period
+    **/
+    function setLegacyRewardDelta(address _node, uint256 _lastMinedPeriod, uint256 _period, int256 _delta)
+        public
+    {
+        NodeInfo storage node = nodes[_node];
+        node.lastMinedPeriod = _lastMinedPeriod;
+        node.rewardDelta[_period] = _delta;
+    }
+
+}
@@ -17,24 +17,23 @@ ROLLBACK_ESCROW = 4
 ROLLBACK_POLICY_MANAGER = 5
 
 
-# TODO extract method
 def wait_time(chain, wait_hours):
     web3 = chain.web3
-    step = 50
     end_timestamp = web3.eth.getBlock(web3.eth.blockNumber).timestamp + wait_hours * 60 * 60
-    while web3.eth.getBlock(web3.eth.blockNumber).timestamp < end_timestamp:
-        chain.wait.for_block(web3.eth.blockNumber + step)
+    web3.testing.timeTravel(end_timestamp)
 
 
-@pytest.fixture()
-def escrow(web3, chain):
+@pytest.fixture(scope='module')
+def _escrow(_testerchain):
+    chain = _testerchain._chain
+    web3 = chain.web3
     creator = web3.eth.accounts[0]
     node1 = web3.eth.accounts[1]
     node2 = web3.eth.accounts[2]
     node3 = web3.eth.accounts[3]
 
-    # Creator deploys the escrow
-    escrow_library, _ = chain.provider.get_or_deploy_contract(
+    # Creator deploys the escrow once per module
+    escrow_library, _ = chain.provider.deploy_contract(
         'MinersEscrowV1Mock', deploy_args=[
             [node1, node2, node3], [1, 2, 3]],
         deploy_transaction={'from': creator})
@@ -49,10 +48,16 @@ def escrow(web3, chain):
 
 
 @pytest.fixture()
-def policy_manager(web3, chain):
-    creator = web3.eth.accounts[0]
-    # Creator deploys the escrow
-    policy_manager, _ = chain.provider.get_or_deploy_contract(
+def escrow(chain, _escrow):
+    return _escrow
+
+
+@pytest.fixture(scope='module')
+def _policy_manager(_testerchain):
+    chain = _testerchain._chain
+    creator = chain.web3.eth.accounts[0]
+    # Creator deploys the policy manager once per module
+    policy_manager, _ = chain.provider.deploy_contract(
         'PolicyManagerV1Mock', deploy_transaction={'from': creator})
     dispatcher, _ = chain.provider.deploy_contract(
         'Dispatcher', deploy_args=[policy_manager.address],
@@ -60,6 +65,11 @@ def policy_manager(web3, chain):
     return dispatcher
 
 
+@pytest.fixture()
+def policy_manager(chain, _policy_manager):
+    return _policy_manager
+
+
 def test_voting(web3, chain, escrow, policy_manager):
     creator = web3.eth.accounts[0]
     node1 = web3.eth.accounts[1]
@@ -257,13 +267,13 @@ def test_upgrade(web3, chain, escrow, policy_manager):
         'Government', deploy_args=[escrow.address, policy_manager.address, 1],
         deploy_transaction={'from': creator})
     # Get first version of the escrow contract
-    escrow_library_v1 = chain.provider.get_contract('MinersEscrowV1Mock')
+    escrow_library_v1 = escrow.call().target()
     # Deploy second version of the escrow contract
     escrow_library_v2, _ = chain.provider.deploy_contract(
         'MinersEscrowV1Mock', deploy_args=[[node1], [1]],
         deploy_transaction={'from': creator})
     # Get first version of the policy manager contract
-    policy_manager_library_v1 = chain.provider.get_contract('PolicyManagerV1Mock')
+    policy_manager_library_v1 = policy_manager.call().target()
     # Deploy second version of the policy manager contract
     policy_manager_library_v2, _ = chain.provider.deploy_contract(
         'PolicyManagerV1Mock', deploy_transaction={'from': creator})
@@ -369,7 +379,7 @@ def test_upgrade(web3, chain, escrow, policy_manager):
     wait_time(chain, 1)
     tx = government.transact({'from': node1}).commitUpgrade()
     chain.wait.for_receipt(tx)
-    assert escrow_library_v1.address.lower() == escrow.call().target().lower()
+    assert escrow_library_v1.lower() == escrow.call().target().lower()
 
     events = government.pastEvents('UpgradeCommitted').get()
     assert 4 == len(events)
@@ -420,7 +430,7 @@ def test_upgrade(web3, chain, escrow, policy_manager):
     wait_time(chain, 1)
     tx = government.transact({'from': node1}).commitUpgrade()
     chain.wait.for_receipt(tx)
-    assert policy_manager_library_v1.address.lower() == policy_manager.call().target().lower()
+    assert policy_manager_library_v1.lower() == policy_manager.call().target().lower()
 
     events = government.pastEvents('UpgradeCommitted').get()
     assert 6 == len(events)
@@ -3,11 +3,12 @@ from ethereum.tester import TransactionFailed
 from populus.contracts.contract import PopulusContract
 
 
-@pytest.fixture()
-def token(web3, chain):
-    creator = web3.eth.accounts[0]
-    # Create an ERC20 token
-    token, _ = chain.provider.get_or_deploy_contract(
+@pytest.fixture(scope='module')
+def _token(_testerchain):
+    chain = _testerchain._chain
+    creator = chain.web3.eth.accounts[0]
+    # Create an ERC20 token once per module
+    token, _ = chain.provider.deploy_contract(
         'NuCypherKMSToken', deploy_args=[2 * 10 ** 40],
         deploy_transaction={'from': creator})
     return token
@@ -170,3 +171,45 @@ def test_verifying_state(web3, chain, token):
     with pytest.raises(TransactionFailed):
         tx = dispatcher.transact({'from': creator}).upgrade(contract_library_bad.address)
         chain.wait.for_receipt(tx)
+
+
+def test_batch_mint(web3, chain, token):
+    creator = web3.eth.accounts[0]
+    ursula1 = web3.eth.accounts[1]
+    ursula2 = web3.eth.accounts[2]
+
+    # Creator deploys two equal issuers
+    issuers = list()
+    for index in range(2):
+        issuer, _ = chain.provider.deploy_contract(
+            'IssuerMock', deploy_args=[token.address, 1, 10 ** 46, 10 ** 7, 10 ** 7],
+            deploy_transaction={'from': creator})
+        tx = token.transact({'from': creator}).transfer(issuer.address, 10 ** 40)
+        chain.wait.for_receipt(tx)
+        tx = issuer.transact().initialize()
+        chain.wait.for_receipt(tx)
+        issuers.append(issuer)
+    issuer1, issuer2 = issuers
+
+    # Mint for several values one by one and in one batch, in the same and in the next period
+    period = issuer1.call().getCurrentPeriod()
+    locked_values = [10 ** 3, 2 * 10 ** 3, 3 * 10 ** 3]
+    total_locked_values = [6 * 10 ** 3, 4 * 10 ** 3, 10 ** 4]
+    for minted_period in (period + 1, period + 1, period + 2):
+        for index, (locked_value, total_locked_value) in enumerate(zip(locked_values, total_locked_values)):
+            tx = issuer1.transact({'from': ursula1}).testMint(
+                minted_period, locked_value, total_locked_value, 10 ** 7 - index, 0)
+            chain.wait.for_receipt(tx)
+        tx = issuer2.transact({'from': ursula2}).testMintBatch(
+            minted_period, locked_values, total_locked_values, 10 ** 7, 0)
+        chain.wait.for_receipt(tx)
+
+        assert 0 < token.call().balanceOf(ursula1)
+        assert token.call().balanceOf(ursula1) == token.call().balanceOf(ursula2)
+        assert issuer1.call().lastMintedPeriod() == issuer2.call().lastMintedPeriod()
+        assert issuer1.call().currentIndex() == issuer2.call().currentIndex()
+
+    # Batch with different lengths of arrays is rejected
+    with pytest.raises(TransactionFailed):
+        tx = issuer2.transact({'from': ursula2}).testMintBatch(period + 2, [1, 2], [1], 0, 0)
+        chain.wait.for_receipt(tx)
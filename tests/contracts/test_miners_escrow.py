@@ -23,48 +23,46 @@ MINER_IDS_FIELD_LENGTH = 15
 MINER_ID_FIELD = 16
 
 
-@pytest.fixture()
-def token(web3, chain):
+@pytest.fixture(scope='module')
+def _escrow_contracts(_testerchain, _token):
+    """
+    Escrow contracts by max allowed locked tokens, deployed once per module
+    as the library and behind the dispatcher
+    """
+    chain = _testerchain._chain
+    web3 = chain.web3
     creator = web3.eth.accounts[0]
-    # Create an ERC20 token
-    token, _ = chain.provider.get_or_deploy_contract(
-        'NuCypherKMSToken', deploy_args=[2 * 10 ** 9],
-        deploy_transaction={'from': creator})
-    return token
-
-
-@pytest.fixture(params=[False, True])
-def escrow_contract(web3, chain, token, request):
-    def make_escrow(max_allowed_locked_tokens):
-        creator = web3.eth.accounts[0]
+    contracts = dict()
+    for max_allowed_locked_tokens in (1500, 5 * 10 ** 8):
         # Creator deploys the escrow
-        contract, _ = chain.provider.get_or_deploy_contract(
+        contract, _ = chain.provider.deploy_contract(
             'MinersEscrow', deploy_args=[
-                token.address, 1, 4 * 2 * 10 ** 7, 4, 4, 2, 100, max_allowed_locked_tokens],
+                _token.address, 1, 4 * 2 * 10 ** 7, 4, 4, 2, 100, max_allowed_locked_tokens],
             deploy_transaction={'from': creator})
+        dispatcher, _ = chain.provider.deploy_contract(
+            'Dispatcher', deploy_args=[contract.address],
+            deploy_transaction={'from': creator})
+        dispatched_contract = web3.eth.contract(
+            contract.abi,
+            dispatcher.address,
+            ContractFactoryClass=PopulusContract)
+        contracts[max_allowed_locked_tokens] = (contract, dispatched_contract)
+    return contracts
 
-        if request.param:
-            dispatcher, _ = chain.provider.deploy_contract(
-                'Dispatcher', deploy_args=[contract.address],
-                deploy_transaction={'from': creator})
 
-            # Deploy second version of the government contract
-            contract = web3.eth.contract(
-                contract.abi,
-                dispatcher.address,
-                ContractFactoryClass=PopulusContract)
-        return contract
+@pytest.fixture(params=[False, True])
+def escrow_contract(chain, token, _escrow_contracts, request):
+    def make_escrow(max_allowed_locked_tokens):
+        contract, dispatched_contract = _escrow_contracts[max_allowed_locked_tokens]
+        return dispatched_contract if request.param else contract
 
     return make_escrow
 
 
-# TODO extract method
 def wait_time(chain, wait_hours):
     web3 = chain.web3
-    step = 50
     end_timestamp = web3.eth.getBlock(web3.eth.blockNumber).timestamp + wait_hours * 60 * 60
-    while web3.eth.getBlock(web3.eth.blockNumber).timestamp < end_timestamp:
-        chain.wait.for_block(web3.eth.blockNumber + step)
+    web3.testing.timeTravel(end_timestamp)
 
 
 def test_escrow(web3, chain, token, escrow_contract):
@@ -410,12 +408,175 @@ def test_locked_distribution(web3, chain, token, escrow_contract):
         assert index + 1 == index_stop
         assert 1 == shift
 
+    # Start after the last active miner finds nothing
+    address_stop, index_stop, shift = escrow.call().findCumSum(len(miners), 1, 1)
+    assert NULL_ADDR == address_stop.lower()
+    assert 0 == index_stop
+    assert 0 == shift
+
+    # Find miners for many points in one pass
+    points = [0, n_locked // 3, largest_locked, largest_locked + largest_locked // 2 + 1, n_locked]
+    addresses = escrow.call().findCumSums(points, 1)
+    assert 5 == len(addresses)
+    assert miners[0].lower() == addresses[0].lower()
+    assert miners[0].lower() == addresses[1].lower()
+    assert miners[1].lower() == addresses[2].lower()
+    assert miners[2].lower() == addresses[3].lower()
+    assert NULL_ADDR == addresses[4].lower()
+    for index, point in enumerate(points[:-1]):
+        address_stop, _, _ = escrow.call().findCumSum(0, point, 1)
+        assert address_stop.lower() == addresses[index].lower()
+
+    addresses = escrow.call().findCumSums([1, 1], 11)
+    assert [NULL_ADDR, NULL_ADDR] == [address.lower() for address in addresses]
+
+    # Points must be sorted
+    with pytest.raises(TransactionFailed):
+        escrow.call().findCumSums([largest_locked, 0], 1)
+
     # Test miners iteration
     assert len(miners) == web3.toInt(escrow.call().getMinerInfo(MINERS_LENGTH, NULL_ADDR, 0).encode('latin-1'))
     for index, miner in enumerate(miners):
         assert miners[index] == \
                web3.toChecksumAddress(escrow.call().getMinerInfo(MINER, NULL_ADDR, index).encode('latin-1'))
 
+    # Get miners by pages
+    assert [miner.lower() for miner in miners] == \
+        [miner.lower() for miner in escrow.call().getMiners(0, len(miners))]
+    assert [miner.lower() for miner in miners[2:5]] == \
+        [miner.lower() for miner in escrow.call().getMiners(2, 3)]
+    assert [miners[-1].lower()] == [miner.lower() for miner in escrow.call().getMiners(len(miners) - 1, 10)]
+    assert [] == escrow.call().getMiners(len(miners), 10)
+
+    # Get miners which confirmed activity by pages
+    period = escrow.call().getCurrentPeriod()
+    assert len(miners) == escrow.call().getActiveMinersLength(period)
+    assert [miner.lower() for miner in miners] == \
+        [miner.lower() for miner in escrow.call().getActiveMiners(period, 0, len(miners))]
+    assert [miner.lower() for miner in miners[2:5]] == \
+        [miner.lower() for miner in escrow.call().getActiveMiners(period, 2, 3)]
+    assert [miners[-1].lower()] == \
+        [miner.lower() for miner in escrow.call().getActiveMiners(period, len(miners) - 1, 10)]
+    assert [] == escrow.call().getActiveMiners(period, len(miners), 10)
+    assert 0 == escrow.call().getActiveMinersLength(period - 1)
+    assert [] == escrow.call().getActiveMiners(period - 1, 0, 10)
+
+
+def test_stake_tree(web3, chain, token, escrow_contract):
+    escrow = escrow_contract(5 * 10 ** 8)
+    NULL_ADDR = '0x' + '0' * 40
+    creator = web3.eth.accounts[0]
+
+    # Give Escrow tokens for reward and initialize contract
+    tx = token.transact({'from': creator}).transfer(escrow.address, 10 ** 9)
+    chain.wait.for_receipt(tx)
+    tx = escrow.transact().initialize()
+    chain.wait.for_receipt(tx)
+
+    assert 0 == escrow.call().getAllStake()
+    address_stop, shift = escrow.call().findStake(0)
+    assert NULL_ADDR == address_stop.lower()
+    assert 0 == shift
+
+    # Lock tokens, each miner is added to the tree
+    miners = web3.eth.accounts[1:]
+    values = [1000 * (index + 1) for index in range(len(miners))]
+    for miner, value in zip(miners, values):
+        tx = token.transact({'from': creator}).transfer(miner, value + 500)
+        chain.wait.for_receipt(tx)
+        tx = token.transact({'from': miner}).approve(escrow.address, value + 500)
+        chain.wait.for_receipt(tx)
+        tx = escrow.transact({'from': miner}).deposit(value, 10)
+        chain.wait.for_receipt(tx)
+
+    def check_stakes():
+        assert sum(values) == escrow.call().getAllStake()
+        distance = 0
+        for miner, value in zip(miners, values):
+            if value == 0:
+                continue
+            address_stop, shift = escrow.call().findStake(distance)
+            assert miner.lower() == address_stop.lower()
+            assert 0 == shift
+            address_stop, shift = escrow.call().findStake(distance + value - 1)
+            assert miner.lower() == address_stop.lower()
+            assert value - 1 == shift
+            distance += value
+        address_stop, shift = escrow.call().findStake(distance)
+        assert NULL_ADDR == address_stop.lower()
+        assert 0 == shift
+
+    check_stakes()
+
+    # Lock more tokens, stake is updated
+    tx = escrow.transact({'from': miners[0]}).deposit(500, 1)
+    chain.wait.for_receipt(tx)
+    values[0] += 500
+    check_stakes()
+
+    # Confirm activity with the same values doesn't change the tree
+    wait_time(chain, 1)
+    for miner in miners:
+        tx = escrow.transact({'from': miner}).confirmActivity()
+        chain.wait.for_receipt(tx)
+    check_stakes()
+
+    # Results are the same as the scan but lookup in the tree uses less gas
+    point = sum(values) - 1
+    address_stop, _, shift = escrow.call().findCumSum(0, point, 1)
+    stake_address, stake_shift = escrow.call().findStake(point)
+    assert address_stop.lower() == stake_address.lower()
+    assert shift == stake_shift
+    scan_gas = escrow.estimateGas().findCumSum(0, point, 1)
+    tree_gas = escrow.estimateGas().findStake(point)
+    assert tree_gas < scan_gas
+
+    # Miner without confirmed periods is removed after minting
+    wait_time(chain, 2)
+    tx = escrow.transact({'from': miners[1]}).mint()
+    chain.wait.for_receipt(tx)
+    values[1] = 0
+    for miner in miners[:1] + miners[2:]:
+        tx = escrow.transact({'from': miner}).confirmActivity()
+        chain.wait.for_receipt(tx)
+    check_stakes()
+
+    # Miner which stopped confirming activity stays in the tree,
+    # points in his stake are drawn again until an active miner is found
+    wait_time(chain, 2)
+    for miner in miners[:1] + miners[3:]:
+        tx = escrow.transact({'from': miner}).confirmActivity()
+        chain.wait.for_receipt(tx)
+    assert sum(values) == escrow.call().getAllStake()
+    active_values = {miner.lower(): value for miner, value in zip(miners, values)
+                     if miner not in miners[1:3]}
+    for point in range(values[0], values[0] + values[2], values[2] // 10):
+        address_stop, shift = escrow.call().findStake(point)
+        assert address_stop.lower() in active_values
+        assert shift < active_values[address_stop.lower()]
+    address_stop, shift = escrow.call().findStake(sum(values))
+    assert NULL_ADDR == address_stop.lower()
+    assert 0 == shift
+
+    # Only the stale stake can be expired
+    with pytest.raises(TransactionFailed):
+        tx = escrow.transact({'from': creator}).expireStake(miners[0])
+        chain.wait.for_receipt(tx)
+    with pytest.raises(TransactionFailed):
+        tx = escrow.transact({'from': creator}).expireStake(miners[1])
+        chain.wait.for_receipt(tx)
+    tx = escrow.transact({'from': creator}).expireStake(miners[2])
+    chain.wait.for_receipt(tx)
+    stale_value = values[2]
+    values[2] = 0
+    check_stakes()
+
+    # Stake is returned to the tree after the next confirmation
+    tx = escrow.transact({'from': miners[2]}).confirmActivity()
+    chain.wait.for_receipt(tx)
+    values[2] = stale_value
+    check_stakes()
+
 
 def test_mining(web3, chain, token, escrow_contract):
     escrow = escrow_contract(1500)
@@ -626,9 +787,246 @@ def test_mining(web3, chain, token, escrow_contract):
     assert 3 == len(escrow.pastEvents('LockSwitched').get())
     assert 10 == len(escrow.pastEvents('ActivityConfirmed').get())
 
+    # Check all miner info in one call
+    fields = escrow.call().getMinerInfoFields(ursula1)
+    field_ids = [VALUE_FIELD, DECIMALS_FIELD, LOCKED_VALUE_FIELD, RELEASE_FIELD, MAX_RELEASE_PERIODS_FIELD,
+                 RELEASE_RATE_FIELD, CONFIRMED_PERIODS_FIELD_LENGTH, LAST_ACTIVE_PERIOD_FIELD,
+                 DOWNTIME_FIELD_LENGTH, MINER_IDS_FIELD_LENGTH]
+    assert len(field_ids) == len(fields)
+    for field_id, field in zip(field_ids, fields):
+        assert field == web3.toInt(escrow.call().getMinerInfo(field_id, ursula1, 0).encode('latin-1'))
+    periods, locked_values = escrow.call().getConfirmedPeriods(ursula1)
+    assert fields[6] == len(periods) == len(locked_values)
+    for index, (period, locked_value) in enumerate(zip(periods, locked_values)):
+        assert period == web3.toInt(
+            escrow.call().getMinerInfo(CONFIRMED_PERIOD_FIELD, ursula1, index).encode('latin-1'))
+        assert locked_value == web3.toInt(
+            escrow.call().getMinerInfo(CONFIRMED_PERIOD_LOCKED_VALUE_FIELD, ursula1, index).encode('latin-1'))
+    start_periods, end_periods = escrow.call().getDowntime(ursula2)
+    assert web3.toInt(escrow.call().getMinerInfo(DOWNTIME_FIELD_LENGTH, ursula2, 0).encode('latin-1')) == \
+        len(start_periods) == len(end_periods)
+    for index, (start_period, end_period) in enumerate(zip(start_periods, end_periods)):
+        assert start_period == web3.toInt(
+            escrow.call().getMinerInfo(DOWNTIME_START_PERIOD_FIELD, ursula2, index).encode('latin-1'))
+        assert end_period == web3.toInt(
+            escrow.call().getMinerInfo(DOWNTIME_END_PERIOD_FIELD, ursula2, index).encode('latin-1'))
+
     # TODO test max confirmed periods and miners
 
 
+def test_confirmed_periods_ring(web3, chain, token, escrow_contract):
+    escrow = escrow_contract(1500)
+    creator = web3.eth.accounts[0]
+    ursula = web3.eth.accounts[1]
+
+    # Give Escrow tokens for reward and initialize contract
+    tx = token.transact({'from': creator}).transfer(escrow.address, 10 ** 9)
+    chain.wait.for_receipt(tx)
+    tx = escrow.transact().initialize()
+    chain.wait.for_receipt(tx)
+
+    # Ursula locks tokens without release
+    tx = token.transact({'from': creator}).transfer(ursula, 1000)
+    chain.wait.for_receipt(tx)
+    tx = token.transact({'from': ursula}).approve(escrow.address, 1000)
+    chain.wait.for_receipt(tx)
+    tx = escrow.transact({'from': ursula}).deposit(1000, 2)
+    chain.wait.for_receipt(tx)
+
+    # Confirm and mint more times than the ring has slots, so the head wraps around
+    mint_gas = list()
+    for _ in range(25):
+        wait_time(chain, 1)
+        tx = escrow.transact({'from': ursula}).confirmActivity()
+        chain.wait.for_receipt(tx)
+        tx = escrow.transact({'from': ursula}).mint()
+        mint_gas.append(chain.wait.for_receipt(tx)['gasUsed'])
+
+        period = escrow.call().getCurrentPeriod()
+        assert [[period, period + 1], [1000, 1000]] == escrow.call().getConfirmedPeriods(ursula)
+        assert 2 == web3.toInt(escrow.call().getMinerInfo(CONFIRMED_PERIODS_FIELD_LENGTH, ursula, 0)
+                               .encode('latin-1'))
+        assert period + 1 == web3.toInt(escrow.call().getMinerInfo(CONFIRMED_PERIOD_FIELD, ursula, 1)
+                                         .encode('latin-1'))
+        assert 1000 == escrow.call().getLockedTokens(ursula)
+    # Mint costs the same after the head wraps around, nothing is shifted
+    assert max(mint_gas[11:]) <= max(mint_gas[:11])
+
+    # The number of not minted periods is still limited
+    for _ in range(8):
+        wait_time(chain, 1)
+        tx = escrow.transact({'from': ursula}).confirmActivity()
+        chain.wait.for_receipt(tx)
+    assert 10 == web3.toInt(escrow.call().getMinerInfo(CONFIRMED_PERIODS_FIELD_LENGTH, ursula, 0)
+                            .encode('latin-1'))
+    wait_time(chain, 1)
+    with pytest.raises(TransactionFailed):
+        tx = escrow.transact({'from': ursula}).confirmActivity()
+        chain.wait.for_receipt(tx)
+
+    # All periods except the current and the next one are minted at once
+    tx = escrow.transact({'from': ursula}).mint()
+    chain.wait.for_receipt(tx)
+    period = escrow.call().getCurrentPeriod()
+    assert [[period], [1000]] == escrow.call().getConfirmedPeriods(ursula)
+
+
+def test_mint_chunks(web3, chain, token, escrow_contract):
+    escrow = escrow_contract(1500)
+    creator = web3.eth.accounts[0]
+    ursula1 = web3.eth.accounts[1]
+    ursula2 = web3.eth.accounts[2]
+
+    # Give Escrow tokens for reward and initialize contract
+    tx = token.transact({'from': creator}).transfer(escrow.address, 10 ** 9)
+    chain.wait.for_receipt(tx)
+    tx = escrow.transact().initialize()
+    chain.wait.for_receipt(tx)
+
+    # Ursulas lock the same tokens without release
+    for ursula in (ursula1, ursula2):
+        tx = token.transact({'from': creator}).transfer(ursula, 1000)
+        chain.wait.for_receipt(tx)
+        tx = token.transact({'from': ursula}).approve(escrow.address, 1000)
+        chain.wait.for_receipt(tx)
+        tx = escrow.transact({'from': ursula}).deposit(1000, 2)
+        chain.wait.for_receipt(tx)
+
+    # Both confirm activity for several periods without minting
+    for _ in range(5):
+        wait_time(chain, 1)
+        for ursula in (ursula1, ursula2):
+            tx = escrow.transact({'from': ursula}).confirmActivity()
+            chain.wait.for_receipt(tx)
+    wait_time(chain, 1)
+    period = escrow.call().getCurrentPeriod()
+    assert 6 == len(escrow.call().getConfirmedPeriods(ursula1)[0])
+
+    # Can't mint zero periods
+    with pytest.raises(TransactionFailed):
+        tx = escrow.transact({'from': ursula2}).mint(0)
+        chain.wait.for_receipt(tx)
+    reward, periods = escrow.call().getPendingReward(ursula1)
+    assert 5 == periods
+    assert 0 < reward
+    assert [reward, periods] == escrow.call().getPendingReward(ursula2)
+
+    # Ursula(1) mints all periods at once, Ursula(2) mints them by chunks
+    tx = escrow.transact({'from': ursula1}).mint()
+    chain.wait.for_receipt(tx)
+    tx = escrow.transact({'from': ursula2}).mint(2)
+    chain.wait.for_receipt(tx)
+    assert 4 == len(escrow.call().getConfirmedPeriods(ursula2)[0])
+    assert [0, 0] == escrow.call().getPendingReward(ursula1)
+    assert 3 == escrow.call().getPendingReward(ursula2)[1]
+    tx = escrow.transact({'from': ursula2}).mint(1)
+    chain.wait.for_receipt(tx)
+    tx = escrow.transact({'from': ursula2}).mint(10)
+    chain.wait.for_receipt(tx)
+
+    # Results are the same
+    assert [[period], [1000]] == escrow.call().getConfirmedPeriods(ursula1)
+    assert [[period], [1000]] == escrow.call().getConfirmedPeriods(ursula2)
+    value = web3.toInt(escrow.call().getMinerInfo(VALUE_FIELD, ursula1, 0).encode('latin-1'))
+    assert 1000 + reward == value
+    assert value == web3.toInt(escrow.call().getMinerInfo(VALUE_FIELD, ursula2, 0).encode('latin-1'))
+    assert 1000 == escrow.call().getLockedTokens(ursula2)
+
+    # Nothing left for minting
+    with pytest.raises(TransactionFailed):
+        tx = escrow.transact({'from': ursula2}).mint(1)
+        chain.wait.for_receipt(tx)
+
+    events = escrow.pastEvents('Mined').get()
+    assert 4 == len(events)
+    for event in events:
+        assert period - 1 == event['args']['period']
+
+    # Minted ranges of periods are in the separate event
+    events = escrow.pastEvents('MintedPeriods').get()
+    assert 4 == len(events)
+    assert [(ursula1.lower(), period - 5, period - 1),
+            (ursula2.lower(), period - 5, period - 4),
+            (ursula2.lower(), period - 3, period - 3),
+            (ursula2.lower(), period - 2, period - 1)] == \
+        [(event['args']['owner'].lower(), event['args']['firstPeriod'], event['args']['lastPeriod'])
+         for event in events]
+
+
+def test_operator(web3, chain, token, escrow_contract):
+    escrow = escrow_contract(1500)
+    creator = web3.eth.accounts[0]
+    ursula1 = web3.eth.accounts[1]
+    ursula2 = web3.eth.accounts[2]
+    operator = web3.eth.accounts[3]
+
+    # Initialize Escrow contract, Ursulas deposit tokens
+    tx = escrow.transact().initialize()
+    chain.wait.for_receipt(tx)
+    for ursula in (ursula1, ursula2):
+        tx = token.transact({'from': creator}).transfer(ursula, 1000)
+        chain.wait.for_receipt(tx)
+        tx = token.transact({'from': ursula}).approve(escrow.address, 1000)
+        chain.wait.for_receipt(tx)
+        tx = escrow.transact({'from': ursula}).deposit(1000, 5)
+        chain.wait.for_receipt(tx)
+    wait_time(chain, 1)
+
+    # Operator can't confirm activity without authorization
+    with pytest.raises(TransactionFailed):
+        tx = escrow.transact({'from': operator}).confirmActivityFor([ursula1])
+        chain.wait.for_receipt(tx)
+    # Only miner can set operator
+    with pytest.raises(TransactionFailed):
+        tx = escrow.transact({'from': operator}).setOperator(operator)
+        chain.wait.for_receipt(tx)
+
+    tx = escrow.transact({'from': ursula1}).setOperator(operator)
+    chain.wait.for_receipt(tx)
+    assert operator.lower() == escrow.call().operators(ursula1).lower()
+    events = escrow.pastEvents('OperatorSet').get()
+    assert 1 == len(events)
+    assert ursula1.lower() == events[0]['args']['owner'].lower()
+    assert operator.lower() == events[0]['args']['operator'].lower()
+
+    # Batch fails if any miner is not authorized
+    with pytest.raises(TransactionFailed):
+        tx = escrow.transact({'from': operator}).confirmActivityFor([ursula1, ursula2])
+        chain.wait.for_receipt(tx)
+
+    # Operator confirms activity for both miners in one transaction
+    tx = escrow.transact({'from': ursula2}).setOperator(operator)
+    chain.wait.for_receipt(tx)
+    tx = escrow.transact({'from': operator}).confirmActivityFor([ursula1, ursula2])
+    chain.wait.for_receipt(tx)
+    period = escrow.call().getCurrentPeriod()
+    for ursula in (ursula1, ursula2):
+        assert [[period, period + 1], [1000, 1000]] == escrow.call().getConfirmedPeriods(ursula)
+    assert 2000 == escrow.call().lockedPerPeriod(period + 1)
+    events = escrow.pastEvents('ActivityConfirmed').get()
+    assert 4 == len(events)
+    assert ursula1.lower() == events[2]['args']['owner'].lower()
+    assert ursula2.lower() == events[3]['args']['owner'].lower()
+    assert period + 1 == events[3]['args']['period']
+
+    # Already confirmed miners are skipped
+    tx = escrow.transact({'from': operator}).confirmActivityFor([ursula1, ursula2])
+    chain.wait.for_receipt(tx)
+    assert 4 == len(escrow.pastEvents('ActivityConfirmed').get())
+    assert 2000 == escrow.call().lockedPerPeriod(period + 1)
+
+    # Miner removes the operator
+    tx = escrow.transact({'from': ursula2}).setOperator('0x' + '0' * 40)
+    chain.wait.for_receipt(tx)
+    wait_time(chain, 1)
+    with pytest.raises(TransactionFailed):
+        tx = escrow.transact({'from': operator}).confirmActivityFor([ursula2])
+        chain.wait.for_receipt(tx)
+    tx = escrow.transact({'from': operator}).confirmActivityFor([ursula1])
+    chain.wait.for_receipt(tx)
+    assert 5 == len(escrow.pastEvents('ActivityConfirmed').get())
+
+
 def test_pre_deposit(web3, chain, token, escrow_contract):
     escrow = escrow_contract(1500)
     creator = web3.eth.accounts[0]
@@ -739,6 +1137,21 @@ def test_miner_id(web3, chain, token, escrow_contract):
     assert 2 == web3.toInt(escrow.call().getMinerInfo(MINER_IDS_FIELD_LENGTH, miner, 0).encode('latin-1'))
     # TODO change when v4 of web3.py is released
     assert miner_id == escrow.call().getMinerInfo(MINER_ID_FIELD, miner, 1).encode('latin-1')
+    miner_ids = escrow.call().getMinerIds(miner)
+    assert 2 == len(miner_ids)
+    assert miner_id == miner_ids[1].encode('latin-1')
+
+    # Batch of miner ids
+    lengths, ids = escrow.call().getMinersIds([miner, creator, miner])
+    assert [2, 0, 2] == lengths
+    assert 4 == len(ids)
+    assert [i.encode('latin-1') for i in miner_ids] * 2 == [i.encode('latin-1') for i in ids]
+    assert [[], []] == escrow.call().getMinersIds([])
+
+    events = escrow.pastEvents('MinerIdSet').get()
+    assert 2 == len(events)
+    event_args = events[1]['args']
+    assert miner.lower() == event_args['owner'].lower()
 
 
 def test_verifying_state(web3, chain, token):
@@ -812,3 +1225,64 @@ def test_verifying_state(web3, chain, token):
     with pytest.raises(TransactionFailed):
         tx = dispatcher.transact({'from': creator}).upgrade(contract_library_bad.address)
         chain.wait.for_receipt(tx)
+
+
+def test_upgrading_legacy_confirmed_periods(web3, chain, token):
+    creator = web3.eth.accounts[0]
+    miner = web3.eth.accounts[1]
+
+    # Deploy version which stores confirmed periods in the plain array
+    contract_library_v1, _ = chain.provider.deploy_contract(
+        'MinersEscrowLegacyMock', deploy_args=[token.address, 1, 4 * 2 * 10 ** 7, 4, 4, 2, 100, 1500],
+        deploy_transaction={'from': creator})
+    dispatcher, _ = chain.provider.deploy_contract(
+        'Dispatcher', deploy_args=[contract_library_v1.address],
+        deploy_transaction={'from': creator})
+    contract = web3.eth.contract(
+        contract_library_v1.abi,
+        dispatcher.address,
+        ContractFactoryClass=PopulusContract)
+
+    # Miner deposits tokens, confirmed periods are written as the legacy array
+    tx = token.transact({'from': creator}).transfer(contract.address, 10 ** 9)
+    chain.wait.for_receipt(tx)
+    tx = contract.transact().initialize()
+    chain.wait.for_receipt(tx)
+    tx = token.transact({'from': creator}).transfer(miner, 1000)
+    chain.wait.for_receipt(tx)
+    tx = token.transact({'from': miner}).approve(contract.address, 1000)
+    chain.wait.for_receipt(tx)
+    tx = contract.transact({'from': miner}).deposit(1000, 2)
+    chain.wait.for_receipt(tx)
+    period = contract.call().getCurrentPeriod()
+    tx = contract.transact({'from': creator}).setLegacyConfirmedPeriods(miner, [period + 1], [1000])
+    chain.wait.for_receipt(tx)
+    assert [[period + 1], [1000]] == contract.call().getConfirmedPeriods(miner)
+
+    # Upgrade keeps the legacy array readable
+    contract_library_v2, _ = chain.provider.deploy_contract(
+        'MinersEscrow', deploy_args=[token.address, 1, 4 * 2 * 10 ** 7, 4, 4, 2, 100, 1500],
+        deploy_transaction={'from': creator})
+    tx = dispatcher.transact({'from': creator}).upgrade(contract_library_v2.address)
+    chain.wait.for_receipt(tx)
+    contract = web3.eth.contract(
+        contract_library_v2.abi,
+        dispatcher.address,
+        ContractFactoryClass=PopulusContract)
+    assert [[period + 1], [1000]] == contract.call().getConfirmedPeriods(miner)
+    assert 1 == web3.toInt(contract.call().getMinerInfo(CONFIRMED_PERIODS_FIELD_LENGTH, miner, 0)
+                           .encode('latin-1'))
+    assert 1000 == contract.call().getLockedTokens(miner)
+
+    # The first confirmation converts the legacy array to the ring buffer
+    wait_time(chain, 1)
+    tx = contract.transact({'from': miner}).confirmActivity()
+    chain.wait.for_receipt(tx)
+    assert [[period + 1, period + 2], [1000, 1000]] == contract.call().getConfirmedPeriods(miner)
+
+    # Legacy period is minted
+    wait_time(chain, 1)
+    tx = contract.transact({'from': miner}).mint()
+    chain.wait.for_receipt(tx)
+    assert [[period + 2], [1000]] == contract.call().getConfirmedPeriods(miner)
+    assert 1000 < web3.toInt(contract.call().getMinerInfo(VALUE_FIELD, miner, 0).encode('latin-1'))
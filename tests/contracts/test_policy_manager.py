@@ -17,24 +17,33 @@ REWARD_FIELD = 0
 REWARD_RATE_FIELD = 1
 LAST_MINED_PERIOD_FIELD = 2
 REWARD_DELTA_FIELD = 3
+DELTA_PERIODS_FIELD = 4
+DELTA_PERIODS_INDEXED_FIELD = 5
 
 NULL_ADDR = '0x' + '0' * 40
 
 
-@pytest.fixture()
-def escrow(web3, chain):
+@pytest.fixture(scope='module')
+def _escrow(_testerchain):
+    chain = _testerchain._chain
+    web3 = chain.web3
     creator = web3.eth.accounts[0]
     node1 = web3.eth.accounts[3]
     node2 = web3.eth.accounts[4]
     node3 = web3.eth.accounts[5]
-    # Creator deploys the escrow
-    escrow, _ = chain.provider.get_or_deploy_contract(
+    # Creator deploys the escrow once per module
+    escrow, _ = chain.provider.deploy_contract(
         'MinersEscrowForPolicyMock',
         deploy_args=[[node1, node2, node3], MINUTES_IN_PERIOD],
         deploy_transaction={'from': creator})
     return escrow
 
 
+@pytest.fixture()
+def escrow(chain, _escrow):
+    return _escrow
+
+
 @pytest.fixture(params=[False, True])
 def policy_manager(web3, chain, escrow, request):
     creator = web3.eth.accounts[0]
@@ -66,12 +75,15 @@ def policy_manager(web3, chain, escrow, request):
     return contract
 
 
+def is_delta_period(web3, policy_manager, node, period):
+    word = web3.toInt(policy_manager.call().getNodeInfo(DELTA_PERIODS_FIELD, node, period // 256).encode('latin-1'))
+    return 1 == (word >> (period % 256)) & 1
+
+
 def wait_time(chain, wait_periods):
     web3 = chain.web3
-    step = 1
     end_timestamp = web3.eth.getBlock(web3.eth.blockNumber).timestamp + wait_periods * 60 * MINUTES_IN_PERIOD
-    while web3.eth.getBlock(web3.eth.blockNumber).timestamp < end_timestamp:
-        chain.wait.for_block(web3.eth.blockNumber + step)
+    web3.testing.timeTravel(end_timestamp)
 
 
 MINUTES_IN_PERIOD = 10
@@ -289,6 +301,11 @@ def test_reward(web3, chain, escrow, policy_manager):
         tx = policy_manager.transact({'from': node1}).updateReward(node1, period + 1)
         chain.wait.for_receipt(tx)
 
+    # Can't update reward for many periods directly
+    with pytest.raises(TransactionFailed):
+        tx = policy_manager.transact({'from': node1}).updateRewards(node1, [period + 1])
+        chain.wait.for_receipt(tx)
+
     # Mint some periods
     for x in range(5):
         tx = escrow.transact({'from': node1, 'gas_price': 0}).mint(period)
@@ -296,6 +313,22 @@ def test_reward(web3, chain, escrow, policy_manager):
         period += 1
     assert 80 == web3.toInt(policy_manager.call().getNodeInfo(REWARD_FIELD, node1, 0).encode('latin-1'))
 
+    # Passed reward deltas are cleared, the next rate change is at the end of the policy
+    end_period = period + 6
+    assert 1 == web3.toInt(
+        policy_manager.call().getNodeInfo(DELTA_PERIODS_INDEXED_FIELD, node1, 0).encode('latin-1'))
+    assert 0 == web3.toInt(
+        policy_manager.call().getNodeInfo(REWARD_DELTA_FIELD, node1, period - 4).encode('latin-1'))
+    assert not is_delta_period(web3, policy_manager, node1, period - 4)
+    assert is_delta_period(web3, policy_manager, node1, end_period)
+
+    # Mint the same periods in one call gives the same reward
+    tx = escrow.transact({'from': node2, 'gas_price': 0}).mintPeriods(list(range(period - 5, period)))
+    chain.wait.for_receipt(tx)
+    assert 80 == web3.toInt(policy_manager.call().getNodeInfo(REWARD_FIELD, node2, 0).encode('latin-1'))
+    assert period - 1 == \
+        web3.toInt(policy_manager.call().getNodeInfo(LAST_MINED_PERIOD_FIELD, node2, 0).encode('latin-1'))
+
     # Withdraw
     tx = policy_manager.transact({'from': node1, 'gas_price': 0}).withdraw()
     chain.wait.for_receipt(tx)
@@ -314,6 +347,11 @@ def test_reward(web3, chain, escrow, policy_manager):
         chain.wait.for_receipt(tx)
         period += 1
     assert 120 == web3.toInt(policy_manager.call().getNodeInfo(REWARD_FIELD, node1, 0).encode('latin-1'))
+    tx = escrow.transact({'from': node2, 'gas_price': 0}).mintPeriods(list(range(period - 20, period)))
+    chain.wait.for_receipt(tx)
+    assert 200 == web3.toInt(policy_manager.call().getNodeInfo(REWARD_FIELD, node2, 0).encode('latin-1'))
+    assert 0 == web3.toInt(policy_manager.call().getNodeInfo(REWARD_RATE_FIELD, node1, 0).encode('latin-1'))
+    assert not is_delta_period(web3, policy_manager, node1, end_period)
 
     # Withdraw
     tx = policy_manager.transact({'from': node1, 'gas_price': 0}).withdraw()
@@ -586,6 +624,107 @@ def test_refund(web3, chain, escrow, policy_manager):
     assert 3 == len(events)
 
 
+def test_refund_long_downtime_history(web3, chain, escrow, policy_manager):
+    client = web3.eth.accounts[1]
+    node1 = web3.eth.accounts[3]
+
+    # Create policy
+    period = escrow.call().getCurrentPeriod()
+    tx = policy_manager.transact({'from': client, 'value': value, 'gas_price': 0}) \
+        .createPolicy(policy_id, number_of_periods, [node1])
+    chain.wait.for_receipt(tx)
+
+    # More downtime periods before the policy than one slice of the escrow contains
+    for old_period in range(1, 13):
+        tx = escrow.transact().pushDowntimePeriod(old_period, old_period)
+        chain.wait.for_receipt(tx)
+    tx = escrow.transact().pushDowntimePeriod(period + 2, period + 3)
+    chain.wait.for_receipt(tx)
+    tx = escrow.transact().setLastActivePeriod(period + number_of_periods)
+    chain.wait.for_receipt(tx)
+
+    # Only the downtime during the policy is refunded
+    wait_time(chain, number_of_periods)
+    tx = policy_manager.transact({'from': client, 'gas_price': 0}).refund(policy_id, node1)
+    chain.wait.for_receipt(tx)
+    events = policy_manager.pastEvents('RefundForArrangement').get()
+    assert 1 == len(events)
+    assert 2 * rate == events[0]['args']['value']
+    assert 13 == web3.toInt(policy_manager.call()
+                            .getPolicyInfo(INDEX_OF_DOWNTIME_PERIODS_FIELD, policy_id, node1).encode('latin-1'))
+
+
+def test_legacy_reward_deltas(web3, chain, escrow):
+    creator = web3.eth.accounts[0]
+    node1 = web3.eth.accounts[3]
+
+    policy_manager, _ = chain.provider.get_or_deploy_contract(
+        'PolicyManagerLegacyMock', deploy_args=[escrow.address],
+        deploy_transaction={'from': creator})
+    tx = escrow.transact({'from': creator}).setPolicyManager(policy_manager.address)
+    chain.wait.for_receipt(tx)
+
+    # Reward deltas written by the previous version are not marked
+    period = escrow.call().getCurrentPeriod()
+    tx = policy_manager.transact().setLegacyRewardDelta(node1, period, period + 2, rate)
+    chain.wait.for_receipt(tx)
+    tx = policy_manager.transact().setLegacyRewardDelta(node1, period, period + 4, -rate)
+    chain.wait.for_receipt(tx)
+    assert 0 == web3.toInt(
+        policy_manager.call().getNodeInfo(DELTA_PERIODS_INDEXED_FIELD, node1, 0).encode('latin-1'))
+    assert not is_delta_period(web3, policy_manager, node1, period + 2)
+
+    # New policy marks its periods before indexing
+    tx = policy_manager.transact({'from': creator, 'value': 2 * rate}) \
+        .createPolicy(os.urandom(20), 2, [node1])
+    chain.wait.for_receipt(tx)
+    assert is_delta_period(web3, policy_manager, node1, period + 1)
+    assert is_delta_period(web3, policy_manager, node1, period + 3)
+
+    # But all deltas are applied by walking every period, marks are cleared too
+    tx = escrow.transact({'from': node1}).mintPeriods([period + 1, period + 2])
+    chain.wait.for_receipt(tx)
+    assert 3 * rate == web3.toInt(policy_manager.call().getNodeInfo(REWARD_FIELD, node1, 0).encode('latin-1'))
+    assert 2 * rate == web3.toInt(
+        policy_manager.call().getNodeInfo(REWARD_RATE_FIELD, node1, 0).encode('latin-1'))
+    assert not is_delta_period(web3, policy_manager, node1, period + 1)
+    assert is_delta_period(web3, policy_manager, node1, period + 3)
+    assert 0 == web3.toInt(
+        policy_manager.call().getNodeInfo(REWARD_DELTA_FIELD, node1, period + 2).encode('latin-1'))
+
+    # Only owner can index the rest of the deltas
+    with pytest.raises(TransactionFailed):
+        tx = policy_manager.transact({'from': node1}).indexDeltaPeriods(node1, period + 4)
+        chain.wait.for_receipt(tx)
+    # Bound must cover all deltas of the node
+    with pytest.raises(TransactionFailed):
+        tx = policy_manager.transact({'from': creator}).indexDeltaPeriods(node1, period)
+        chain.wait.for_receipt(tx)
+    with pytest.raises(TransactionFailed):
+        tx = policy_manager.transact({'from': creator}).indexDeltaPeriods(node1, period + 3)
+        chain.wait.for_receipt(tx)
+    tx = policy_manager.transact({'from': creator}).indexDeltaPeriods(node1, period + 4)
+    chain.wait.for_receipt(tx)
+    assert 1 == web3.toInt(
+        policy_manager.call().getNodeInfo(DELTA_PERIODS_INDEXED_FIELD, node1, 0).encode('latin-1'))
+    assert is_delta_period(web3, policy_manager, node1, period + 4)
+
+    # Node can be indexed only once
+    with pytest.raises(TransactionFailed):
+        tx = policy_manager.transact({'from': creator}).indexDeltaPeriods(node1, period + 4)
+        chain.wait.for_receipt(tx)
+
+    # Indexed deltas give the same reward and are cleared
+    tx = escrow.transact({'from': node1}).mintPeriods([period + 3, period + 4, period + 5])
+    chain.wait.for_receipt(tx)
+    assert 4 * rate == web3.toInt(policy_manager.call().getNodeInfo(REWARD_FIELD, node1, 0).encode('latin-1'))
+    assert 0 == web3.toInt(policy_manager.call().getNodeInfo(REWARD_RATE_FIELD, node1, 0).encode('latin-1'))
+    assert not is_delta_period(web3, policy_manager, node1, period + 3)
+    assert not is_delta_period(web3, policy_manager, node1, period + 4)
+    assert 0 == web3.toInt(
+        policy_manager.call().getNodeInfo(REWARD_DELTA_FIELD, node1, period + 4).encode('latin-1'))
+
+
 def test_verifying_state(web3, chain):
     creator = web3.eth.accounts[0]
     address1 = web3.eth.accounts[1].lower()
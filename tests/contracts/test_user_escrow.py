@@ -2,37 +2,38 @@ import pytest
 from ethereum.tester import TransactionFailed
 
 
-@pytest.fixture()
-def token(web3, chain):
-    creator = web3.eth.accounts[0]
-    # Create an ERC20 token
-    token, _ = chain.provider.get_or_deploy_contract(
-        'NuCypherKMSToken', deploy_args=[2 * 10 ** 9],
-        deploy_transaction={'from': creator})
-    return token
-
-
-@pytest.fixture()
-def escrow(web3, chain, token):
-    creator = web3.eth.accounts[0]
-    # Creator deploys the escrow
-    contract, _ = chain.provider.get_or_deploy_contract(
-        'MinersEscrowForUserEscrowMock', deploy_args=[token.address],
+@pytest.fixture(scope='module')
+def _escrow(_testerchain, _token):
+    chain = _testerchain._chain
+    creator = chain.web3.eth.accounts[0]
+    # Creator deploys the escrow once per module
+    contract, _ = chain.provider.deploy_contract(
+        'MinersEscrowForUserEscrowMock', deploy_args=[_token.address],
         deploy_transaction={'from': creator})
 
     # Give escrow some coins
-    tx = token.transact({'from': creator}).transfer(contract.address, 10000)
+    tx = _token.transact({'from': creator}).transfer(contract.address, 10000)
     chain.wait.for_receipt(tx)
 
     return contract
 
 
 @pytest.fixture()
-def policy_manager(chain):
-    contract, _ = chain.provider.get_or_deploy_contract('PolicyManagerForUserEscrowMock')
+def escrow(chain, token, _escrow):
+    return _escrow
+
+
+@pytest.fixture(scope='module')
+def _policy_manager(_testerchain):
+    contract, _ = _testerchain._chain.provider.deploy_contract('PolicyManagerForUserEscrowMock')
     return contract
 
 
+@pytest.fixture()
+def policy_manager(chain, _policy_manager):
+    return _policy_manager
+
+
 @pytest.fixture()
 def user_escrow(web3, chain, token, escrow, policy_manager):
     creator = web3.eth.accounts[0]
@@ -51,10 +52,8 @@ def user_escrow(web3, chain, token, escrow, policy_manager):
 
 def wait_time(chain, wait_seconds):
     web3 = chain.web3
-    step = 1
     end_timestamp = web3.eth.getBlock(web3.eth.blockNumber).timestamp + wait_seconds
-    while web3.eth.getBlock(web3.eth.blockNumber).timestamp < end_timestamp:
-        chain.wait.for_block(web3.eth.blockNumber + step)
+    web3.testing.timeTravel(end_timestamp)
 
 
 def test_escrow(web3, chain, token, user_escrow):
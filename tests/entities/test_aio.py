@@ -0,0 +1,42 @@
+import asyncio
+
+from nkms_eth.aio.blockchain import AsyncBlockchain
+from nkms_eth.aio.escrow import AsyncEscrow
+from nkms_eth.aio.miner import AsyncMiner
+from nkms_eth.aio.token import AsyncNuCypherKMSToken
+
+
+M = 10 ** 6
+
+
+def test_async_lock_confirm_mint(testerchain, token, escrow):
+    token._airdrop(amount=10000)
+
+    blockchain = AsyncBlockchain(testerchain, poll_interval=0)
+    async_token = AsyncNuCypherKMSToken(blockchain=blockchain, token=token)
+    async_escrow = AsyncEscrow(blockchain=blockchain, token=async_token, escrow=escrow)
+    miners = [AsyncMiner(escrow=async_escrow, address=address)
+              for address in testerchain._chain.web3.eth.accounts[1:]]
+
+    async def run():
+        # Overlap the deposits of all miners
+        receipts = await asyncio.gather(*(miner.lock(amount=1000 * M, locktime=10) for miner in miners))
+        assert len(receipts) == len(miners)
+        assert all(len(txhashes) == 3 for txhashes in receipts)
+
+        swarm = [address async for address in async_escrow.swarm(page_size=3)]
+        assert swarm == [miner.address for miner in miners]
+
+        await blockchain.wait_time(escrow.hours_per_period)
+        await asyncio.gather(*(miner.confirm_activity() for miner in miners))
+        await blockchain.wait_time(escrow.hours_per_period * 2)
+
+        sample = await async_escrow.sample(quantity=3)
+        assert len(sample) == 3
+        assert set(sample) <= set(swarm)
+
+        await asyncio.gather(*(miner.mint() for miner in miners))
+        for miner in miners:
+            assert escrow._get_miner_info(escrow.MinerInfoField.VALUE, miner.address) > 1000 * M
+
+    asyncio.get_event_loop().run_until_complete(run())
@@ -0,0 +1,155 @@
+import json
+
+import pytest
+
+from nkms_eth.blockchain import Blockchain
+from nkms_eth.escrow import Escrow
+from nkms_eth.miner import Miner
+from nkms_eth.profiler import RPCProfiler
+from nkms_eth.receipts import ReceiptWatcher
+from nkms_eth.token import NuCypherKMSToken
+
+
+M = 10 ** 6
+
+
+def test_receipt_watcher(testerchain, token):
+    watcher = testerchain.receipts
+    accounts = testerchain._chain.web3.eth.accounts
+
+    txhashes = [token.transact({'from': token.creator}).transfer(address, 100) for address in accounts[1:]]
+
+    mined = list()
+    futures = [watcher.watch(txhash, callback=mined.append) for txhash in txhashes]
+    assert len(watcher) == len(txhashes)
+
+    # One poll resolves all mined transactions
+    assert watcher.poll() == len(txhashes)
+    assert len(watcher) == 0
+    assert all(future.done() for future in futures)
+    assert [receipt['transactionHash'] for receipt in mined] == txhashes
+
+    receipts = watcher.wait_all(txhashes)
+    assert [receipt['transactionHash'] for receipt in receipts] == txhashes
+    assert watcher.wait(txhashes[0]) == receipts[0]
+
+    # Unknown transaction is never mined
+    unknown_txhash = '0x' + '00' * 32
+    with pytest.raises(ReceiptWatcher.Timeout):
+        watcher.wait(unknown_txhash, timeout=0)
+
+
+def test_receipt_watcher_new_blocks(testerchain, token, monkeypatch):
+    web3 = testerchain._chain.web3
+    watcher = ReceiptWatcher(testerchain, timeout=60)
+
+    # Not mined transaction is requested once when it is watched
+    unknown_txhash = '0x' + '00' * 32
+    future = watcher.watch(unknown_txhash)
+    assert watcher.poll() == 0
+
+    requested = list()
+    get_receipt = web3.eth.getTransactionReceipt
+    monkeypatch.setattr(web3.eth, 'getTransactionReceipt',
+                        lambda txhash: requested.append(txhash) or get_receipt(txhash))
+
+    # Then new blocks are matched against the pending transactions without requesting receipts
+    token.transact({'from': token.creator}).transfer(web3.eth.accounts[1], 100)
+    assert watcher.poll() == 0
+    assert requested == []
+
+    # Only the newly watched transaction is requested, the other one is not in the new block
+    txhash = token.transact({'from': token.creator}).transfer(web3.eth.accounts[2], 100)
+    mined_future = watcher.watch(txhash)
+    assert watcher.poll() == 1
+    assert requested == [txhash]
+    assert mined_future.result()['transactionHash'] == txhash
+    assert not future.done()
+
+
+def test_wait_time(testerchain):
+    web3 = testerchain._chain.web3
+    block_number = web3.eth.blockNumber
+    timestamp = web3.eth.getBlock(block_number).timestamp
+
+    testerchain.wait_time(wait_hours=10)
+
+    # Exactly one block at the target time
+    assert web3.eth.blockNumber == block_number + 1
+    assert web3.eth.getBlock(web3.eth.blockNumber).timestamp >= timestamp + 10 * 60 * 60
+
+
+def test_wait_time_by_new_blocks(testerchain, monkeypatch):
+    web3 = testerchain._chain.web3
+    timestamp = web3.eth.getBlock(web3.eth.blockNumber).timestamp
+
+    # Other nodes produce a block every half an hour while the chain is polled
+    def mine_block(seconds):
+        web3.testing.timeTravel(web3.eth.getBlock(web3.eth.blockNumber).timestamp + 30 * 60)
+        web3.testing.mine(1)
+    monkeypatch.setattr('nkms_eth.blockchain.time.sleep', mine_block)
+
+    # Waiting by the new blocks as on any chain except tester
+    Blockchain.wait_time(testerchain, wait_hours=2, poll_interval=0)
+    assert web3.eth.getBlock(web3.eth.blockNumber).timestamp >= timestamp + 2 * 60 * 60
+
+
+def test_gas_accounting(testerchain, token, escrow):
+    assert testerchain.gas_stats() == dict()
+    accountant = testerchain.enable_gas_accounting()
+
+    token._airdrop(amount=10000)
+    miners = [Miner(blockchain=testerchain, token=token, escrow=escrow, address=address)
+              for address in testerchain._chain.web3.eth.accounts[1:3]]
+    for miner in miners:
+        miner.lock(amount=1000*M, locktime=100)
+
+    stats = testerchain.gas_stats()
+    transfers = stats[(NuCypherKMSToken._contract_name, 'transfer')]
+    assert transfers['count'] == len(testerchain._chain.web3.eth.accounts) - 1
+    assert 0 < transfers['gas_min'] <= transfers['gas_p50'] <= transfers['gas_max']
+
+    deposits = stats[(Escrow._contract_name, 'deposit')]
+    assert deposits['count'] == 2
+    assert deposits['gas_total'] == sum(record.gas_used for record in accountant.records
+                                        if record.method == 'deposit')
+
+    by_sender = testerchain.gas_stats(by_sender=True)
+    assert (Escrow._contract_name, 'switchLock', miners[0].address) in by_sender
+
+    rows = json.loads(accountant.to_json())
+    assert len(rows) == len(stats)
+    assert accountant.to_csv().splitlines()[0].startswith('contract,method,count,gas_total')
+
+
+def test_rpc_profiler():
+    profiler = RPCProfiler()
+    make_request = profiler.middleware(lambda method, params: {'result': '0x' + '00' * 32}, web3=None)
+
+    with profiler.profile('sample') as sample_report:
+        for _ in range(3):
+            make_request('eth_call', [{'to': '0x' + '11' * 20}, 'latest'])
+        with profiler.profile('block') as block_report:
+            make_request('eth_blockNumber', [])
+    make_request('eth_blockNumber', [])
+
+    assert len(profiler.report) == 5
+    assert len(sample_report) == 4
+    assert sample_report.count('eth_call') == 3
+    assert len(block_report) == 1
+
+    stats = sample_report.by_method()
+    assert list(stats) == ['eth_call', 'eth_blockNumber']
+    assert stats['eth_call']['response_size'] == 3 * len('{"result": "0x' + '00' * 32 + '"}')
+    assert sum(sample_report.histogram().values()) == 4
+    assert str(sample_report).startswith('sample: 4 calls (eth_call 3, eth_blockNumber 1) in ')
+
+    # Only the last calls are kept in the report of all calls
+    profiler = RPCProfiler(max_records=2)
+    make_request = profiler.middleware(lambda method, params: {'result': '0x0'}, web3=None)
+    with profiler.profile('block') as block_report:
+        for _ in range(3):
+            make_request('eth_blockNumber', [])
+    make_request('eth_gasPrice', [])
+    assert len(block_report) == 3
+    assert [record.method for record in profiler.report.records] == ['eth_blockNumber', 'eth_gasPrice']
@@ -1,3 +1,4 @@
+import os
 import random
 
 import pytest
@@ -67,3 +68,145 @@ def test_get_swarm(testerchain, token, escrow):
     except ValueError:
         pytest.fail()
 
+    # Get the swarm by pages with and without prefetching
+    assert swarm_addresses == list(escrow.swarm(page_size=2, prefetch=True))
+    assert swarm_addresses == list(escrow.swarm(page_size=3, prefetch=False))
+    assert swarm_addresses == list(escrow.swarm(page_size=9))
+
+
+def test_stake_index(testerchain, token, escrow):
+    token._airdrop(amount=10000)
+
+    # Create 9 Miners
+    for u in testerchain._chain.web3.eth.accounts[1:]:
+        miner = Miner(blockchain=testerchain, token=token, escrow=escrow, address=u)
+        amount = (10+random.randrange(9000)) * M
+        miner.lock(amount=amount, locktime=100)
+
+    testerchain.wait_time(escrow.hours_per_period)
+
+    duration = 10
+    stake_index = escrow.stake_index(duration)
+    assert stake_index.period == escrow().getCurrentPeriod()
+    assert len(stake_index) == 9
+    assert stake_index.total > 0
+
+    # Only miners which confirmed activity for the current period are indexed
+    active_miners = list(escrow.active_miners())
+    assert sorted(m.lower() for m in testerchain._chain.web3.eth.accounts[1:]) == \
+        sorted(m.lower() for m in active_miners)
+    assert active_miners == list(escrow.active_miners(page_size=2))
+    assert [] == list(escrow.active_miners(period=stake_index.period - 1))
+
+    # Local lookup gives the same miners as the contract
+    points = sorted(random.randrange(stake_index.total) for _ in range(20))
+    expected = escrow().findCumSums(points, duration)
+    assert [a.lower() for a in expected] == [a.lower() for a in stake_index.find(points)]
+    assert escrow.null_addr == escrow().findCumSums([stake_index.total], duration)[0].lower()
+    assert [] == stake_index.find([stake_index.total])
+
+    # Index is cached until locked tokens are changed
+    assert not stake_index.is_stale()
+    assert stake_index is escrow.stake_index(duration)
+    assert 0 == stake_index.update()
+
+    # Only the miner named in the new events is read again
+    miner.confirm_activity()
+    assert 1 == stake_index.update()
+    assert testerchain._chain.web3.eth.blockNumber == stake_index.block_number
+    assert not stake_index.is_stale()
+    assert [a.lower() for a in escrow().findCumSums(points, duration)] == \
+        [a.lower() for a in stake_index.find(points)]
+    assert 0 == stake_index.update()
+
+    # Index built with the mirror is synced with the chain first,
+    # miners which are unknown to the mirror are read from the contract
+    escrow.attach_mirror(from_block=testerchain._chain.web3.eth.blockNumber + 1)
+    miner.confirm_activity()
+    mirrored_index = escrow.stake_index(duration)
+    assert len(mirrored_index) == 9
+    assert [a.lower() for a in escrow().findCumSums(points, duration)] == \
+        [a.lower() for a in mirrored_index.find(points)]
+
+    # Index is rebuilt in the next period, only the last confirmed miner is active
+    testerchain.wait_time(escrow.hours_per_period)
+    assert mirrored_index.is_stale()
+    escrow.stake_index(duration)
+    assert not mirrored_index.is_stale()
+    assert mirrored_index.period == escrow().getCurrentPeriod()
+    assert [miner.address.lower()] == [a.lower() for a in mirrored_index.miners]
+
+
+def test_state_mirror(testerchain, token, escrow):
+    token._airdrop(amount=10000)
+    mirror = escrow.attach_mirror()
+    assert [] == list(escrow.swarm())
+
+    # Create 9 Miners
+    miners = list()
+    for u in testerchain._chain.web3.eth.accounts[1:]:
+        miner = Miner(blockchain=testerchain, token=token, escrow=escrow, address=u)
+        amount = (10+random.randrange(9000)) * M
+        miner.lock(amount=amount, locktime=2)
+        miners.append(miner)
+
+    assert 9 == len(list(escrow.swarm()))
+    assert [] == mirror.check_consistency()
+
+    # Confirm, mine and withdraw
+    testerchain.wait_time(escrow.hours_per_period)
+    for miner in miners[:5]:
+        miner.confirm_activity()
+    testerchain.wait_time(escrow.hours_per_period*2)
+    for miner in miners[:3]:
+        miner.mint()
+    miners[0].withdraw()
+
+    mirror.sync()
+    assert [] == mirror.check_consistency()
+
+    # Only the oldest period is minted, the next one stays confirmed
+    assert 2 == len(escrow.miner_info(miners[3].address).confirmed_periods)
+    miners[3].mint(max_periods=1)
+    mirror.sync()
+    assert [] == mirror.check_consistency()
+    assert 1 == len(mirror[miners[3].address].confirmed_periods)
+    assert mirror[miners[0].address].value == 0
+    assert mirror[miners[1].address].value > 0
+
+    # DHT keys are mirrored too
+    mock_dht_key = os.urandom(32)
+    miners[1].publish_dht_key(mock_dht_key)
+    assert (mock_dht_key, ) == miners[1].get_dht_key()
+
+    # Full resync gives the same state
+    confirmed_periods = mirror[miners[1].address].confirmed_periods
+    mirror.resync()
+    assert confirmed_periods == mirror[miners[1].address].confirmed_periods
+    assert [] == mirror.check_consistency()
+
+
+def test_get_dht(testerchain, token, escrow):
+    token._airdrop(amount=10000)
+
+    miners = list()
+    for u in testerchain._chain.web3.eth.accounts[1:4]:
+        miner = Miner(blockchain=testerchain, token=token, escrow=escrow, address=u)
+        miner.lock(amount=1000*M, locktime=2)
+        miners.append(miner)
+    assert dict() == escrow.get_dht()
+
+    first_key, second_key, third_key = os.urandom(32), os.urandom(32), os.urandom(32)
+    miners[0].publish_dht_key(first_key)
+    miners[1].publish_dht_key(second_key)
+
+    # Directory is refreshed with the new IDs only
+    dht = escrow.get_dht(page_size=2)
+    assert {miners[0].address: (first_key, ), miners[1].address: (second_key, )} == dht
+
+    miners[0].publish_dht_key(third_key)
+    dht = escrow.get_dht()
+    assert (first_key, third_key) == dht[miners[0].address]
+    assert (second_key, ) == dht[miners[1].address]
+    assert miners[2].address not in dht
+    assert dht == escrow.get_dht()
@@ -4,7 +4,7 @@ import os
 import pytest
 
 from nkms_eth.escrow import Escrow
-from nkms_eth.miner import Miner
+from nkms_eth.miner import Miner, MinerFleet, MintScheduler
 from nkms_eth.token import NuCypherKMSToken
 
 
@@ -93,3 +93,142 @@ def test_select_ursulas(testerchain, token, escrow):
 
     with pytest.raises(Escrow.NotEnoughUrsulas):
         escrow.sample(quantity=100)  # Waay more than we have deployed
+
+
+def test_miner_info(testerchain, token, escrow):
+    token._airdrop(amount=10000)
+
+    miner_addr = testerchain._chain.web3.eth.accounts[1]
+    miner = Miner(blockchain=testerchain, token=token, escrow=escrow, address=miner_addr)
+    miner.lock(amount=1000*M, locktime=10)
+    mock_dht_key = os.urandom(32)
+    miner.publish_dht_key(mock_dht_key)
+
+    info = escrow.miner_info(miner_addr)
+    assert miner_addr == info.address
+    assert 1000*M == info.value
+    assert 1000*M == info.locked_value
+    assert info.release
+    assert 1 == len(info.confirmed_periods)
+    assert (escrow().getCurrentPeriod() + 1, 1000*M) == info.confirmed_periods[0]
+    assert [] == info.downtime
+    assert [mock_dht_key] == info.miner_ids
+
+    # Nothing for unknown miner
+    info = escrow.miner_info(testerchain._chain.web3.eth.accounts[2])
+    assert 0 == info.value
+    assert [] == info.confirmed_periods
+
+
+def test_pipelined_lock(testerchain, token, escrow):
+    token._airdrop(amount=10000, pipeline=True)
+
+    for address in testerchain._chain.web3.eth.accounts[1:]:
+        assert token.balance(address) == 10000 * M
+
+    miner_addr = testerchain._chain.web3.eth.accounts[1]
+    miner = Miner(blockchain=testerchain, token=token, escrow=escrow, address=miner_addr)
+
+    txhashes = miner.lock(amount=1000*M, locktime=100, pipeline=True)
+    assert len(set(txhashes)) == 3
+
+    # Transactions were mined in the sending order
+    receipts = [testerchain._chain.web3.eth.getTransactionReceipt(txhash) for txhash in txhashes]
+    assert [(r['blockNumber'], r['transactionIndex']) for r in receipts] == \
+           sorted((r['blockNumber'], r['transactionIndex']) for r in receipts)
+
+    assert escrow._get_miner_info(escrow.MinerInfoField.VALUE, miner_addr) == 1000 * M
+    assert token.balance(miner_addr) == 9000 * M
+
+
+def test_mint_chunks(testerchain, token, escrow):
+    token._airdrop(amount=10000)
+
+    miner_addr = testerchain._chain.web3.eth.accounts[1]
+    miner = Miner(blockchain=testerchain, token=token, escrow=escrow, address=miner_addr)
+    miner.lock(amount=1000*M, locktime=100)
+
+    # Confirm several periods without minting
+    for _ in range(4):
+        testerchain.wait_time(escrow.hours_per_period)
+        miner.confirm_activity()
+    testerchain.wait_time(escrow.hours_per_period)
+    assert 5 == len(escrow.miner_info(miner_addr).confirmed_periods)
+
+    # Too low gas limit even for one period
+    with pytest.raises(Miner.NotEnoughGas):
+        miner.mint(gas_limit=21000)
+
+    # Each chunk stays within the gas limit
+    gas_limit = miner._mint_gas(2)
+    txhash = miner.mint(gas_limit=gas_limit)
+    assert testerchain._chain.web3.eth.getTransactionReceipt(txhash)['gasUsed'] <= gas_limit
+    assert 3 == len(escrow.miner_info(miner_addr).confirmed_periods)
+
+    miner.mint(max_periods=1)
+    assert 2 == len(escrow.miner_info(miner_addr).confirmed_periods)
+
+    miner.mint()
+    info = escrow.miner_info(miner_addr)
+    assert [escrow().getCurrentPeriod()] == [period for period, _ in info.confirmed_periods]
+    assert info.value > 1000*M
+
+
+def test_miner_fleet(testerchain, token, escrow):
+    token._airdrop(amount=10000)
+
+    operator, *addresses = testerchain._chain.web3.eth.accounts
+    for address in addresses:
+        miner = Miner(blockchain=testerchain, token=token, escrow=escrow, address=address)
+        miner.lock(amount=1000*M, locktime=10)
+
+    fleet = MinerFleet(blockchain=testerchain, escrow=escrow, operator=operator, miners=addresses)
+    assert len(addresses) == len(fleet.authorize())
+    assert [] == fleet.authorize()
+
+    # Batches are smaller than the gas limit
+    testerchain.wait_time(escrow.hours_per_period)
+    gas_limit = fleet._confirm_gas(addresses[:3]) + 1
+    batches = fleet.batches(gas_limit=gas_limit)
+    assert addresses == [address for batch in batches for address in batch]
+    assert all(fleet._confirm_gas(batch) < gas_limit for batch in batches)
+    with pytest.raises(Miner.NotEnoughGas):
+        fleet.batches(gas_limit=21000)
+
+    # Activity of all miners is confirmed by the operator
+    txhashes = fleet.confirm_all()
+    assert 1 == len(txhashes)
+    web3 = testerchain._chain.web3
+    assert web3.eth.getTransaction(txhashes[0])['gas'] < web3.eth.getBlock('latest')['gasLimit']
+    next_period = escrow().getCurrentPeriod() + 1
+    for address in addresses:
+        assert next_period == escrow.miner_info(address).confirmed_periods[-1][0]
+
+
+def test_mint_scheduler(testerchain, token, escrow):
+    token._airdrop(amount=10000)
+
+    miner_addr = testerchain._chain.web3.eth.accounts[1]
+    miner = Miner(blockchain=testerchain, token=token, escrow=escrow, address=miner_addr)
+    miner.lock(amount=1000*M, locktime=100)
+    assert 0 == miner.pending_reward()
+
+    # Reward never pays off, so minting waits for the backlog of not mined periods
+    scheduler = MintScheduler(miner, min_ratio=10 ** 30, gas_price=1)
+    for _ in range(escrow.max_periods - 2):
+        testerchain.wait_time(escrow.hours_per_period)
+        assert scheduler.tick() is None
+        miner.confirm_activity()
+    testerchain.wait_time(escrow.hours_per_period)
+    reward = miner.pending_reward()
+    assert 0 < reward
+    assert scheduler.tick() is not None
+    assert 1000*M + reward == escrow.miner_info(miner_addr).value
+    assert 0 == miner.pending_reward()
+
+    # Any reward pays off without gas price
+    scheduler = MintScheduler(miner, min_ratio=1, gas_price=0)
+    miner.confirm_activity()
+    assert scheduler.tick() is None
+    testerchain.wait_time(escrow.hours_per_period)
+    assert scheduler.tick() is not None